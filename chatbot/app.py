@@ -1,11 +1,30 @@
 """High-level entrypoints for the chatbot."""
 from __future__ import annotations
 
+import logging
 import os
+import time
 from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
 
+from langchain_core.globals import set_llm_cache
+from langchain_core.runnables import RunnableLambda
+
+from .cache.llm import TieredLLMCache
+from .cache.semantic import SemanticAnswerCache, file_stamp
 from .config import get_settings
-from .graph.builder import build_app
+from .graph.budget import track_usage
+from .graph.context_packer import track_packing
+from .graph.builder import build_app, prefetch_vector_documents
+from .graph.metrics import record_request
+from .dataset.geo_index import find_zone
+from .retrieval.batch_search import embed_queries, use_prefetched
+from .retrieval.query_parser import extract_constraints
+from .retrieval.time_filter import extract_time_window, query_time_window
+from .retrieval.vector_store import VectorStoreUnavailable, _get_embeddings
+from .streaming import STREAM_MODES, AnswerStreamer, StreamEvent, resolve_policy
+
+LOGGER = logging.getLogger(__name__)
 
 
 def _configure_tracing() -> None:
@@ -24,13 +43,275 @@ def _configure_tracing() -> None:
             os.environ[key] = value
 
 
+@lru_cache(maxsize=1)
+def get_llm_cache() -> Optional[TieredLLMCache]:
+    settings = get_settings()
+    if not settings.llm_cache_enabled:
+        return None
+    return TieredLLMCache(settings.llm_cache_path, memory_entries=settings.llm_cache_memory_entries)
+
+
 @lru_cache(maxsize=1)
 def get_app():
     _configure_tracing()
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        set_llm_cache(llm_cache)
     return build_app()
 
 
-def run_chatbot(query: str) -> str:
-    app = get_app()
-    result = app.invoke({"query": query})
-    return result.get("response", "")
+@lru_cache(maxsize=1)
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    settings = get_settings()
+    if not settings.semantic_cache_enabled:
+        return None
+    try:
+        embeddings = _get_embeddings()
+    except VectorStoreUnavailable:
+        return None
+    seed_path = settings.markets_seed_path
+    return SemanticAnswerCache(
+        embeddings,
+        threshold=settings.semantic_cache_threshold,
+        ttl_seconds=settings.semantic_cache_ttl_seconds,
+        max_entries=settings.semantic_cache_max_entries,
+        version_fn=lambda: file_stamp(seed_path),
+    )
+
+
+def _cached_answer(cache: SemanticAnswerCache, lookup: Any) -> Any:
+    try:
+        return lookup()
+    except Exception as exc:  # pragma: no cover - cache must never break answering
+        LOGGER.warning("시맨틱 캐시 조회 실패: %s", exc)
+        return None, None
+
+
+def _answer_cache_key(query: str) -> Hashable:
+    """Exact part of the answer-cache key: hard constraints (districts ...), named zone and time window."""
+
+    zone = find_zone(query)
+    return extract_constraints(query), zone.label if zone else None, extract_time_window(query)
+
+
+def _remember_answer(
+    cache: Optional[SemanticAnswerCache], query: str, vector: Any, result: Dict[str, Any], key: Hashable = None
+) -> None:
+    response = result.get("response", "")
+    if cache is not None and vector is not None and response:
+        cache.store(query, vector, {"response": response, "context": result.get("context", [])}, key=key)
+
+
+def _answer_cache_for(query: str, user_location: Optional[Tuple[float, float]]) -> Optional[SemanticAnswerCache]:
+    # "Near me" answers depend on where the user is and "지금/오늘" answers on when they
+    # ask, so both bypass the shared answer cache.
+    if user_location is not None:
+        return None
+    window = query_time_window(query)
+    if window is not None and window.relative:
+        return None
+    return get_answer_cache()
+
+
+def _initial_state(query: str, user_location: Optional[Tuple[float, float]]) -> Dict[str, Any]:
+    state: Dict[str, Any] = {"query": query}
+    if user_location is not None:
+        state["user_location"] = (float(user_location[0]), float(user_location[1]))
+    return state
+
+
+def _finish(result: Dict[str, Any], started: float) -> Dict[str, Any]:
+    record_request(result, time.perf_counter() - started)
+    return result
+
+
+def invoke_chatbot(query: str, *, user_location: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """Run the graph (or serve a semantically cached answer) and return the final state.
+
+    ``user_location`` is the user's ``(lat, lon)``, used to rank markets for "near me" questions.
+    """
+
+    started = time.perf_counter()
+    cache = _answer_cache_for(query, user_location)
+    vector = key = None
+    if cache is not None:
+        key = _answer_cache_key(query)
+        cached, vector = _cached_answer(cache, lambda: cache.lookup(query, key))
+        if cached is not None:
+            return _finish({**cached, "query": query, "cache_hit": True}, started)
+
+    with track_usage(), track_packing():
+        result = get_app().invoke(_initial_state(query, user_location))
+    _remember_answer(cache, query, vector, result, key)
+    return _finish({**result, "cache_hit": False}, started)
+
+
+async def ainvoke_chatbot(query: str, *, user_location: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """Async twin of ``invoke_chatbot``: many conversations can share one event loop."""
+
+    started = time.perf_counter()
+    cache = _answer_cache_for(query, user_location)
+    vector = key = None
+    if cache is not None:
+        key = _answer_cache_key(query)
+        try:
+            cached, vector = await cache.alookup(query, key)
+        except Exception as exc:  # pragma: no cover - cache must never break answering
+            LOGGER.warning("시맨틱 캐시 조회 실패: %s", exc)
+            cached = None
+        if cached is not None:
+            return _finish({**cached, "query": query, "cache_hit": True}, started)
+
+    with track_usage(), track_packing():
+        result = await get_app().ainvoke(_initial_state(query, user_location))
+    _remember_answer(cache, query, vector, result, key)
+    return _finish({**result, "cache_hit": False}, started)
+
+
+def stream_chatbot(
+    query: str, *, policy: Optional[str] = None, user_location: Optional[Tuple[float, float]] = None
+) -> Iterator[StreamEvent]:
+    """Yield answer tokens as ``generate``/``basic_generate`` produce them, then a final event.
+
+    ``policy`` is ``"retract"`` (stream, then retract if the hallucination check fails)
+    or ``"buffer"`` (hold graded answers until they pass); defaults to ``STREAM_POLICY``.
+    """
+
+    streamer = AnswerStreamer(resolve_policy(policy, get_settings().stream_policy))
+    cache = _answer_cache_for(query, user_location)
+    vector = key = None
+    if cache is not None:
+        key = _answer_cache_key(query)
+        cached, vector = _cached_answer(cache, lambda: cache.lookup(query, key))
+        if cached is not None:
+            streamer.state.update(cached, cache_hit=True)
+            yield from streamer.final(cached.get("response", ""), cache_hit=True)
+            _finish(streamer.state, streamer.started)
+            return
+
+    with track_usage(), track_packing():
+        for mode, payload in get_app().stream(_initial_state(query, user_location), stream_mode=STREAM_MODES):
+            yield from streamer.feed(mode, payload)
+    _remember_answer(cache, query, vector, streamer.state, key)
+    _finish(streamer.state, streamer.started)
+
+
+async def astream_chatbot(
+    query: str, *, policy: Optional[str] = None, user_location: Optional[Tuple[float, float]] = None
+) -> AsyncIterator[StreamEvent]:
+    """Async twin of ``stream_chatbot`` for ASGI handlers."""
+
+    streamer = AnswerStreamer(resolve_policy(policy, get_settings().stream_policy))
+    cache = _answer_cache_for(query, user_location)
+    vector = key = None
+    if cache is not None:
+        key = _answer_cache_key(query)
+        try:
+            cached, vector = await cache.alookup(query, key)
+        except Exception as exc:  # pragma: no cover - cache must never break answering
+            LOGGER.warning("시맨틱 캐시 조회 실패: %s", exc)
+            cached = None
+        if cached is not None:
+            streamer.state.update(cached, cache_hit=True)
+            for event in streamer.final(cached.get("response", ""), cache_hit=True):
+                yield event
+            _finish(streamer.state, streamer.started)
+            return
+
+    with track_usage(), track_packing():
+        async for mode, payload in get_app().astream(_initial_state(query, user_location), stream_mode=STREAM_MODES):
+            for event in streamer.feed(mode, payload):
+                yield event
+    _remember_answer(cache, query, vector, streamer.state, key)
+    _finish(streamer.state, streamer.started)
+
+
+def run_chatbot(query: str, *, user_location: Optional[Tuple[float, float]] = None) -> str:
+    return invoke_chatbot(query, user_location=user_location).get("response", "")
+
+
+async def arun_chatbot(query: str, *, user_location: Optional[Tuple[float, float]] = None) -> str:
+    return (await ainvoke_chatbot(query, user_location=user_location)).get("response", "")
+
+
+def _invoke_tracked(state: Dict[str, Any]) -> Dict[str, Any]:
+    # Each batch item runs in its own context copy, so token budgets and packing stats stay per request.
+    started = time.perf_counter()
+    with track_usage(), track_packing():
+        result = get_app().invoke(state)
+    return _finish({**result, "cache_hit": False}, started)
+
+
+def invoke_chatbot_batch(
+    queries: Sequence[str],
+    *,
+    max_concurrency: Optional[int] = None,
+    user_locations: Optional[Sequence[Optional[Tuple[float, float]]]] = None,
+) -> List[Dict[str, Any]]:
+    """Answer many questions at once; one final state per query, in order.
+
+    All query vectors come from one embeddings request, which serves both the semantic
+    cache and a single multi-query vector search. The remaining graph runs go through
+    ``Runnable.batch`` with at most ``max_concurrency`` (default ``BATCH_MAX_CONCURRENCY``)
+    in flight. A failing question gets a state with ``error`` set and an empty
+    ``response`` instead of failing the batch.
+    """
+
+    queries = list(queries)
+    locations = list(user_locations) if user_locations is not None else [None] * len(queries)
+    if len(locations) != len(queries):
+        raise ValueError("user_locations와 queries의 길이가 다릅니다.")
+    started = time.perf_counter()
+    vectors: Optional[List[List[float]]] = None
+    if queries:
+        try:
+            vectors = embed_queries(queries)
+        except Exception as exc:
+            LOGGER.warning("배치 임베딩에 실패해 질문별로 임베딩합니다: %s", exc)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+    caches = [_answer_cache_for(query, location) for query, location in zip(queries, locations)]
+    cache_vectors: List[Any] = [None] * len(queries)
+    cache_keys: List[Hashable] = [None] * len(queries)
+    for i, cache in enumerate(caches):
+        if cache is None:
+            continue
+        cache_keys[i] = _answer_cache_key(queries[i])
+        if vectors is not None:
+            cached, cache_vectors[i] = _cached_answer(cache, lambda: cache.lookup_embedded(vectors[i], cache_keys[i]))
+        else:
+            cached, cache_vectors[i] = _cached_answer(cache, lambda: cache.lookup(queries[i], cache_keys[i]))
+        if cached is not None:
+            results[i] = _finish({**cached, "query": queries[i], "cache_hit": True}, started)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    hits: Dict[str, Any] = {}
+    if vectors is not None and pending:
+        hits = prefetch_vector_documents([queries[i] for i in pending], [vectors[i] for i in pending])
+    limit = max_concurrency if max_concurrency is not None else get_settings().batch_max_concurrency
+    with use_prefetched(hits):
+        outputs = RunnableLambda(_invoke_tracked).batch(
+            [_initial_state(queries[i], locations[i]) for i in pending],
+            config={"max_concurrency": max(1, limit)},
+            return_exceptions=True,
+        )
+    for i, output in zip(pending, outputs):
+        if isinstance(output, Exception):
+            LOGGER.warning("배치 질문 처리 실패(%s): %s", queries[i], output)
+            results[i] = {"query": queries[i], "response": "", "cache_hit": False, "error": f"{type(output).__name__}: {output}"}
+            continue
+        _remember_answer(caches[i], queries[i], cache_vectors[i], output, cache_keys[i])
+        results[i] = output
+    return [result for result in results if result is not None]
+
+
+def run_chatbot_batch(
+    queries: Sequence[str],
+    *,
+    max_concurrency: Optional[int] = None,
+    user_locations: Optional[Sequence[Optional[Tuple[float, float]]]] = None,
+) -> List[str]:
+    """Responses for ``queries`` in order; a failed question answers ``""`` (see ``invoke_chatbot_batch``)."""
+
+    states = invoke_chatbot_batch(queries, max_concurrency=max_concurrency, user_locations=user_locations)
+    return [state.get("response", "") for state in states]
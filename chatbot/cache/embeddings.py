@@ -0,0 +1,232 @@
+"""Query-embedding cache: in-memory LRU over a SQLite store, segregated by embedding model."""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables.config import run_in_executor
+
+STORAGE_DTYPES = ("float16", "float32")
+
+
+def normalize_query(text: str) -> str:
+    """Cache key text: NFC, trimmed, inner whitespace collapsed (the embedding is unchanged by these)."""
+
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def _cache_key(namespace: str, text: str) -> str:
+    return hashlib.sha256(f"{namespace}\x00{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    miss_seconds: float = 0.0
+    # Sum of the original embedding latency of every entry served from the cache.
+    saved_seconds: float = 0.0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "avg_miss_ms": round(self.miss_seconds / self.misses * 1000, 2) if self.misses else None,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an embeddings client so repeated query texts skip the network round trip.
+
+    Rows are keyed by (``namespace``, normalized query); the namespace names the embedding
+    model (and backend), so switching models never mixes dimensions. Vectors are stored as
+    float16 by default, half the bytes of float32 at a cosine error far below retrieval noise.
+    ``embed_documents`` is passed through (ingest texts are embedded once anyway).
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        *,
+        namespace: str,
+        path: Optional[Path] = None,
+        memory_entries: int = 4096,
+        dtype: str = "float16",
+    ) -> None:
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"지원하지 않는 dtype입니다: {dtype} (허용: {', '.join(STORAGE_DTYPES)})")
+        self.underlying = underlying
+        self.namespace = namespace
+        self.dtype = np.dtype(dtype)
+        self.memory_entries = max(0, memory_entries)
+        self.stats = EmbeddingCacheStats()
+        # key -> (vector in storage dtype, seconds the original embedding call took)
+        self._memory: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "model TEXT NOT NULL, key TEXT NOT NULL, dtype TEXT NOT NULL, dims INTEGER NOT NULL, "
+                "latency REAL NOT NULL DEFAULT 0, vector BLOB NOT NULL, PRIMARY KEY (model, key))"
+            )
+            self._conn.commit()
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose client attributes (dimensions, api settings) of the wrapped embeddings.
+        if name == "underlying":
+            raise AttributeError(name)
+        return getattr(self.underlying, name)
+
+    def _remember_locked(self, key: str, vector: np.ndarray, latency: float) -> None:
+        if not self.memory_entries:
+            return
+        self._memory[key] = (vector, latency)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _memory_hit(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+            self.stats.saved_seconds += entry[1]
+            return entry[0]
+
+    def _disk_hit(self, key: str) -> Optional[np.ndarray]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dtype, latency, vector FROM query_embeddings WHERE model = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            dtype, latency, blob = row
+            vector = np.frombuffer(blob, dtype=np.dtype(dtype))
+            self._remember_locked(key, vector, latency)
+            self.stats.disk_hits += 1
+            self.stats.saved_seconds += latency
+            return vector
+
+    def _store(self, key: str, raw: List[float], elapsed: float) -> np.ndarray:
+        vector = np.asarray(raw, dtype=self.dtype)
+        with self._lock:
+            self.stats.misses += 1
+            self.stats.miss_seconds += elapsed
+            self._remember_locked(key, vector, elapsed)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (model, key, dtype, dims, latency, vector) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.namespace, key, self.dtype.name, len(vector), elapsed, vector.tobytes()),
+                )
+                self._conn.commit()
+        return vector
+
+    @staticmethod
+    def _as_list(vector: np.ndarray) -> List[float]:
+        return vector.astype(np.float32).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        key = _cache_key(self.namespace, text)
+        vector = self._memory_hit(key)
+        if vector is None:
+            vector = self._disk_hit(key)
+        if vector is not None:
+            return self._as_list(vector)
+        started = time.perf_counter()
+        raw = self.underlying.embed_query(text)
+        # Return the stored precision so a miss and later hits give identical vectors.
+        return self._as_list(self._store(key, raw, time.perf_counter() - started))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # Memory hits are answered on the event loop; SQLite reads and writes hop to a thread.
+        key = _cache_key(self.namespace, text)
+        vector = self._memory_hit(key)
+        if vector is None and self._conn is not None:
+            vector = await run_in_executor(None, self._disk_hit, key)
+        if vector is not None:
+            return self._as_list(vector)
+        started = time.perf_counter()
+        raw = await self.underlying.aembed_query(text)
+        elapsed = time.perf_counter() - started
+        if self._conn is None:
+            return self._as_list(self._store(key, raw, elapsed))
+        return self._as_list(await run_in_executor(None, self._store, key, raw, elapsed))
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """``embed_query`` for many texts; all misses go to the client in one ``embed_documents`` request."""
+
+        keys = [_cache_key(self.namespace, text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vector = self._memory_hit(key)
+            if vector is None:
+                vector = self._disk_hit(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                found[key] = vector
+        if missing:
+            started = time.perf_counter()
+            raw = self.underlying.embed_documents(list(missing.values()))
+            # The batch latency is shared out so saved_seconds stays comparable to single misses.
+            share = (time.perf_counter() - started) / len(missing)
+            for key, vector in zip(missing, raw):
+                found[key] = self._store(key, vector, share)
+        return [self._as_list(found[key]) for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.underlying.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.underlying.aembed_documents(texts)
+
+    def clear(self, *, all_models: bool = False) -> None:
+        """Drop this namespace's entries (or every namespace's with ``all_models``)."""
+
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                if all_models:
+                    self._conn.execute("DELETE FROM query_embeddings")
+                else:
+                    self._conn.execute("DELETE FROM query_embeddings WHERE model = ?", (self.namespace,))
+                self._conn.commit()
+
+
+__all__ = ["CachedEmbeddings", "EmbeddingCacheStats", "normalize_query"]
@@ -0,0 +1,160 @@
+"""Exact-match cache for graph LLM calls: in-memory LRU over a SQLite store."""
+from __future__ import annotations
+
+import contextvars
+import functools
+import hashlib
+import inspect
+import sqlite3
+import threading
+import warnings
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.runnables.config import run_in_executor
+
+from .semantic import CacheStats
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_SCOPE: contextvars.ContextVar[str] = contextvars.ContextVar("llm_cache_scope", default="unscoped")
+
+
+def _cache_key(prompt: str, llm_string: str) -> str:
+    # llm_string already encodes the model name and invocation parameters.
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class TieredLLMCache(BaseCache):
+    """LangChain cache keyed by (model + params, rendered prompt) with per-node hit counters."""
+
+    def __init__(self, path: Path, *, memory_entries: int = 2048) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = max(0, memory_entries)
+        self._memory: "OrderedDict[str, RETURN_VAL_TYPE]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, llm_string TEXT, generations TEXT)"
+        )
+        self._conn.commit()
+        self.stats: Dict[str, CacheStats] = {}
+
+    def _record(self, hit: bool) -> None:
+        stats = self.stats.setdefault(_SCOPE.get(), CacheStats())
+        if hit:
+            stats.hits += 1
+        else:
+            stats.misses += 1
+
+    def _remember(self, key: str, value: RETURN_VAL_TYPE) -> None:
+        if not self.memory_entries:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _memory_hit_locked(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            self._record(True)
+        return value
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = _cache_key(prompt, llm_string)
+        with self._lock:
+            value = self._memory_hit_locked(key)
+            if value is not None:
+                return value
+            row = self._conn.execute("SELECT generations FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._record(False)
+                return None
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                value = loads(row[0])
+            self._remember(key, value)
+            self._record(True)
+            return value
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        # Memory hits are answered on the event loop; only SQLite reads hop to a thread.
+        with self._lock:
+            value = self._memory_hit_locked(_cache_key(prompt, llm_string))
+        if value is not None:
+            return value
+        return await run_in_executor(None, self.lookup, prompt, llm_string)
+
+    def _write(self, key: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        payload = dumps(list(return_val))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm_string, generations) VALUES (?, ?, ?)",
+                (key, llm_string, payload),
+            )
+            self._conn.commit()
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = _cache_key(prompt, llm_string)
+        self._write(key, llm_string, return_val)
+        with self._lock:
+            self._remember(key, return_val)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        # The memory tier is filled on the event loop; the SQLite write and commit hop to a thread.
+        key = _cache_key(prompt, llm_string)
+        with self._lock:
+            self._remember(key, return_val)
+        await run_in_executor(None, self._write, key, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._memory.clear()
+
+    def stats_by_node(self) -> Dict[str, Dict[str, Any]]:
+        return {scope: stats.as_dict() for scope, stats in sorted(self.stats.items())}
+
+
+@contextmanager
+def llm_cache_scope(name: str) -> Iterator[None]:
+    """Attribute cache hits/misses inside the block to ``name`` (a graph node)."""
+
+    token = _SCOPE.set(name)
+    try:
+        yield
+    finally:
+        _SCOPE.reset(token)
+
+
+def cache_scoped(name: str) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with llm_cache_scope(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with llm_cache_scope(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+__all__ = ["TieredLLMCache", "cache_scoped", "llm_cache_scope"]
@@ -0,0 +1,185 @@
+"""Semantic answer cache placed in front of the chatbot graph."""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+@dataclass
+class _Entry:
+    query: str
+    payload: Dict[str, Any]
+    created_at: float
+    key: Hashable = None
+
+
+def file_stamp(path: Path) -> Tuple[int, int]:
+    """Cheap change detector (mtime, size) used to invalidate on seed edits."""
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (0, 0)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class SemanticAnswerCache:
+    """Similarity-keyed LRU cache with TTL; vectors live in one preallocated matrix.
+
+    Each entry may carry an exact ``key`` (e.g. the district, zone and time window the
+    question asked about); a lookup only hits entries with an equal key, however
+    similar the embeddings are.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        *,
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1024,
+        version_fn: Optional[Callable[[], Any]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.stats = CacheStats()
+        self._version_fn = version_fn
+        self._version = version_fn() if version_fn else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._vectors: Optional[np.ndarray] = None
+        self._active = np.zeros(self.max_entries, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _unit(raw: Any) -> np.ndarray:
+        vector = np.asarray(raw, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, query: str) -> np.ndarray:
+        return self._unit(self.embeddings.embed_query(query))
+
+    async def aembed(self, query: str) -> np.ndarray:
+        return self._unit(await self.embeddings.aembed_query(query))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear_locked()
+
+    def _clear_locked(self) -> None:
+        self._entries.clear()
+        self._active[:] = False
+
+    def _check_version_locked(self) -> None:
+        if self._version_fn is None:
+            return
+        current = self._version_fn()
+        if current != self._version:
+            self._version = current
+            if self._entries:
+                self.stats.invalidations += 1
+            self._clear_locked()
+
+    def _drop_locked(self, slot: int) -> None:
+        self._entries.pop(slot, None)
+        self._active[slot] = False
+
+    def lookup_vector(self, vector: np.ndarray, key: Hashable = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._check_version_locked()
+            if self._vectors is None or not self._entries:
+                self.stats.misses += 1
+                return None
+            scores = self._vectors @ vector
+            scores[~self._active] = -np.inf
+            candidates = np.flatnonzero(scores >= self.threshold)
+            # Most similar first; "북구 마켓" and "동구 마켓" embed alike but must not share answers.
+            matching = [
+                int(slot) for slot in candidates[np.argsort(-scores[candidates])] if self._entries[int(slot)].key == key
+            ]
+            if not matching:
+                self.stats.misses += 1
+                return None
+            slot = matching[0]
+            entry = self._entries[slot]
+            if self._clock() - entry.created_at > self.ttl_seconds:
+                self._drop_locked(slot)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(slot)
+            self.stats.hits += 1
+            return dict(entry.payload)
+
+    def lookup(self, query: str, key: Hashable = None) -> Tuple[Optional[Dict[str, Any]], np.ndarray]:
+        """Return (cached payload or None, query vector); reuse the vector for ``store``."""
+
+        vector = self.embed(query)
+        return self.lookup_vector(vector, key), vector
+
+    def lookup_embedded(self, raw: Any, key: Hashable = None) -> Tuple[Optional[Dict[str, Any]], np.ndarray]:
+        """``lookup`` for a query already embedded elsewhere (e.g. a whole batch in one request)."""
+
+        vector = self._unit(raw)
+        return self.lookup_vector(vector, key), vector
+
+    async def alookup(self, query: str, key: Hashable = None) -> Tuple[Optional[Dict[str, Any]], np.ndarray]:
+        vector = await self.aembed(query)
+        return self.lookup_vector(vector, key), vector
+
+    def store(self, query: str, vector: np.ndarray, payload: Dict[str, Any], key: Hashable = None) -> None:
+        with self._lock:
+            self._check_version_locked()
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            free = np.flatnonzero(~self._active)
+            if len(free):
+                slot = int(free[0])
+            else:
+                slot, _ = self._entries.popitem(last=False)
+                self.stats.evictions += 1
+            self._vectors[slot] = vector
+            self._active[slot] = True
+            self._entries[slot] = _Entry(query=query, payload=dict(payload), created_at=self._clock(), key=key)
+
+
+__all__ = ["CacheStats", "SemanticAnswerCache", "file_stamp"]
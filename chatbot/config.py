@@ -9,6 +9,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 MARKETS_DATA_PATH = BASE_DIR / "data" / "markets_seed.json"
+ZONES_DATA_PATH = BASE_DIR / "data" / "zones_seed.json"
+CACHE_DIR = BASE_DIR / ".cache"
 
 
 class Settings(BaseSettings):
@@ -19,10 +21,81 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-4o-mini"
     openai_embedding_model: str = "text-embedding-3-small"
     markets_seed_path: Path = MARKETS_DATA_PATH
+    zones_seed_path: Path = ZONES_DATA_PATH
     max_results: int = 5
     pgvector_connection: Optional[str] = None
     vector_collection: Optional[str] = None
     pgvector_connect_timeout: int = 10
+    pgvector_pool_min_size: int = 2
+    pgvector_pool_max_size: int = 10
+    pgvector_pool_timeout: float = 30.0
+    retrieval_backend: str = "pgvector"
+    local_index_dir: Optional[Path] = None
+    local_index_dtype: str = "float32"
+    local_index_ivf_min_size: int = 4096
+    local_index_nprobe: int = 4
+    hybrid_retrieval_enabled: bool = True
+    hybrid_candidates: int = 10
+    hybrid_rrf_k: int = 60
+    metadata_filters_enabled: bool = True
+    proximity_enabled: bool = True
+    geo_radius_km: float = 3.0
+    geo_cell_km: float = 1.0
+    time_filter_enabled: bool = True
+    local_timezone: str = "Asia/Seoul"
+    ann_index_method: str = "hnsw"
+    ann_distance: str = "cosine"
+    ann_hnsw_m: int = 16
+    ann_hnsw_ef_construction: int = 64
+    ann_ivfflat_lists: int = 0
+    ann_ef_search: int = 40
+    ann_probes: int = 0
+    ann_iterative_scan: str = ""
+    ann_reindex_ratio: float = 0.2
+    ingest_batch_size: int = 64
+    ingest_concurrency: int = 4
+    ingest_checkpoint_path: Path = CACHE_DIR / "ingest_checkpoint.json"
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_ttl_seconds: float = 3600.0
+    semantic_cache_max_entries: int = 1024
+    llm_cache_enabled: bool = True
+    llm_cache_path: Path = CACHE_DIR / "llm_cache.sqlite"
+    llm_cache_memory_entries: int = 2048
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: Path = CACHE_DIR / "query_embeddings.sqlite"
+    embedding_cache_memory_entries: int = 4096
+    embedding_cache_dtype: str = "float16"
+    prompt_hub_refresh: bool = False
+    context_packing_enabled: bool = True
+    context_max_tokens: int = 600
+    grounding_check_enabled: bool = True
+    grounding_audit: bool = False
+    router_classifier_enabled: bool = True
+    router_classifier_path: Path = BASE_DIR / "data" / "router_classifier.npz"
+    router_classifier_threshold: float = 0.9
+    guardrail_enabled: bool = True
+    guardrail_max_query_chars: int = 1000
+    guardrail_max_repeat: int = 20
+    stream_policy: str = "retract"
+    max_rewrites: int = 2
+    request_deadline_seconds: float = 30.0
+    request_max_tokens: int = 20000
+    # Per-call limits for OpenAI clients so one hung call cannot outlive the request deadline.
+    llm_timeout_seconds: float = 10.0
+    llm_max_retries: int = 1
+    batch_max_concurrency: int = 8
+    metrics_enabled: bool = False
+    metrics_port: int = 0
+    metrics_path: Optional[Path] = None
+    model_backend: str = "openai"
+    fake_latency_distribution: str = "fixed"
+    fake_latency_ms: float = 0.0
+    fake_latency_sigma: float = 0.5
+    fake_token_latency_ms: float = 0.0
+    fake_failure_rate: float = 0.0
+    fake_seed: int = 0
+    fake_script_path: Optional[Path] = None
     langsmith_api_key: Optional[str] = None
     langsmith_project: Optional[str] = None
     langsmith_tracing: bool = False
@@ -0,0 +1,256 @@
+"""Columnar, vectorized keyword scoring of the whole catalog (``score_market`` for every market at once)."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .loader import load_markets_dataset
+from .market_utils import market_to_item, normalize_location_list, normalize_str_list
+
+CATEGORY_WEIGHT = 3.0
+ATTRIBUTE_WEIGHT = 1.0
+AMENITY_WEIGHT = 0.5
+LOCATION_WEIGHT = 1.5
+DESCRIPTION_WEIGHT = 0.5
+_SEPARATOR = "\x00"
+
+
+class _Vocabulary:
+    """Distinct lower-cased terms of one field, matched as substrings of a query.
+
+    Small vocabularies scan their terms; large ones look up the query's substrings
+    instead, so matching cost is bounded by the query length, not the catalog size.
+    """
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.max_len = 0
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def add(self, term: str) -> int:
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+            self.max_len = max(self.max_len, len(term))
+        return term_id
+
+    def matches(self, lowered: str) -> np.ndarray:
+        """Boolean mask over term ids: ``True`` where the term occurs in ``lowered``."""
+
+        mask = np.zeros(len(self.terms), dtype=bool)
+        span = min(self.max_len, len(lowered))
+        if len(self.terms) <= len(lowered) * span:
+            hits = [term_id for term_id, term in enumerate(self.terms) if term in lowered]
+        else:
+            substrings = {lowered[i : i + n] for n in range(1, span + 1) for i in range(len(lowered) - n + 1)}
+            hits = [self.ids[text] for text in substrings if text in self.ids]
+        mask[hits] = True
+        return mask
+
+
+class _TagColumn:
+    """Per-market tag sets as packed ``uint64`` bitsets over a vocabulary.
+
+    Repeated tags still count once per occurrence (as ``score_market`` does) through a
+    sparse list of extra occurrences, which is empty for clean data.
+    """
+
+    def __init__(self, rows: Sequence[Sequence[str]]) -> None:
+        self.vocabulary = _Vocabulary()
+        encoded = [[self.vocabulary.add(tag.lower()) for tag in tags] for tags in rows]
+        words = max(1, (len(self.vocabulary) + 63) // 64)
+        self.bits = np.zeros((len(rows), words), dtype=np.uint64)
+        extra_rows: List[int] = []
+        extra_ids: List[int] = []
+        for row, ids in enumerate(encoded):
+            seen: Set[int] = set()
+            for term_id in ids:
+                if term_id in seen:
+                    extra_rows.append(row)
+                    extra_ids.append(term_id)
+                    continue
+                seen.add(term_id)
+                self.bits[row, term_id >> 6] |= np.uint64(1) << np.uint64(term_id & 63)
+        self.extra_rows = np.asarray(extra_rows, dtype=np.int64)
+        self.extra_ids = np.asarray(extra_ids, dtype=np.int64)
+
+    def counts(self, lowered: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(matched tags per market, matched-term mask)."""
+
+        matched = self.vocabulary.matches(lowered)
+        padded = np.zeros(self.bits.shape[1] * 64, dtype=bool)
+        padded[: len(matched)] = matched
+        query_bits = np.packbits(padded.reshape(-1, 64)[:, ::-1], axis=1).view(">u8").astype(np.uint64).ravel()
+        counts = np.bitwise_count(self.bits & query_bits).sum(axis=1, dtype=np.int64)
+        if len(self.extra_rows):
+            counts += np.bincount(self.extra_rows, weights=matched[self.extra_ids], minlength=len(counts)).astype(np.int64)
+        return counts, matched
+
+
+def _location_tokens(location: Dict[str, Any]) -> List[str]:
+    return [token for token in (str(location.get(key, "")).lower() for key in ("city", "district", "address")) if token]
+
+
+@dataclass
+class ScoredMarket:
+    """One ranked market with its score and the matches that produced it."""
+
+    market: Dict[str, Any]
+    score: float
+    row: int
+    reasons: List[str] = field(default_factory=list)
+
+    def as_item(self) -> Dict[str, Any]:
+        return {**market_to_item(self.market), "score": round(self.score, 4), "reasons": self.reasons}
+
+
+class CatalogScorer:
+    """The catalog as columns (category ids, tag bitsets, location tokens, ratings).
+
+    ``scores(query)`` equals ``[score_market(query, m) for m in markets]`` but runs as a
+    handful of NumPy passes over all markets instead of a Python loop per market.
+    """
+
+    def __init__(self, markets: Sequence[Dict[str, Any]]) -> None:
+        self.markets = list(markets)
+        size = len(self.markets)
+
+        self.categories = _Vocabulary()
+        # -1 marks an empty category, which never matches.
+        self.category_ids = np.full(size, -1, dtype=np.int64)
+        self.attributes = _TagColumn([normalize_str_list(m.get("market_attribute")) for m in self.markets])
+        self.amenities = _TagColumn([normalize_str_list(m.get("market_ameni")) for m in self.markets])
+
+        self.location_tokens = _Vocabulary()
+        location_market: List[int] = []
+        entry_location: List[int] = []
+        entry_token: List[int] = []
+        description_index: Dict[str, int] = {}
+        self.description_ids = np.zeros(size, dtype=np.int64)
+        self.rating_bonus = np.zeros(size, dtype=np.float64)
+        for row, market in enumerate(self.markets):
+            category = str(market.get("market_category") or "").lower()
+            if category:
+                self.category_ids[row] = self.categories.add(category)
+            for location in normalize_location_list(market.get("market_location")):
+                for token in _location_tokens(location):
+                    entry_location.append(len(location_market))
+                    entry_token.append(self.location_tokens.add(token))
+                location_market.append(row)
+            description = str(market.get("market_description") or "").lower().replace(_SEPARATOR, " ")
+            self.description_ids[row] = description_index.setdefault(description, len(description_index))
+            rating = market.get("market_rating")
+            if isinstance(rating, (int, float)):
+                self.rating_bonus[row] = min(1.0, rating / 5.0)
+        self.location_market = np.asarray(location_market, dtype=np.int64)
+        self.entry_location = np.asarray(entry_location, dtype=np.int64)
+        self.entry_token = np.asarray(entry_token, dtype=np.int64)
+
+        # One string for all distinct descriptions: a query is located with C-speed
+        # str.find and hits are mapped back to descriptions by offset.
+        descriptions = list(description_index)
+        self.description_text = _SEPARATOR.join(descriptions)
+        lengths = np.fromiter((len(text) + 1 for text in descriptions), dtype=np.int64, count=len(descriptions))
+        self.description_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    def _description_hits(self, lowered: str) -> np.ndarray:
+        hits = np.zeros(len(self.description_starts), dtype=bool)
+        if _SEPARATOR not in lowered:
+            text = self.description_text
+            position = text.find(lowered)
+            while position != -1:
+                index = int(np.searchsorted(self.description_starts, position, side="right")) - 1
+                hits[index] = True
+                if index + 1 >= len(hits):
+                    break
+                position = text.find(lowered, int(self.description_starts[index + 1]))
+        return hits[self.description_ids]
+
+    def _location_hits(self, lowered: str) -> Tuple[np.ndarray, np.ndarray]:
+        matched = self.location_tokens.matches(lowered)
+        per_location = np.bincount(
+            self.entry_location, weights=matched[self.entry_token], minlength=len(self.location_market)
+        )
+        per_market = np.bincount(self.location_market, weights=per_location > 0, minlength=len(self))
+        return per_market, matched
+
+    def scores(self, query: str) -> np.ndarray:
+        lowered = (query or "").lower()
+        if not lowered or not len(self):
+            return np.zeros(len(self), dtype=np.float64)
+        category_hits = np.append(self.categories.matches(lowered), False)
+        attribute_counts, _ = self.attributes.counts(lowered)
+        amenity_counts, _ = self.amenities.counts(lowered)
+        location_counts, _ = self._location_hits(lowered)
+        return (
+            CATEGORY_WEIGHT * category_hits[self.category_ids]
+            + ATTRIBUTE_WEIGHT * attribute_counts
+            + AMENITY_WEIGHT * amenity_counts
+            + LOCATION_WEIGHT * location_counts
+            + DESCRIPTION_WEIGHT * self._description_hits(lowered)
+            + self.rating_bonus
+        )
+
+    def explain(self, query: str, row: int) -> List[str]:
+        """Human-readable reasons behind ``scores(query)[row]``."""
+
+        lowered = (query or "").lower()
+        market = self.markets[row]
+        reasons: List[str] = []
+        if not lowered:
+            return reasons
+        category = str(market.get("market_category") or "").lower()
+        if category and category in lowered:
+            reasons.append(f"카테고리 '{market.get('market_category')}'")
+        reasons.extend(f"분위기 '{tag}'" for tag in normalize_str_list(market.get("market_attribute")) if tag.lower() in lowered)
+        reasons.extend(f"편의시설 '{tag}'" for tag in normalize_str_list(market.get("market_ameni")) if tag.lower() in lowered)
+        for location in normalize_location_list(market.get("market_location")):
+            token = next((token for token in _location_tokens(location) if token in lowered), None)
+            if token:
+                reasons.append(f"위치 '{token}'")
+        if lowered in str(market.get("market_description") or "").lower():
+            reasons.append("설명 일치")
+        if self.rating_bonus[row]:
+            reasons.append(f"평점 {market.get('market_rating')}")
+        return reasons
+
+    def top_k(self, query: str, k: int = 5, *, explain: bool = True) -> List[ScoredMarket]:
+        """Best ``k`` markets by score (ties keep catalog order); zero scores are dropped."""
+
+        scores = self.scores(query)
+        top = min(k, int(np.count_nonzero(scores)))
+        if top <= 0:
+            return []
+        # Take every market tied with the k-th best score so catalog order breaks ties.
+        cutoff = np.partition(scores, len(scores) - top)[len(scores) - top]
+        candidates = np.flatnonzero(scores >= cutoff)
+        ranked = candidates[np.lexsort((candidates, -scores[candidates]))][:top]
+        return [
+            ScoredMarket(self.markets[row], float(scores[row]), int(row), self.explain(query, row) if explain else [])
+            for row in ranked
+        ]
+
+
+def rank_markets(query: str, markets: Optional[Iterable[Dict[str, Any]]] = None, limit: int = 5) -> List[Dict[str, Any]]:
+    """Keyword-rank ``markets`` (default: the seed catalog) and return consumer items with reasons."""
+
+    scorer = get_catalog_scorer() if markets is None else CatalogScorer(list(markets))
+    return [scored.as_item() for scored in scorer.top_k(query, limit)]
+
+
+@lru_cache(maxsize=1)
+def get_catalog_scorer() -> CatalogScorer:
+    return CatalogScorer(load_markets_dataset())
+
+
+__all__ = ["CatalogScorer", "ScoredMarket", "get_catalog_scorer", "rank_markets"]
@@ -0,0 +1,231 @@
+"""Grid spatial index over market coordinates for radius and nearest-neighbour queries."""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+from .loader import load_markets_dataset, load_zones_dataset
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 110.574
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many, in km."""
+
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+@dataclass(frozen=True)
+class GeoPoint:
+    lat: float
+    lon: float
+    label: str = ""
+
+
+def _coordinate(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+class GeoIndex:
+    """Uniform grid over an equirectangular projection of the points.
+
+    Points are sorted by cell so every occupied cell is one contiguous slice; a query
+    only computes exact distances for points in the cells its radius can reach. A
+    market with several locations contributes one point per location and is reported
+    once, at its closest location.
+    """
+
+    def __init__(self, lats: Sequence[float], lons: Sequence[float], rows: Sequence[int], *, cell_km: float = 1.0) -> None:
+        lats_arr = np.asarray(lats, dtype=np.float64)
+        lons_arr = np.asarray(lons, dtype=np.float64)
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        self.cell_km = float(cell_km)
+        # Longitude degrees shrink with latitude; one reference latitude is plenty at city scale.
+        self._km_per_deg_lon = KM_PER_DEG_LAT * math.cos(math.radians(float(lats_arr.mean()) if len(lats_arr) else 0.0))
+        cx, cy = self._cell(lats_arr, lons_arr)
+        order = np.lexsort((cy, cx))
+        self.lats, self.lons, self.rows = lats_arr[order], lons_arr[order], rows_arr[order]
+        cx, cy = cx[order], cy[order]
+        self._cells: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        if len(order):
+            keys = np.stack([cx, cy], axis=1)
+            starts = np.flatnonzero(np.concatenate([[True], np.any(keys[1:] != keys[:-1], axis=1)]))
+            ends = np.append(starts[1:], len(order))
+            for start, end in zip(starts, ends):
+                self._cells[(int(cx[start]), int(cy[start]))] = (int(start), int(end))
+            self._bounds = (int(cx.min()), int(cx.max()), int(cy.min()), int(cy.max()))
+        else:
+            self._bounds = (0, -1, 0, -1)
+
+    @classmethod
+    def from_markets(cls, markets: Iterable[Dict[str, Any]], *, cell_km: float = 1.0) -> "GeoIndex":
+        lats: List[float] = []
+        lons: List[float] = []
+        rows: List[int] = []
+        for row, market in enumerate(markets):
+            for location in market.get("market_location") or []:
+                if not isinstance(location, dict):
+                    continue
+                lat, lon = _coordinate(location.get("lat")), _coordinate(location.get("lon"))
+                if lat is not None and lon is not None:
+                    lats.append(lat)
+                    lons.append(lon)
+                    rows.append(row)
+        return cls(lats, lons, rows, cell_km=cell_km)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _cell(self, lats: Any, lons: Any) -> Tuple[Any, Any]:
+        cx = np.floor(np.asarray(lons) * self._km_per_deg_lon / self.cell_km).astype(np.int64)
+        cy = np.floor(np.asarray(lats) * KM_PER_DEG_LAT / self.cell_km).astype(np.int64)
+        return cx, cy
+
+    def _ring(self, cx: int, cy: int, radius: int) -> Iterator[Tuple[int, int]]:
+        if radius == 0:
+            yield cx, cy
+            return
+        for dx in range(-radius, radius + 1):
+            yield cx + dx, cy - radius
+            yield cx + dx, cy + radius
+        for dy in range(-radius + 1, radius):
+            yield cx - radius, cy + dy
+            yield cx + radius, cy + dy
+
+    def _points_in_ring(self, cx: int, cy: int, radius: int) -> List[np.ndarray]:
+        slices = [self._cells.get(cell) for cell in self._ring(cx, cy, radius)]
+        return [np.arange(*span) for span in slices if span is not None]
+
+    def _max_ring(self, cx: int, cy: int) -> int:
+        x0, x1, y0, y1 = self._bounds
+        return max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+
+    def _closest_per_row(self, points: np.ndarray, origin: GeoPoint) -> Tuple[np.ndarray, np.ndarray]:
+        distances = haversine_km(origin.lat, origin.lon, self.lats[points], self.lons[points])
+        order = np.argsort(distances, kind="stable")
+        rows, first = np.unique(self.rows[points][order], return_index=True)
+        return rows, distances[order][first]
+
+    def within(self, origin: GeoPoint, radius_km: float) -> List[Tuple[int, float]]:
+        """(row, km) for every market within ``radius_km``, nearest first."""
+
+        if not self._cells or radius_km < 0:
+            return []
+        cx, cy = (int(v) for v in self._cell(origin.lat, origin.lon))
+        # One spare ring absorbs the projection error against the haversine distance.
+        reach = min(int(math.ceil(radius_km / self.cell_km)) + 1, self._max_ring(cx, cy))
+        chunks = [chunk for ring in range(reach + 1) for chunk in self._points_in_ring(cx, cy, ring)]
+        if not chunks:
+            return []
+        rows, distances = self._closest_per_row(np.concatenate(chunks), origin)
+        keep = distances <= radius_km
+        rows, distances = rows[keep], distances[keep]
+        order = np.lexsort((rows, distances))
+        return [(int(rows[i]), float(distances[i])) for i in order]
+
+    def nearest(self, origin: GeoPoint, k: int, *, max_km: Optional[float] = None) -> List[Tuple[int, float]]:
+        """The k nearest markets as (row, km), expanding ring by ring from the origin's cell."""
+
+        if not self._cells or k <= 0:
+            return []
+        cx, cy = (int(v) for v in self._cell(origin.lat, origin.lon))
+        last_ring = self._max_ring(cx, cy)
+        if max_km is not None:
+            last_ring = min(last_ring, int(math.ceil(max_km / self.cell_km)) + 1)
+        chunks: List[np.ndarray] = []
+        rows = distances = np.empty(0)
+        for ring in range(last_ring + 1):
+            found = self._points_in_ring(cx, cy, ring)
+            if found:
+                chunks.extend(found)
+                rows, distances = self._closest_per_row(np.concatenate(chunks), origin)
+            # Every point closer than ``ring`` cells has been seen, so k hits inside that
+            # distance (less a little projection slack) are final.
+            if len(rows) >= k and np.partition(distances, k - 1)[k - 1] <= (ring - 1) * self.cell_km:
+                break
+        if max_km is not None:
+            keep = distances <= max_km
+            rows, distances = rows[keep], distances[keep]
+        order = np.lexsort((rows, distances))[:k]
+        return [(int(rows[i]), float(distances[i])) for i in order]
+
+
+def _compact(text: str) -> str:
+    return re.sub(r"\s+", "", text.lower())
+
+
+def _zone_aliases(zone: Dict[str, Any]) -> List[str]:
+    """Full name plus the zone's curated landmark ``aliases`` ("충장로", "대인시장").
+
+    Aliases are listed per zone in ``zones_seed.json`` rather than cut from the name:
+    name fragments ("카페", "먹자골목", "첨단") match far too many queries.
+    """
+
+    name = str(zone.get("zone_name") or "").strip()
+    aliases = [str(alias).strip() for alias in zone.get("aliases") or [] if str(alias).strip()]
+    return [name, *aliases] if name else aliases
+
+
+@lru_cache(maxsize=1)
+def zone_directory() -> Dict[str, GeoPoint]:
+    """Compacted zone alias/id -> point; an alias shared by several zones maps to their centroid."""
+
+    grouped: Dict[str, List[Tuple[float, float, str]]] = {}
+    for zone in load_zones_dataset():
+        lat, lon = _coordinate(zone.get("latitude")), _coordinate(zone.get("longitude"))
+        name = str(zone.get("zone_name") or "").strip()
+        if lat is None or lon is None:
+            continue
+        surfaces = set(_compact(alias) for alias in _zone_aliases(zone))
+        if zone.get("zone_id"):
+            surfaces.add(_compact(str(zone["zone_id"])))
+        for surface in surfaces:
+            grouped.setdefault(surface, []).append((lat, lon, name or str(zone.get("zone_id"))))
+    directory: Dict[str, GeoPoint] = {}
+    for surface, entries in grouped.items():
+        label = entries[0][2] if len(entries) == 1 else surface
+        directory[surface] = GeoPoint(
+            lat=float(np.mean([lat for lat, _, _ in entries])),
+            lon=float(np.mean([lon for _, lon, _ in entries])),
+            label=label,
+        )
+    return directory
+
+
+@lru_cache(maxsize=1)
+def _zone_surfaces() -> List[str]:
+    return sorted((surface for surface in zone_directory() if len(surface) >= 2), key=len, reverse=True)
+
+
+def find_zone(query: str) -> Optional[GeoPoint]:
+    """The zone named in ``query`` (longest alias wins), if any."""
+
+    text = _compact(query or "")
+    for surface in _zone_surfaces():
+        if surface in text:
+            return zone_directory()[surface]
+    return None
+
+
+@lru_cache(maxsize=1)
+def get_geo_index() -> GeoIndex:
+    """Index over ``load_markets_dataset()``; rows are catalog positions."""
+
+    return GeoIndex.from_markets(load_markets_dataset(), cell_km=get_settings().geo_cell_km)
+
+
+__all__ = ["GeoIndex", "GeoPoint", "find_zone", "get_geo_index", "haversine_km", "zone_directory"]
@@ -1,13 +1,16 @@
 """Dataset loading utilities."""
 from __future__ import annotations
 
+import hashlib
 import json
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import IO, Any, Dict, Iterator, List
 
 from ..config import get_settings
 
+_STREAM_CHUNK_CHARS = 1 << 16
+
 
 def _read_dataset(path: Path) -> List[Dict[str, Any]]:
     if not path.exists():
@@ -28,4 +31,81 @@ def load_markets_dataset() -> List[Dict[str, Any]]:
     return _read_dataset(settings.markets_seed_path)
 
 
-__all__ = ["load_markets_dataset"]
+@lru_cache(maxsize=1)
+def load_zones_dataset() -> List[Dict[str, Any]]:
+    """Zones (``zone_id``, ``zone_name``, ``latitude``/``longitude`` ...); empty when the file is absent."""
+
+    path = get_settings().zones_seed_path
+    if not path.exists():
+        return []
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(payload, list):
+        raise ValueError("zones_seed.json 형식이 올바르지 않습니다. 최상위에 배열이 있어야 합니다.")
+    return [zone for zone in payload if isinstance(zone, dict)]
+
+
+def _skip_whitespace(handle: IO[str], buffer: str, pos: int) -> tuple[str, int]:
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos < len(buffer):
+            return buffer, pos
+        chunk = handle.read(_STREAM_CHUNK_CHARS)
+        if not chunk:
+            return "", 0
+        buffer, pos = chunk, 0
+
+
+def iter_markets_dataset(path: Path | None = None) -> Iterator[Dict[str, Any]]:
+    """Yield market records one at a time without materializing the whole seed file."""
+
+    target = Path(path or get_settings().markets_seed_path)
+    if not target.exists():
+        raise FileNotFoundError(f"Seed data not found at {target}.")
+    decoder = json.JSONDecoder()
+    with target.open("r", encoding="utf-8") as handle:
+        buffer, pos = _skip_whitespace(handle, "", 0)
+        if buffer[pos:pos + 1] == "{":
+            # {"markets": [...]} wrapper: rare and small, fall back to the eager reader.
+            yield from _read_dataset(target)
+            return
+        if buffer[pos:pos + 1] != "[":
+            raise ValueError("markets_seed.json 형식이 올바르지 않습니다. 최상위에 배열이 있어야 합니다.")
+        pos += 1
+        while True:
+            buffer, pos = _skip_whitespace(handle, buffer, pos)
+            if not buffer:
+                raise ValueError("markets_seed.json이 배열 도중에 끝났습니다.")
+            token = buffer[pos]
+            if token == "]":
+                return
+            if token == ",":
+                pos += 1
+                continue
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                chunk = handle.read(_STREAM_CHUNK_CHARS)
+                if not chunk:
+                    raise ValueError("markets_seed.json 레코드를 해석하지 못했습니다.") from None
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            if isinstance(record, dict):
+                yield record
+            pos = end
+            if pos > _STREAM_CHUNK_CHARS:
+                buffer, pos = buffer[pos:], 0
+
+
+def seed_fingerprint(path: Path | None = None) -> str:
+    """Return a content hash of the seed file so derived artifacts can detect staleness."""
+
+    target = path or get_settings().markets_seed_path
+    digest = hashlib.sha256()
+    with Path(target).open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+__all__ = ["iter_markets_dataset", "load_markets_dataset", "load_zones_dataset", "seed_fingerprint"]
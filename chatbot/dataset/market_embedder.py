@@ -2,12 +2,62 @@
 from __future__ import annotations
 
 import argparse
-from typing import Sequence
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from langchain_core.documents import Document
 
-from ..retrieval.vector_store import get_vector_store
-from .vector_docs import build_market_documents
+from ..config import get_settings
+from ..retrieval.ann_index import AnnIndexError, reindex_after_ingest
+from ..retrieval.vector_store import ensure_metadata_indexes, get_vector_store
+from ..tokenizer import count_tokens
+from .loader import iter_markets_dataset, seed_fingerprint
+from .vector_docs import build_market_documents, iter_market_documents
+
+CONTENT_HASH_KEY = "content_hash"
+
+
+@dataclass
+class SyncReport:
+    """Outcome of an incremental (hash-diffed) ingest."""
+
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def embedded(self) -> int:
+        return len(self.added) + len(self.updated)
+
+
+@dataclass
+class IngestStats:
+    """Throughput report for the streaming ingest path."""
+
+    report: SyncReport = field(default_factory=SyncReport)
+    documents: int = 0
+    batches: int = 0
+    resumed_batches: int = 0
+    tokens: int = 0
+    elapsed: float = 0.0
+    peak_memory_mb: Optional[float] = None
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed if self.elapsed else 0.0
 
 
 def _load_documents() -> list[Document]:
@@ -17,42 +67,296 @@ def _load_documents() -> list[Document]:
     return documents
 
 
+def content_hash(document: Document) -> str:
+    """Stable hash over page_content plus metadata (excluding the stored hash itself)."""
+
+    metadata = {key: value for key, value in document.metadata.items() if key != CONTENT_HASH_KEY}
+    payload = json.dumps(
+        {"page_content": document.page_content, "metadata": metadata},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _vector_id(collection_name: str, document: Document) -> str:
+    # Embedding ids are a global primary key, so scope them by collection.
+    return f"{collection_name}:{document.metadata.get('doc_id')}"
+
+
+def _with_hash(document: Document) -> Document:
+    return Document(
+        page_content=document.page_content,
+        metadata={**document.metadata, CONTENT_HASH_KEY: content_hash(document)},
+    )
+
+
+def _stored_hashes(store) -> Dict[str, str | None]:
+    """Map vector id -> stored content hash for the current collection."""
+
+    with store.session_maker() as session:
+        collection = store.get_collection(session)
+        if collection is None:
+            return {}
+        rows = (
+            session.query(store.EmbeddingStore.id, store.EmbeddingStore.cmetadata[CONTENT_HASH_KEY].astext)
+            .filter(store.EmbeddingStore.collection_id == collection.uuid)
+            .all()
+        )
+    return {row_id: stored for row_id, stored in rows}
+
+
+def _plan_upserts(
+    docs: Sequence[Document],
+    collection_name: str,
+    stored: Dict[str, str | None],
+    report: SyncReport,
+    seen: set[str],
+) -> Tuple[List[Document], List[str]]:
+    """Diff documents against stored hashes; returns the documents that need (re-)embedding."""
+
+    pending: List[Document] = []
+    pending_ids: List[str] = []
+    for doc in docs:
+        vector_id = _vector_id(collection_name, doc)
+        seen.add(vector_id)
+        hashed = _with_hash(doc)
+        if vector_id not in stored:
+            report.added.append(vector_id)
+        elif stored[vector_id] != hashed.metadata[CONTENT_HASH_KEY]:
+            report.updated.append(vector_id)
+        else:
+            report.unchanged += 1
+            continue
+        pending.append(hashed)
+        pending_ids.append(vector_id)
+    return pending, pending_ids
+
+
+def sync_markets(documents: Sequence[Document] | None = None, *, dry_run: bool = False) -> SyncReport:
+    """Upsert only changed markets and delete removed ones; the collection is never emptied."""
+
+    docs = list(documents) if documents is not None else _load_documents()
+    store = get_vector_store()
+    if not dry_run:
+        store.create_collection()
+    stored = _stored_hashes(store)
+
+    report = SyncReport()
+    seen: set[str] = set()
+    pending, pending_ids = _plan_upserts(docs, store.collection_name, stored, report, seen)
+    report.deleted = sorted(set(stored) - seen)
+
+    if dry_run:
+        return report
+    # Upsert first, delete afterwards: readers always see a complete collection.
+    if pending:
+        store.add_documents(pending, ids=pending_ids)
+    if report.deleted:
+        store.delete(ids=report.deleted, collection_only=True)
+    return report
+
+
 def embed_markets(documents: Sequence[Document] | None = None, reset_collection: bool = True) -> int:
     docs = list(documents) if documents is not None else _load_documents()
     store = get_vector_store()
     if reset_collection:
         store.delete_collection()
     store.create_collection()
-    store.add_documents(docs)
+    hashed = [_with_hash(doc) for doc in docs]
+    store.add_documents(hashed, ids=[_vector_id(store.collection_name, doc) for doc in hashed])
     return len(docs)
 
 
+def _peak_memory_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _read_checkpoint(path: Path, fingerprint: str, batch_size: int) -> int:
+    if not path.exists():
+        return 0
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return 0
+    if state.get("seed_fingerprint") != fingerprint or state.get("batch_size") != batch_size:
+        return 0
+    return int(state.get("completed_batches", 0))
+
+
+def _write_checkpoint(path: Path, fingerprint: str, batch_size: int, completed: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(
+        json.dumps({"seed_fingerprint": fingerprint, "batch_size": batch_size, "completed_batches": completed}),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def _iter_batches(skip_batches: int, batch_size: int) -> Iterator[Tuple[int, List[Document]]]:
+    markets = iter_markets_dataset()
+    # Skipped batches are parsed but never turned into documents.
+    markets = itertools.islice(markets, skip_batches * batch_size, None)
+    documents = iter_market_documents(markets)
+    for index in itertools.count(skip_batches):
+        batch = list(itertools.islice(documents, batch_size))
+        if not batch:
+            return
+        yield index, batch
+
+
+def ingest_markets(
+    *,
+    batch_size: int | None = None,
+    concurrency: int | None = None,
+    checkpoint_path: Path | None = None,
+    resume: bool = True,
+) -> IngestStats:
+    """Stream the seed file, embed changed documents in bounded-concurrency batches and checkpoint progress."""
+
+    settings = get_settings()
+    batch_size = batch_size or settings.ingest_batch_size
+    concurrency = max(1, concurrency or settings.ingest_concurrency)
+    checkpoint_path = checkpoint_path or settings.ingest_checkpoint_path
+    fingerprint = seed_fingerprint()
+    start_batch = _read_checkpoint(checkpoint_path, fingerprint, batch_size) if resume else 0
+
+    store = get_vector_store()
+    store.create_collection()
+    stored = _stored_hashes(store)
+    stats = IngestStats(resumed_batches=start_batch)
+    seen: set[str] = set()
+    completed: set[int] = set()
+    watermark = start_batch
+    started = time.perf_counter()
+
+    def _embed(batch: List[Document], ids: List[str]) -> None:
+        if batch:
+            store.add_documents(batch, ids=ids)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight: Dict[Future, int] = {}
+
+        def _drain(block_until: int) -> None:
+            nonlocal watermark
+            while len(in_flight) > block_until:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    future.result()
+                    completed.add(index)
+                while watermark in completed:
+                    completed.discard(watermark)
+                    watermark += 1
+                _write_checkpoint(checkpoint_path, fingerprint, batch_size, watermark)
+
+        for index, batch in _iter_batches(start_batch, batch_size):
+            pending, pending_ids = _plan_upserts(batch, store.collection_name, stored, stats.report, seen)
+            stats.documents += len(batch)
+            stats.batches += 1
+            stats.tokens += sum(count_tokens(doc.page_content, settings.openai_embedding_model) for doc in pending)
+            in_flight[executor.submit(_embed, pending, pending_ids)] = index
+            _drain(concurrency)
+        _drain(0)
+
+    if start_batch == 0:
+        # Only a full pass has seen every id, so only then is it safe to delete.
+        stats.report.deleted = sorted(set(stored) - seen)
+        if stats.report.deleted:
+            store.delete(ids=stats.report.deleted, collection_only=True)
+    checkpoint_path.unlink(missing_ok=True)
+    stats.elapsed = time.perf_counter() - started
+    stats.peak_memory_mb = _peak_memory_mb()
+    return stats
+
+
+def _refresh_ann_index(changed: int) -> None:
+    try:
+        result = reindex_after_ingest(changed)
+    except AnnIndexError as exc:
+        print(f"[warn] ANN 인덱스를 갱신하지 못했습니다: {exc}")
+        return
+    if result:
+        print(f"[ann] {result['method']} 인덱스 {result['action']} ({result.get('build_seconds', 0):.1f}s)")
+
+
 def cli(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Embed markets_seed data into PGVector.")
-    parser.add_argument(
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--reset",
+        action="store_true",
+        help="기존 벡터 컬렉션을 삭제한 뒤 전체 문서를 다시 임베딩합니다",
+    )
+    mode.add_argument(
         "--keep-existing",
         action="store_true",
         help="기존 벡터 컬렉션을 삭제하지 않고 문서를 추가합니다 (권장되지 않음)",
     )
-    parser.add_argument("--dry-run", action="store_true", help="임베딩 없이 문서 개수만 확인")
+    parser.add_argument("--dry-run", action="store_true", help="임베딩 없이 문서 개수(및 변경분)만 확인")
+    parser.add_argument("--batch-size", type=int, help="배치당 임베딩 문서 수 (기본: INGEST_BATCH_SIZE)")
+    parser.add_argument("--concurrency", type=int, help="동시에 처리할 배치 수 (기본: INGEST_CONCURRENCY)")
+    parser.add_argument("--checkpoint", type=Path, help="재시작용 체크포인트 파일 경로")
+    parser.add_argument("--no-resume", action="store_true", help="체크포인트를 무시하고 처음부터 적재")
     args = parser.parse_args(list(argv) if argv is not None else None)
 
-    documents = _load_documents()
-    count = len(documents)
+    if args.reset or args.keep_existing or args.dry_run:
+        documents = _load_documents()
+        count = len(documents)
 
-    if args.dry_run:
-        print(f"[dry-run] {count}개 문서를 생성했습니다. PGVector에는 쓰지 않습니다.")
+    if args.reset or args.keep_existing:
+        if args.dry_run:
+            print(f"[dry-run] {count}개 문서를 생성했습니다. PGVector에는 쓰지 않습니다.")
+            return 0
+        if args.reset:
+            print("[reset] 기존 컬렉션을 삭제한 뒤 새로 구성합니다.")
+        else:
+            print("[warn] 기존 컬렉션을 유지합니다. 데이터 스키마 차이로 권장되지 않습니다.")
+        print(f"{count}개 문서를 임베딩하여 컬렉션에 적재합니다...")
+        embed_markets(documents=documents, reset_collection=args.reset)
+        ensure_metadata_indexes()
+        _refresh_ann_index(count)
+        print("임베딩이 완료되었습니다.")
         return 0
 
-    reset_flag = not args.keep_existing
-    if reset_flag:
-        print("[reset] 기존 컬렉션을 삭제한 뒤 새로 구성합니다.")
-    else:
-        print("[warn] 기존 컬렉션을 유지합니다. 데이터 스키마 차이로 권장되지 않습니다.")
+    if args.dry_run:
+        print(f"[dry-run] {count}개 문서를 기존 컬렉션과 비교합니다 (content hash 기준)...")
+        report = sync_markets(documents, dry_run=True)
+        print(
+            f"[dry-run] 추가 {len(report.added)}건 · 변경 {len(report.updated)}건 · "
+            f"삭제 {len(report.deleted)}건 · 유지 {report.unchanged}건"
+        )
+        return 0
 
-    print(f"{count}개 문서를 임베딩하여 컬렉션에 적재합니다...")
-    embed_markets(documents=documents, reset_collection=reset_flag)
-    print("임베딩이 완료되었습니다.")
+    print("시드를 스트리밍하며 변경된 문서만 배치 단위로 임베딩합니다 (content hash 기준)...")
+    stats = ingest_markets(
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        checkpoint_path=args.checkpoint,
+        resume=not args.no_resume,
+    )
+    ensure_metadata_indexes()
+    report = stats.report
+    _refresh_ann_index(len(report.added) + len(report.updated) + len(report.deleted))
+    if stats.resumed_batches:
+        print(f"[resume] 체크포인트에서 {stats.resumed_batches}번째 배치부터 재개했습니다. (삭제 동기화는 생략)")
+    print(
+        f"추가 {len(report.added)}건 · 변경 {len(report.updated)}건 · "
+        f"삭제 {len(report.deleted)}건 · 유지 {report.unchanged}건"
+    )
+    peak = f"{stats.peak_memory_mb:.1f} MB" if stats.peak_memory_mb is not None else "N/A"
+    print(
+        f"[throughput] {stats.documents}개 문서 / {stats.batches}개 배치, {stats.elapsed:.2f}s · "
+        f"{stats.docs_per_second:.1f} docs/s · {stats.tokens_per_second:.0f} tokens/s · peak RSS {peak}"
+    )
     return 0
 
 
@@ -1,7 +1,10 @@
 """Helper routines for shaping markets dataset records."""
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import re
+from typing import Any, Dict, List, Mapping
+
+_DISTRICT = re.compile(r"([가-힣]{1,4}구)(?![가-힣])")
 
 
 def normalize_str_list(value: object) -> List[str]:
@@ -38,6 +41,25 @@ def format_location_label(locations: List[Dict[str, Any]]) -> str:
     return ", ".join(label for label in labels if label)
 
 
+def district_of(location: Mapping[str, Any]) -> str:
+    """District (구) of a location: the ``district`` field, else parsed from the address."""
+
+    district = str(location.get("district") or "").strip()
+    if district:
+        return district
+    match = _DISTRICT.search(str(location.get("address") or ""))
+    return match.group(1) if match else ""
+
+
+def location_districts(value: object) -> List[str]:
+    districts: List[str] = []
+    for location in normalize_location_list(value):
+        district = district_of(location)
+        if district and district not in districts:
+            districts.append(district)
+    return districts
+
+
 def short_description(value: object, limit: int = 140) -> str:
     if not isinstance(value, str):
         return ""
@@ -60,6 +82,7 @@ def market_to_item(market: Dict[str, Any]) -> Dict[str, Any]:
         "description": short_description(market.get("market_description")),
         "source": market.get("market_id"),
         "raw_locations": locations,
+        "districts": location_districts(locations),
     }
 
 
@@ -95,6 +118,8 @@ def score_market(query: str, market: Dict[str, Any]) -> float:
 
 
 __all__ = [
+    "district_of",
+    "location_districts",
     "market_to_item",
     "normalize_location_list",
     "normalize_str_list",
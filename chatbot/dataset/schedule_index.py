@@ -0,0 +1,204 @@
+"""Weekly time-slot index of zone operating hours and peak windows, mapped onto markets."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .loader import load_markets_dataset, load_zones_dataset
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+WEEKDAYS = (0, 1, 2, 3, 4)
+WEEKEND = (5, 6)
+_RANGE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+
+TimeRange = Tuple[int, int]
+
+
+def parse_time_range(value: object) -> Optional[TimeRange]:
+    """``"10:30-22:00"`` -> (630, 1320) minutes; an end at or before the start runs past midnight."""
+
+    match = _RANGE.match(str(value or ""))
+    if match is None:
+        return None
+    start_h, start_m, end_h, end_m = (int(part) for part in match.groups())
+    start, end = start_h * 60 + start_m, end_h * 60 + end_m
+    if start >= 24 * 60 or end > 24 * 60 or start_m >= 60 or end_m >= 60:
+        return None
+    if end <= start:
+        end += 24 * 60
+    return start, end
+
+
+def _ranges(values: object) -> Tuple[TimeRange, ...]:
+    items = values if isinstance(values, (list, tuple)) else [values]
+    return tuple(r for r in (parse_time_range(item) for item in items) if r is not None)
+
+
+def format_time_range(span: TimeRange) -> str:
+    start, end = span
+    end = end - 24 * 60 if end > 24 * 60 else end
+    return f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}"
+
+
+@dataclass(frozen=True)
+class ZoneHours:
+    """Operating hours and peak windows of one zone (times in minutes since midnight)."""
+
+    zone_id: str
+    zone_name: str
+    weekday: Optional[TimeRange] = None
+    weekend: Optional[TimeRange] = None
+    weekday_peaks: Tuple[TimeRange, ...] = ()
+    weekend_peaks: Tuple[TimeRange, ...] = ()
+
+    @classmethod
+    def from_zone(cls, zone: Mapping[str, Any]) -> "ZoneHours":
+        pattern = zone.get("time_pattern") if isinstance(zone.get("time_pattern"), dict) else {}
+        return cls(
+            zone_id=str(zone.get("zone_id") or ""),
+            zone_name=str(zone.get("zone_name") or "").strip(),
+            weekday=parse_time_range(zone.get("operating_hours_weekday")),
+            weekend=parse_time_range(zone.get("operating_hours_weekend")),
+            weekday_peaks=_ranges(pattern.get("weekday_peak_times") or []),
+            weekend_peaks=_ranges(pattern.get("weekend_peak_times") or []),
+        )
+
+    def hours_on(self, day: int) -> Optional[TimeRange]:
+        return self.weekend if day in WEEKEND else self.weekday
+
+    def peaks_on(self, day: int) -> Tuple[TimeRange, ...]:
+        return self.weekend_peaks if day in WEEKEND else self.weekday_peaks
+
+    def describe(self) -> str:
+        """``평일 10:30-22:00 · 주말 10:30-22:30 (붐비는 시간: 평일 16:00-20:00 · 주말 13:00-21:00)``"""
+
+        hours = [f"{label} {format_time_range(span)}" for label, span in (("평일", self.weekday), ("주말", self.weekend)) if span]
+        peaks = [
+            f"{label} {', '.join(format_time_range(span) for span in spans)}"
+            for label, spans in (("평일", self.weekday_peaks), ("주말", self.weekend_peaks))
+            if spans
+        ]
+        text = " · ".join(hours) or "정보 없음"
+        return f"{text} (붐비는 시간: {' · '.join(peaks)})" if peaks else text
+
+
+def _week_mask(spans_by_day: Iterable[Tuple[int, Optional[TimeRange]]]) -> np.ndarray:
+    """Slots covered by each day's span; spans past midnight spill into the next day (Sunday wraps to Monday)."""
+
+    mask = np.zeros(SLOTS_PER_WEEK, dtype=bool)
+    for day, span in spans_by_day:
+        if span is None:
+            continue
+        start, end = span
+        first = day * SLOTS_PER_DAY + start // SLOT_MINUTES
+        last = day * SLOTS_PER_DAY + -(-end // SLOT_MINUTES)
+        mask[np.arange(first, last) % SLOTS_PER_WEEK] = True
+    return mask
+
+
+def week_slots(days: Sequence[int], start_minute: int, end_minute: int) -> np.ndarray:
+    """Week slot indices of ``[start_minute, end_minute)`` on each of ``days`` (end may pass midnight)."""
+
+    first = start_minute // SLOT_MINUTES
+    last = max(first + 1, -(-end_minute // SLOT_MINUTES))
+    offsets = np.arange(first, last)
+    return np.unique((np.asarray(days, dtype=np.int64)[:, None] * SLOTS_PER_DAY + offsets).ravel() % SLOTS_PER_WEEK)
+
+
+class ScheduleIndex:
+    """Precomputed open/peak masks over the 336 half-hour slots of a week.
+
+    ``open_markets[slot]`` is a boolean row mask over the market catalog, so "which
+    markets are open then" is one fancy-indexed ``any`` over the window's slots. A
+    market is open when any zone it is located in (``market_location.zone_id``) is.
+    Markets without a known zone are never reported open (nor closed): ``known``
+    tells them apart.
+    """
+
+    def __init__(self, zones: Sequence[ZoneHours], market_zones: Sequence[Sequence[str]]) -> None:
+        self.zones = list(zones)
+        self._zone_rows = {zone.zone_id: i for i, zone in enumerate(self.zones)}
+        self.open_zones = np.zeros((SLOTS_PER_WEEK, len(self.zones)), dtype=bool)
+        self.peak_zones = np.zeros((SLOTS_PER_WEEK, len(self.zones)), dtype=bool)
+        for i, zone in enumerate(self.zones):
+            self.open_zones[:, i] = _week_mask((day, zone.hours_on(day)) for day in range(7))
+            self.peak_zones[:, i] = _week_mask(
+                (day, span) for day in range(7) for span in zone.peaks_on(day)
+            )
+        membership = np.zeros((len(self.zones), len(market_zones)), dtype=bool)
+        for row, zone_ids in enumerate(market_zones):
+            for zone_id in zone_ids:
+                if zone_id in self._zone_rows:
+                    membership[self._zone_rows[zone_id], row] = True
+        self.market_zone_ids = [tuple(z for z in zone_ids if z in self._zone_rows) for zone_ids in market_zones]
+        self.known = membership.any(axis=0)
+        # (slots x zones) @ (zones x markets): a market is open/peaking when any of its zones is.
+        self.open_markets = (self.open_zones.astype(np.uint8) @ membership.astype(np.uint8)) > 0
+        self.peak_markets = (self.peak_zones.astype(np.uint8) @ membership.astype(np.uint8)) > 0
+
+    @classmethod
+    def from_catalog(cls, zones: Iterable[Mapping[str, Any]], markets: Iterable[Mapping[str, Any]]) -> "ScheduleIndex":
+        hours = [ZoneHours.from_zone(zone) for zone in zones if zone.get("zone_id")]
+        market_zones = [
+            [str(loc.get("zone_id")) for loc in market.get("market_location") or [] if isinstance(loc, dict) and loc.get("zone_id")]
+            for market in markets
+        ]
+        return cls(hours, market_zones)
+
+    def zone(self, zone_id: str) -> Optional[ZoneHours]:
+        row = self._zone_rows.get(zone_id)
+        return None if row is None else self.zones[row]
+
+    def open_mask(self, slots: np.ndarray) -> np.ndarray:
+        """Markets open during any of ``slots``."""
+
+        return self.open_markets[slots].any(axis=0)
+
+    def peak_mask(self, slots: np.ndarray) -> np.ndarray:
+        """Markets whose zone is at peak during any of ``slots``."""
+
+        return self.peak_markets[slots].any(axis=0)
+
+    def zones_open(self, slots: np.ndarray) -> List[str]:
+        return [self.zones[i].zone_id for i in np.flatnonzero(self.open_zones[slots].any(axis=0))]
+
+    def describe_market(self, row: int) -> str:
+        """Hours line for a catalog row, one entry per distinct zone."""
+
+        return " / ".join(
+            f"{zone.zone_name} {zone.describe()}" if len(self.market_zone_ids[row]) > 1 else zone.describe()
+            for zone in (self.zones[self._zone_rows[zone_id]] for zone_id in dict.fromkeys(self.market_zone_ids[row]))
+        )
+
+
+@lru_cache(maxsize=1)
+def zone_hours() -> Dict[str, ZoneHours]:
+    """zone_id -> operating hours and peak windows from ``zones_seed.json``."""
+
+    return {hours.zone_id: hours for hours in (ZoneHours.from_zone(zone) for zone in load_zones_dataset()) if hours.zone_id}
+
+
+@lru_cache(maxsize=1)
+def get_schedule_index() -> ScheduleIndex:
+    """Index over ``load_markets_dataset()``; market rows are catalog positions."""
+
+    return ScheduleIndex.from_catalog(load_zones_dataset(), load_markets_dataset())
+
+
+__all__ = [
+    "SLOTS_PER_DAY",
+    "SLOTS_PER_WEEK",
+    "SLOT_MINUTES",
+    "ScheduleIndex",
+    "ZoneHours",
+    "get_schedule_index",
+    "parse_time_range",
+    "week_slots",
+    "zone_hours",
+]
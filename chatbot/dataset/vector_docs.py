@@ -1,7 +1,8 @@
 """Utilities for transforming markets data into vector documents."""
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, Iterator, List
 
 from langchain_core.documents import Document
 
@@ -26,10 +27,32 @@ def _build_page_content(market: Dict[str, Any], item: Dict[str, Any]) -> str:
     )
 
 
+def market_to_document(market: Dict[str, Any]) -> Document:
+    item = market_to_item(market)
+    metadata = {**item, "doc_id": market.get("market_id"), "raw_locations": item.get("raw_locations", [])}
+    return Document(page_content=_build_page_content(market, item), metadata=metadata)
+
+
+def document_key(doc: Document) -> Hashable:
+    """Identity of a market document across backends (seed docs carry doc_id, graph collections market_id)."""
+
+    meta = doc.metadata or {}
+    return meta.get("doc_id") or meta.get("market_id") or meta.get("source") or doc.page_content
+
+
+def iter_market_documents(markets: Iterable[Dict[str, Any]]) -> Iterator[Document]:
+    """Lazily build documents, e.g. from ``iter_markets_dataset()`` for large seeds."""
+
+    for market in markets:
+        yield market_to_document(market)
+
+
 def build_market_documents() -> List[Document]:
-    documents: List[Document] = []
-    for market in load_markets_dataset():
-        item = market_to_item(market)
-        metadata = {**item, "doc_id": market.get("market_id"), "raw_locations": item.get("raw_locations", [])}
-        documents.append(Document(page_content=_build_page_content(market, item), metadata=metadata))
-    return documents
\ No newline at end of file
+    return list(iter_market_documents(load_markets_dataset()))
+
+
+@lru_cache(maxsize=1)
+def catalog_documents() -> List[Document]:
+    """Shared documents in ``load_markets_dataset()`` order, so catalog rows address them directly."""
+
+    return build_market_documents()
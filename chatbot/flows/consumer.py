@@ -2,20 +2,35 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..retrieval import vector_store
 
 LOGGER = logging.getLogger(__name__)
 
 
-def recommend(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+def recommend(
+    query: str, limit: int = 5, *, user_location: Optional[Tuple[float, float]] = None
+) -> List[Dict[str, Any]]:
     if not vector_store.vector_support_enabled():
         return []
     try:
-        items = vector_store.search_consumer_items(query, limit)
+        items = vector_store.search_consumer_items(query, limit, user_location=user_location)
     except Exception as exc:  # pragma: no cover - 로그 용도
         LOGGER.warning("PGVector 추천 검색 실패: %s", exc, exc_info=True)
         items = []
     return items
 
+
+
+async def arecommend(
+    query: str, limit: int = 5, *, user_location: Optional[Tuple[float, float]] = None
+) -> List[Dict[str, Any]]:
+    if not await vector_store.avector_support_enabled():
+        return []
+    try:
+        items = await vector_store.asearch_consumer_items(query, limit, user_location=user_location)
+    except Exception as exc:  # pragma: no cover - 로그 용도
+        LOGGER.warning("PGVector 추천 검색 실패: %s", exc, exc_info=True)
+        items = []
+    return items
@@ -0,0 +1,131 @@
+"""Per-request budget (rewrites, wall clock, LLM tokens) for the retrieve/rewrite loop."""
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.documents import Document
+from langchain_core.tracers.context import register_configure_hook
+
+from ..config import get_settings
+from ..formatting.response_builder import format_consumer
+from .state import AgentState
+
+LOGGER = logging.getLogger(__name__)
+
+FALLBACK_REPLY = "지금은 답변을 완성하지 못했어요. 원하는 지역이나 분위기를 조금 더 구체적으로 알려주시면 다시 찾아볼게요."
+
+_USAGE: ContextVar[Optional[UsageMetadataCallbackHandler]] = ContextVar("request_token_usage", default=None)
+# Registered once: every callback manager configured while _USAGE is set gets the handler,
+# so LLM calls inside nodes and conditional edges are all counted.
+register_configure_hook(_USAGE, inheritable=True)
+_UNTRACKED_WARNED = False
+
+
+@contextmanager
+def track_usage() -> Iterator[UsageMetadataCallbackHandler]:
+    """Count LLM tokens for one request; wrap each graph invocation with it."""
+
+    handler = UsageMetadataCallbackHandler()
+    token = _USAGE.set(handler)
+    try:
+        yield handler
+    finally:
+        try:
+            _USAGE.reset(token)
+        except ValueError:
+            # A streaming generator closed from another context (client disconnect).
+            _USAGE.set(None)
+
+
+def usage_tracked() -> bool:
+    """Whether LLM tokens of the current request are being counted (``track_usage`` is active)."""
+
+    return _USAGE.get() is not None
+
+
+def tokens_used() -> int:
+    handler = _USAGE.get()
+    if handler is None:
+        return 0
+    return sum(usage.get("total_tokens", 0) for usage in handler.usage_metadata.values())
+
+
+def start_budget(state: AgentState) -> AgentState:
+    """Graph entry node: stamp the request clock unless the caller already did."""
+
+    return {"started_at": state.get("started_at") or time.time(), "rewrites": state.get("rewrites", 0)}
+
+
+def time_or_tokens_exhausted(state: AgentState) -> Optional[str]:
+    """Reason the request must stop now (deadline or token cap), else ``None``."""
+
+    settings = get_settings()
+    started_at = state.get("started_at")
+    if settings.request_deadline_seconds and started_at and time.time() - started_at >= settings.request_deadline_seconds:
+        return "deadline"
+    if settings.request_max_tokens:
+        if not usage_tracked():
+            _warn_untracked()
+        elif tokens_used() >= settings.request_max_tokens:
+            return "tokens"
+    return None
+
+
+def _warn_untracked() -> None:
+    global _UNTRACKED_WARNED
+    if not _UNTRACKED_WARNED:
+        _UNTRACKED_WARNED = True
+        LOGGER.warning(
+            "track_usage() 없이 그래프가 실행되어 REQUEST_MAX_TOKENS 토큰 상한이 적용되지 않습니다. "
+            "chatbot.app.invoke_chatbot 등을 쓰거나 호출을 track_usage()로 감싸세요."
+        )
+
+
+def budget_exhausted(state: AgentState) -> Optional[str]:
+    """Like ``time_or_tokens_exhausted`` but also stops once ``MAX_REWRITES`` is spent."""
+
+    if state.get("rewrites", 0) >= get_settings().max_rewrites:
+        return "rewrites"
+    return time_or_tokens_exhausted(state)
+
+
+def _context_item(doc: Document) -> Dict[str, Any]:
+    # Graph collections use market_* keys (markets_to_docs); the seed index uses plain ones.
+    meta = doc.metadata or {}
+    return {
+        "name": meta.get("name") or meta.get("market_name") or "추천 마켓",
+        "category": meta.get("category") or meta.get("market_category") or "플리마켓",
+        "attributes": meta.get("attributes") or meta.get("market_attribute") or [],
+        "amenities": meta.get("amenities") or meta.get("market_ameni") or [],
+        "location": meta.get("location") or meta.get("address") or "광주 전역",
+        "rating": meta.get("rating"),
+        "description": meta.get("description") if isinstance(meta.get("description"), str) else "",
+    }
+
+
+def fallback(state: AgentState) -> AgentState:
+    """Best answer so far: the ungraded answer, else a listing of the retrieved markets."""
+
+    reason = state.get("budget_exhausted") or budget_exhausted(state) or "rewrites"
+    answer = state.get("answer", "")
+    if not answer:
+        context = state.get("context", [])
+        answer = format_consumer([_context_item(doc) for doc in context]) if context else FALLBACK_REPLY
+    return {"answer": answer, "budget_exhausted": reason}
+
+
+__all__ = [
+    "FALLBACK_REPLY",
+    "budget_exhausted",
+    "fallback",
+    "start_budget",
+    "time_or_tokens_exhausted",
+    "tokens_used",
+    "track_usage",
+    "usage_tracked",
+]
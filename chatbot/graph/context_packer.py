@@ -0,0 +1,254 @@
+"""Pack retrieved market documents into a deduplicated, query-trimmed, token-budgeted prompt context."""
+from __future__ import annotations
+
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from ..config import get_settings
+from ..dataset.vector_docs import document_key
+from ..retrieval.lexical_index import tokenize
+from ..tokenizer import count_tokens
+
+PACKING_MODEL = "gpt-4o"
+_DESCRIPTION = "설명:"
+_DESCRIPTION_SECTION = "[상세 설명]"
+_SECTION = re.compile(r"^\[[^\]]+\]$")
+_FIELD = re.compile(r"^[\w가-힣() /]{1,16}:")
+_PLACEHOLDERS = {"", "정보 없음", "N/A", "None"}
+_MIN_OVERLAP = 20
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s+")
+
+
+@dataclass(frozen=True)
+class PackedContext:
+    text: str
+    tokens: int
+    raw_tokens: int
+    documents: int
+    dropped: int = 0
+
+
+@dataclass
+class PackingStats:
+    """Context tokens sent vs. what the unpacked ``page_content`` join would have cost, per request."""
+
+    calls: int = 0
+    raw_tokens: int = 0
+    packed_tokens: int = 0
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.raw_tokens - self.packed_tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "raw_tokens": self.raw_tokens,
+            "packed_tokens": self.packed_tokens,
+            "saved_tokens": self.saved_tokens,
+        }
+
+
+_STATS: ContextVar[Optional[PackingStats]] = ContextVar("context_packing_stats", default=None)
+_STATS_LOCK = threading.Lock()
+
+
+@contextmanager
+def track_packing() -> Iterator[PackingStats]:
+    """Collect packing savings for one request; wrap each graph invocation with it."""
+
+    stats = PackingStats()
+    token = _STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        try:
+            _STATS.reset(token)
+        except ValueError:
+            # A streaming generator closed from another context (client disconnect).
+            _STATS.set(None)
+
+
+def packing_stats() -> Optional[Dict[str, Any]]:
+    stats = _STATS.get()
+    return stats.as_dict() if stats is not None else None
+
+
+def _overlap(head: str, tail: str) -> int:
+    """Length of the longest suffix of ``head`` that ``tail`` starts with (splitter chunk overlap)."""
+
+    for size in range(min(len(head), len(tail)), _MIN_OVERLAP - 1, -1):
+        if head.endswith(tail[:size]):
+            return size
+    return 0
+
+
+def _merge_chunks(docs: Sequence[Document]) -> List[Tuple[str, List[str]]]:
+    """One (title, lines) per market in rank order; chunks of the same market are stitched back together."""
+
+    merged: Dict[Hashable, str] = {}
+    for doc in docs:
+        text = doc.page_content.strip()
+        if not text:
+            continue
+        key = document_key(doc)
+        current = merged.get(key)
+        if current is None:
+            merged[key] = text
+        elif text in current:
+            continue
+        elif current in text:
+            merged[key] = text
+        elif size := _overlap(current, text):
+            merged[key] = current + text[size:]
+        elif size := _overlap(text, current):
+            # A later chunk ranked above an earlier one.
+            merged[key] = text + current[size:]
+        else:
+            merged[key] = f"{current}\n{text}"
+    result: List[Tuple[str, List[str]]] = []
+    for text in merged.values():
+        lines = list(dict.fromkeys(line.strip() for line in text.splitlines() if line.strip()))
+        result.append((lines[0], lines[1:]))
+    return result
+
+
+def _split_fields(lines: Sequence[str]) -> Tuple[List[str], str]:
+    """(field lines worth sending, description text) of one market.
+
+    Handles both the seed layout ("설명: ...") and the pgvector one ("[상세 설명]" then
+    free text, possibly continued in a later chunk); placeholder fields are dropped.
+    """
+
+    fields: List[str] = []
+    description: List[str] = []
+    in_description = False
+    for line in lines:
+        if line == _DESCRIPTION_SECTION:
+            in_description = True
+        elif line.startswith(_DESCRIPTION):
+            description.append(line[len(_DESCRIPTION) :].strip())
+        elif _SECTION.match(line):
+            in_description = False
+        elif in_description or not _FIELD.match(line):
+            description.append(line)
+        elif line.split(":", 1)[1].strip() not in _PLACEHOLDERS:
+            fields.append(line)
+    return fields, " ".join(description)
+
+
+def _ranked_sentences(description: str, query_terms: frozenset[str]) -> List[Tuple[int, str]]:
+    """(position, sentence), the lead sentence first, then by query-term overlap."""
+
+    sentences = list(dict.fromkeys(s.strip() for s in _SENTENCE_END.split(description) if s.strip()))
+    if not sentences:
+        return []
+    scored = sorted(
+        range(1, len(sentences)),
+        key=lambda i: (-len(query_terms & set(tokenize(sentences[i]))), i),
+    )
+    return [(i, sentences[i]) for i in [0, *scored]]
+
+
+@dataclass
+class _Entry:
+    title: str
+    fields: List[str]
+    sentences: List[Tuple[int, str]]
+    kept: int = 0
+
+    def render(self) -> str:
+        chosen = " ".join(sentence for _, sentence in sorted(self.sentences[: self.kept]))
+        # Title then 설명 keeps the layout the seed documents (and prompts) use.
+        return "\n".join([self.title, f"{_DESCRIPTION} {chosen}".rstrip(), *self.fields])
+
+
+def _truncate(text: str, budget: int) -> str:
+    while text and count_tokens(text, PACKING_MODEL) > budget:
+        text = text[: int(len(text) * 0.9)]
+    return text
+
+
+@lru_cache(maxsize=256)
+def _pack(query: str, contents: Tuple[Tuple[Hashable, str], ...], budget: int) -> PackedContext:
+    docs = [Document(page_content=text, metadata={"doc_id": key}) for key, text in contents]
+    raw_tokens = count_tokens("\n\n".join(text for _, text in contents), PACKING_MODEL)
+    query_terms = frozenset(tokenize(query))
+    entries: List[_Entry] = []
+    for title, lines in _merge_chunks(docs):
+        fields, description = _split_fields(lines)
+        entries.append(_Entry(title, fields, _ranked_sentences(description, query_terms), kept=1))
+
+    def cost(entry: _Entry) -> int:
+        return count_tokens(entry.render(), PACKING_MODEL)
+
+    costs = [cost(entry) for entry in entries]
+    dropped = 0
+    # Every market keeps its facts and lead sentence; lower-ranked markets go first when over budget.
+    while len(entries) > 1 and budget and sum(costs) > budget:
+        entries.pop()
+        costs.pop()
+        dropped += 1
+    # Spend what is left on the most query-relevant sentences, one per market per round, in rank order.
+    grew = True
+    while budget and grew:
+        grew = False
+        for i, entry in enumerate(entries):
+            if entry.kept >= len(entry.sentences):
+                continue
+            entry.kept += 1
+            candidate = cost(entry)
+            if sum(costs) - costs[i] + candidate <= budget:
+                costs[i] = candidate
+                grew = True
+            else:
+                entry.kept -= 1
+    if not budget:
+        for entry in entries:
+            entry.kept = len(entry.sentences)
+    text = "\n\n".join(entry.render() for entry in entries)
+    if budget:
+        text = _truncate(text, budget)
+    return PackedContext(
+        text=text,
+        tokens=count_tokens(text, PACKING_MODEL),
+        raw_tokens=raw_tokens,
+        documents=len(entries),
+        dropped=dropped,
+    )
+
+
+def pack_context(query: str, docs: Sequence[Document], *, budget: Optional[int] = None) -> PackedContext:
+    """Context text for one LLM call; repeated calls on the same (query, docs) reuse the packing.
+
+    Chunks of one market are merged, each market keeps its title, facts and lead
+    description sentence plus the sentences sharing the most terms with ``query``,
+    all within ``CONTEXT_MAX_TOKENS`` (0 = no limit). With ``CONTEXT_PACKING_ENABLED``
+    off the plain ``page_content`` join is returned.
+    """
+
+    settings = get_settings()
+    if not settings.context_packing_enabled:
+        text = "\n\n".join(doc.page_content for doc in docs)
+        tokens = count_tokens(text, PACKING_MODEL)
+        packed = PackedContext(text=text, tokens=tokens, raw_tokens=tokens, documents=len(docs))
+    else:
+        contents = tuple((document_key(doc), doc.page_content) for doc in docs)
+        packed = _pack(query or "", contents, settings.context_max_tokens if budget is None else budget)
+    stats = _STATS.get()
+    if stats is not None:
+        with _STATS_LOCK:
+            stats.calls += 1
+            stats.raw_tokens += packed.raw_tokens
+            stats.packed_tokens += packed.tokens
+    return packed
+
+
+__all__ = ["PackedContext", "PackingStats", "pack_context", "packing_stats", "track_packing"]
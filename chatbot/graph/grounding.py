@@ -0,0 +1,250 @@
+"""Local first-tier grounding check: catalog facts named in an answer must come from its retrieved markets."""
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from langchain_core.documents import Document
+
+from ..config import get_settings
+from ..dataset.loader import load_markets_dataset
+from ..dataset.market_utils import location_districts, normalize_str_list
+from ..dataset.vector_docs import document_key
+
+GROUNDED = "not hallucinated"
+UNGROUNDED = "hallucinated"
+
+# Everyday phrasings of amenity terms in answers: alias -> canonical amenity.
+_AMENITY_ALIASES = {"주차": "주차가능", "와이파이": "wifi", "예약": "예약가능"}
+_RATING = re.compile(r"(?:평점|별점|★)\s*(\d(?:\.\d{1,2})?)|(\d\.\d{1,2})\s*점")
+# Counts ("3곳", "2가지") describe the answer itself, not a market.
+_NUMBER = re.compile(r"(?>\d+(?:[.,:]\d+)*)(?!\s*(?:곳|군데|가지|개))")
+_WORD = re.compile(r"[가-힣]+|[A-Za-z]+")
+_PARTICLE = re.compile(r"(?:에서|으로|까지|부터|이에요|예요|입니다|을|를|이|가|은|는|에|의|와|과|도|로|만)$")
+# Stems of the recommendation phrasing itself ("요청하신 조건에 맞는 곳으로 ... 추천드려요").
+_ANSWER_STEMS = frozenset(
+    {"요청", "조건", "맞는", "곳으", "추천", "드려", "드립", "있어", "있습", "좋아", "좋은", "방문", "가보", "어떠", "어떨", "해요", "합니", "찾으", "원하", "곳이", "이런", "다음", "모두", "함께", "관련", "정보", "안내"}
+)
+
+
+@dataclass(frozen=True)
+class GroundingVerdict:
+    """``label`` is ``GROUNDED``/``UNGROUNDED`` when the local check is sure, None when the LLM must decide."""
+
+    label: Optional[str]
+    reason: str
+    unsupported: Tuple[str, ...] = ()
+
+    @property
+    def conclusive(self) -> bool:
+        return self.label is not None
+
+
+class CatalogMatcher:
+    """One compiled alternation over every market name, district and amenity surface form.
+
+    Alternatives are ordered longest first, so at each position the longest term wins
+    and a scan of the answer is a single regex pass.
+    """
+
+    def __init__(self, markets: Sequence[Mapping[str, Any]]) -> None:
+        terms: Dict[str, Tuple[str, str]] = {}
+        for market in markets:
+            name = str(market.get("market_name") or "").strip()
+            if len(name) >= 2:
+                terms.setdefault(name.lower(), ("names", name))
+            for district in location_districts(market.get("market_location")):
+                terms.setdefault(district.lower(), ("districts", district))
+            for amenity in normalize_str_list(market.get("market_ameni")):
+                terms.setdefault(amenity.lower(), ("amenities", amenity))
+        for alias, amenity in _AMENITY_ALIASES.items():
+            terms.setdefault(alias, ("amenities", amenity))
+        self._terms = terms
+        surfaces = sorted(terms, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(surface) for surface in surfaces), re.IGNORECASE) if surfaces else None
+
+    def mentions(self, text: str) -> Dict[str, List[str]]:
+        found: Dict[str, List[str]] = {"names": [], "districts": [], "amenities": []}
+        if self._pattern is None or not text:
+            return found
+        for match in self._pattern.finditer(text):
+            kind, term = self._terms[match.group(0).lower()]
+            # Districts must start a word: "광산 구경" is not 광산구.
+            if kind == "districts" and match.start() and re.match(r"[가-힣]", text[match.start() - 1]):
+                continue
+            if term not in found[kind]:
+                found[kind].append(term)
+        return found
+
+
+@lru_cache(maxsize=1)
+def get_catalog_matcher() -> CatalogMatcher:
+    return CatalogMatcher(load_markets_dataset())
+
+
+@lru_cache(maxsize=1)
+def _catalog_by_id() -> Dict[object, Mapping[str, Any]]:
+    return {market.get("market_id"): market for market in load_markets_dataset()}
+
+
+@dataclass
+class _ContextFacts:
+    names: Set[str] = field(default_factory=set)
+    districts: Set[str] = field(default_factory=set)
+    amenities: Set[str] = field(default_factory=set)
+    ratings: List[float] = field(default_factory=list)
+    text: str = ""
+
+
+def _context_facts(docs: Sequence[Document]) -> _ContextFacts:
+    facts = _ContextFacts(text="\n".join(doc.page_content for doc in docs))
+    catalog = _catalog_by_id()
+    for doc in docs:
+        meta = doc.metadata or {}
+        market = catalog.get(document_key(doc)) or catalog.get(meta.get("market_id")) or {}
+        name = market.get("market_name") or meta.get("market_name") or meta.get("name")
+        if name:
+            facts.names.add(str(name).strip())
+        facts.districts.update(location_districts(market.get("market_location")) or meta.get("districts") or [])
+        facts.amenities.update(normalize_str_list(market.get("market_ameni") or meta.get("amenities") or meta.get("market_ameni")))
+        rating = market.get("market_rating", meta.get("rating"))
+        if isinstance(rating, (int, float)):
+            facts.ratings.append(float(rating))
+    return facts
+
+
+def _ratings(text: str) -> List[Tuple[str, float]]:
+    return [(m.group(0), float(m.group(1) or m.group(2))) for m in _RATING.finditer(text)]
+
+
+def _uncovered_words(answer: str, support: str) -> List[str]:
+    """Words of ``answer`` whose stem (particle stripped) appears nowhere in ``support``.
+
+    Any such word is a claim the catalog facts do not cover ("서울에", "수영장이"), so
+    the answer cannot be called grounded locally.
+    """
+
+    support = support.lower()
+    uncovered: List[str] = []
+    for word in _WORD.findall(answer):
+        core = _PARTICLE.sub("", word.lower()) if len(word) > 2 else word.lower()
+        if not core or core[:2] in _ANSWER_STEMS:
+            continue
+        if core[:2] not in support:
+            uncovered.append(word)
+    return uncovered
+
+
+def local_verdict(answer: str, docs: Sequence[Document], query: str = "") -> GroundingVerdict:
+    """Check the catalog facts ``answer`` names against the markets in ``docs``.
+
+    A market name or rating that is not in the context (nor in the question) is a
+    sure hallucination. The answer is surely grounded only when it names at least one
+    retrieved market, every district/amenity/rating it states belongs to the
+    context, every other number appears in the context or question, and every
+    remaining word is covered by them too (beyond the recommendation phrasing).
+    Anything else, i.e. any free-text claim, is inconclusive and goes to the LLM grader.
+    """
+
+    if not get_settings().grounding_check_enabled:
+        return GroundingVerdict(None, "disabled")
+    if not answer.strip() or not docs:
+        return GroundingVerdict(None, "empty")
+    facts = _context_facts(docs)
+    mentions = get_catalog_matcher().mentions(answer)
+    asked = get_catalog_matcher().mentions(query)
+
+    foreign = [name for name in mentions["names"] if name not in facts.names and name not in asked["names"]]
+    wrong_ratings = [
+        surface
+        for surface, value in _ratings(answer)
+        if surface not in query and all(abs(value - rating) >= 0.05 for rating in facts.ratings)
+    ]
+    if foreign or wrong_ratings:
+        return GroundingVerdict(UNGROUNDED, "unsupported_fact", tuple(foreign + wrong_ratings))
+
+    unsupported = [d for d in mentions["districts"] if d not in facts.districts and d not in asked["districts"]]
+    unsupported += [a for a in mentions["amenities"] if a not in facts.amenities]
+    stripped = _RATING.sub(" ", answer)
+    unsupported += [n for n in _NUMBER.findall(stripped) if n not in facts.text and n not in query]
+    if unsupported:
+        return GroundingVerdict(None, "unverified_claim", tuple(unsupported))
+    if not any(name in facts.names for name in mentions["names"]):
+        return GroundingVerdict(None, "no_catalog_mention")
+    uncovered = _uncovered_words(answer, f"{facts.text}\n{query}")
+    if uncovered:
+        return GroundingVerdict(None, "free_text_claim", tuple(uncovered))
+    return GroundingVerdict(GROUNDED, "catalog_match")
+
+
+@dataclass
+class GroundingStats:
+    checks: int = 0
+    local_grounded: int = 0
+    local_ungrounded: int = 0
+    escalated: int = 0
+    # Locally decided answers also graded by the LLM (GROUNDING_AUDIT) and how often both agreed.
+    audited: int = 0
+    agreed: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checks": self.checks,
+            "local_grounded": self.local_grounded,
+            "local_ungrounded": self.local_ungrounded,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / self.checks, 4) if self.checks else 0.0,
+            "audited": self.audited,
+            "agreement_rate": round(self.agreed / self.audited, 4) if self.audited else None,
+        }
+
+
+_STATS = GroundingStats()
+_STATS_LOCK = threading.Lock()
+
+
+def needs_llm(verdict: GroundingVerdict) -> bool:
+    return not verdict.conclusive or get_settings().grounding_audit
+
+
+def resolve_grounding(verdict: GroundingVerdict, llm_label: Optional[str]) -> str:
+    """Final hallucination label: the local verdict when conclusive, else the LLM's; updates the stats."""
+
+    with _STATS_LOCK:
+        _STATS.checks += 1
+        if not verdict.conclusive:
+            _STATS.escalated += 1
+        elif verdict.label == GROUNDED:
+            _STATS.local_grounded += 1
+        else:
+            _STATS.local_ungrounded += 1
+        if verdict.conclusive and llm_label is not None:
+            _STATS.audited += 1
+            _STATS.agreed += int(llm_label == verdict.label)
+    if verdict.conclusive:
+        return verdict.label  # type: ignore[return-value]
+    return llm_label or UNGROUNDED
+
+
+def grounding_stats() -> Dict[str, Any]:
+    """Process-wide escalation rate of the local check and its agreement with the LLM grader."""
+
+    with _STATS_LOCK:
+        return _STATS.as_dict()
+
+
+__all__ = [
+    "GROUNDED",
+    "UNGROUNDED",
+    "CatalogMatcher",
+    "GroundingStats",
+    "GroundingVerdict",
+    "get_catalog_matcher",
+    "grounding_stats",
+    "local_verdict",
+    "needs_llm",
+    "resolve_grounding",
+]
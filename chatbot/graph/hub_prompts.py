@@ -0,0 +1,87 @@
+"""Vendored LangChain Hub prompts: load local snapshots, optionally refresh them from the hub."""
+from __future__ import annotations
+
+import argparse
+import logging
+import warnings
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from ..config import get_settings
+from ..models import fake_backend_enabled
+
+LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "prompt_snapshots"
+HUB_PROMPTS = ("langchain-ai/rag-document-relevance", "rlm/rag-prompt")
+
+
+def snapshot_path(name: str) -> Path:
+    return SNAPSHOT_DIR / f"{name.replace('/', '__')}.json"
+
+
+def load_snapshot(name: str) -> Any:
+    from langchain_core.load import loads
+
+    path = snapshot_path(name)
+    if not path.exists():
+        raise FileNotFoundError(f"프롬프트 스냅샷이 없습니다: {path} (python -m chatbot.graph.hub_prompts refresh)")
+    with warnings.catch_warnings():
+        # ``loads`` is flagged beta; hub.pull goes through the same deserializer.
+        warnings.simplefilter("ignore")
+        return loads(path.read_text(encoding="utf-8"))
+
+
+def pull_from_hub(name: str, *, save: bool = True) -> Any:
+    """Fetch ``name`` from the hub and (by default) overwrite its snapshot."""
+
+    from langchain_classic import hub
+    from langchain_core.load import dumps
+
+    prompt = hub.pull(name)
+    if save:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        snapshot_path(name).write_text(dumps(prompt, pretty=True) + "\n", encoding="utf-8")
+    return prompt
+
+
+@lru_cache(maxsize=None)
+def get_prompt(name: str) -> Any:
+    """The vendored snapshot of ``name``; with ``PROMPT_HUB_REFRESH`` the hub copy is pulled first.
+
+    A failed refresh logs and falls back to the snapshot, so startup never depends on the network.
+    """
+
+    if get_settings().prompt_hub_refresh and not fake_backend_enabled():
+        try:
+            return pull_from_hub(name)
+        except Exception as exc:  # pragma: no cover - network dependent
+            LOGGER.warning("허브 프롬프트 갱신 실패(%s), 스냅샷을 사용합니다: %s", name, exc)
+    return load_snapshot(name)
+
+
+def cli(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage vendored LangChain Hub prompt snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    refresh = sub.add_parser("refresh", help="허브에서 프롬프트를 받아 스냅샷을 갱신")
+    refresh.add_argument("names", nargs="*", default=list(HUB_PROMPTS))
+    show = sub.add_parser("show", help="스냅샷 프롬프트 출력")
+    show.add_argument("names", nargs="*", default=list(HUB_PROMPTS))
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    for name in args.names:
+        if args.command == "refresh":
+            pull_from_hub(name)
+            print(f"[refresh] {name} -> {snapshot_path(name)}")
+        else:
+            print(f"=== {name} ({snapshot_path(name).name}) ===")
+            print(load_snapshot(name).pretty_repr())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(cli())
+
+
+__all__ = ["HUB_PROMPTS", "SNAPSHOT_DIR", "get_prompt", "load_snapshot", "pull_from_hub", "snapshot_path"]
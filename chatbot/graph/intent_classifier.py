@@ -0,0 +1,149 @@
+"""Local character n-gram router that answers before the LLM router when confident."""
+from __future__ import annotations
+
+import logging
+import math
+import re
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+
+LOGGER = logging.getLogger(__name__)
+
+Route = Literal["rag_answer", "general_answer"]
+LABELS: Tuple[Route, Route] = ("general_answer", "rag_answer")
+DEFAULT_DIM = 1 << 14
+DEFAULT_NGRAMS = (1, 3)
+# Places outside the Gwangju catalog. A query naming one is left to the LLM router, which
+# can tell "부산 마켓" (out of scope) from "부산에서 오는데 광주 마켓" (in scope).
+_OTHER_REGIONS = re.compile(
+    r"(?<![가-힣])(?:서울|부산|대구|인천|대전|울산|세종|제주|수원|성남|용인|전주|목포|여수|순천|나주|담양|"
+    r"강릉|춘천|원주|경주|포항|창원|김해|청주|천안|홍대|강남|성수동?|해운대|경기도|강원도?|충청(?:남|북)?도|"
+    r"경상(?:남|북)?도|전라(?:남|북)?도|전남|전북|경남|경북|충남|충북|도쿄|오사카|후쿠오카|방콕|타이베이|홍콩|"
+    r"일본|중국|미국|해외)"
+)
+
+
+def _normalize(text: str) -> str:
+    return f" {' '.join(text.lower().split())} "
+
+
+class IntentClassifier:
+    """Logistic regression over hashed character n-grams; scores in microseconds."""
+
+    def __init__(self, weights: np.ndarray, bias: float, ngram_range: Tuple[int, int] = DEFAULT_NGRAMS) -> None:
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.ngram_range = ngram_range
+        # Plain list indexing beats numpy fancy indexing for ~100 features per query.
+        self._weights_list: List[float] = self.weights.tolist()
+
+    @property
+    def dim(self) -> int:
+        return len(self.weights)
+
+    def features(self, text: str) -> Dict[int, float]:
+        normalized = _normalize(text)
+        counts: Dict[int, float] = {}
+        low, high = self.ngram_range
+        for size in range(low, high + 1):
+            for start in range(len(normalized) - size + 1):
+                bucket = zlib.crc32(normalized[start : start + size].encode("utf-8")) % self.dim
+                counts[bucket] = counts.get(bucket, 0.0) + 1.0
+        norm = math.sqrt(sum(value * value for value in counts.values())) or 1.0
+        return {bucket: value / norm for bucket, value in counts.items()}
+
+    def rag_probability(self, text: str) -> float:
+        weights = self._weights_list
+        logit = self.bias + sum(weights[bucket] * value for bucket, value in self.features(text).items())
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, logit))))
+
+    def predict(self, text: str) -> Tuple[Route, float]:
+        """Return (route, confidence in that route)."""
+
+        probability = self.rag_probability(text)
+        if probability >= 0.5:
+            return "rag_answer", probability
+        return "general_answer", 1.0 - probability
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=np.float32(self.bias),
+            ngram_range=np.asarray(self.ngram_range, dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "IntentClassifier":
+        with np.load(path) as payload:
+            low, high = (int(value) for value in payload["ngram_range"])
+            return cls(payload["weights"], float(payload["bias"]), (low, high))
+
+
+def train_classifier(
+    texts: Sequence[str],
+    labels: Sequence[Route],
+    *,
+    dim: int = DEFAULT_DIM,
+    ngram_range: Tuple[int, int] = DEFAULT_NGRAMS,
+    epochs: int = 400,
+    learning_rate: float = 2.0,
+    l2: float = 1e-4,
+) -> IntentClassifier:
+    """Full-batch, class-balanced logistic regression on sparse hashed features."""
+
+    template = IntentClassifier(np.zeros(dim, dtype=np.float32), 0.0, ngram_range)
+    rows: List[int] = []
+    cols: List[int] = []
+    vals: List[float] = []
+    for row, text in enumerate(texts):
+        for bucket, value in template.features(text).items():
+            rows.append(row)
+            cols.append(bucket)
+            vals.append(value)
+    row_idx = np.asarray(rows, dtype=np.int64)
+    col_idx = np.asarray(cols, dtype=np.int64)
+    values = np.asarray(vals, dtype=np.float64)
+    target = np.asarray([1.0 if label == "rag_answer" else 0.0 for label in labels])
+    positives = max(1.0, target.sum())
+    negatives = max(1.0, len(target) - target.sum())
+    sample_weight = np.where(target == 1.0, len(target) / (2 * positives), len(target) / (2 * negatives))
+
+    weights = np.zeros(dim, dtype=np.float64)
+    bias = 0.0
+    for _ in range(epochs):
+        logits = np.bincount(row_idx, weights=weights[col_idx] * values, minlength=len(target)) + bias
+        error = (1.0 / (1.0 + np.exp(-logits)) - target) * sample_weight / len(target)
+        gradient = np.bincount(col_idx, weights=values * error[row_idx], minlength=dim) + l2 * weights
+        weights -= learning_rate * gradient
+        bias -= learning_rate * float(error.sum())
+    return IntentClassifier(weights, bias, ngram_range)
+
+
+def mentions_other_region(text: str) -> Optional[str]:
+    """The first non-Gwangju city, province or country named in ``text``, if any."""
+
+    match = _OTHER_REGIONS.search(text or "")
+    return match.group(0) if match else None
+
+
+@lru_cache(maxsize=1)
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    settings = get_settings()
+    if not settings.router_classifier_enabled:
+        return None
+    path = Path(settings.router_classifier_path)
+    if not path.exists():
+        LOGGER.warning("라우터 분류기 모델이 없어 LLM 라우터만 사용합니다: %s (scripts/train_router.py 실행)", path)
+        return None
+    return IntentClassifier.load(path)
+
+
+__all__ = ["IntentClassifier", "LABELS", "get_intent_classifier", "mentions_other_region", "train_classifier"]
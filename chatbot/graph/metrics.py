@@ -0,0 +1,284 @@
+"""Per-node latency, token and branch metrics for the graph (histograms + JSON/Prometheus export)."""
+from __future__ import annotations
+
+import atexit
+import bisect
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from ..config import get_settings
+
+LOGGER = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+REWRITE_BUCKETS = (0, 1, 2, 3, 5)
+
+_NODE_USAGE: ContextVar[Optional[UsageMetadataCallbackHandler]] = ContextVar("node_token_usage", default=None)
+register_configure_hook(_NODE_USAGE, inheritable=True)
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus layout) with bucket-interpolated quantiles."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets: Tuple[float, ...] = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "max": round(self.max, 6),
+            "buckets": {str(bound): count for bound, count in zip((*self.buckets, "+Inf"), self.counts)},
+        }
+
+
+def _total_tokens(handler: UsageMetadataCallbackHandler) -> int:
+    return sum(usage.get("total_tokens", 0) for usage in handler.usage_metadata.values())
+
+
+class GraphMetrics:
+    """Thread-safe registry fed by ``instrument`` wrappers and ``record_request``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.node_latency: Dict[str, Histogram] = {}
+        self.node_tokens: Dict[str, Histogram] = {}
+        self.node_errors: Dict[str, int] = {}
+        self.branches: Dict[Tuple[str, str], int] = {}
+        self.request_latency = Histogram(LATENCY_BUCKETS)
+        self.request_rewrites = Histogram(REWRITE_BUCKETS)
+        self.request_outcomes: Dict[str, int] = {}
+
+    def observe_step(self, name: str, kind: str, elapsed: float, tokens: int, outcome: Any, failed: bool) -> None:
+        with self._lock:
+            self.node_latency.setdefault(name, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+            if tokens:
+                self.node_tokens.setdefault(name, Histogram(TOKEN_BUCKETS)).observe(tokens)
+            if failed:
+                self.node_errors[name] = self.node_errors.get(name, 0) + 1
+            elif kind == "edge":
+                key = (name, str(outcome))
+                self.branches[key] = self.branches.get(key, 0) + 1
+
+    def record_request(self, state: Dict[str, Any], elapsed: float) -> None:
+        if state.get("cache_hit"):
+            outcome = "cache_hit"
+        elif state.get("guardrail"):
+            outcome = "blocked"
+        elif state.get("budget_exhausted"):
+            outcome = f"budget_{state['budget_exhausted']}"
+        else:
+            outcome = "answered"
+        with self._lock:
+            self.request_latency.observe(elapsed)
+            if not state.get("cache_hit"):
+                self.request_rewrites.observe(state.get("rewrites", 0))
+            self.request_outcomes[outcome] = self.request_outcomes.get(outcome, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "generated_at": time.time(),
+                "nodes": {
+                    name: {
+                        "latency_seconds": hist.as_dict(),
+                        "tokens": self.node_tokens[name].as_dict() if name in self.node_tokens else None,
+                        "errors": self.node_errors.get(name, 0),
+                    }
+                    for name, hist in sorted(self.node_latency.items())
+                },
+                "branches": [
+                    {"edge": edge, "outcome": outcome, "count": count}
+                    for (edge, outcome), count in sorted(self.branches.items())
+                ],
+                "requests": {
+                    "latency_seconds": self.request_latency.as_dict(),
+                    "rewrites": self.request_rewrites.as_dict(),
+                    "outcomes": dict(sorted(self.request_outcomes.items())),
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def _histogram(metric: str, hist: Histogram, labels: str) -> None:
+            cumulative = 0
+            for bound, count in zip((*hist.buckets, "+Inf"), hist.counts):
+                cumulative += count
+                sep = "," if labels else ""
+                lines.append(f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{metric}_sum{suffix} {hist.sum}")
+            lines.append(f"{metric}_count{suffix} {hist.count}")
+
+        with self._lock:
+            lines.append("# TYPE chatbot_node_latency_seconds histogram")
+            for name, hist in sorted(self.node_latency.items()):
+                _histogram("chatbot_node_latency_seconds", hist, f'node="{name}"')
+            lines.append("# TYPE chatbot_node_tokens histogram")
+            for name, hist in sorted(self.node_tokens.items()):
+                _histogram("chatbot_node_tokens", hist, f'node="{name}"')
+            lines.append("# TYPE chatbot_node_errors_total counter")
+            for name, count in sorted(self.node_errors.items()):
+                lines.append(f'chatbot_node_errors_total{{node="{name}"}} {count}')
+            lines.append("# TYPE chatbot_branch_total counter")
+            for (edge, outcome), count in sorted(self.branches.items()):
+                lines.append(f'chatbot_branch_total{{edge="{edge}",outcome="{outcome}"}} {count}')
+            lines.append("# TYPE chatbot_request_latency_seconds histogram")
+            _histogram("chatbot_request_latency_seconds", self.request_latency, "")
+            lines.append("# TYPE chatbot_request_rewrites histogram")
+            _histogram("chatbot_request_rewrites", self.request_rewrites, "")
+            lines.append("# TYPE chatbot_request_total counter")
+            for outcome, count in sorted(self.request_outcomes.items()):
+                lines.append(f'chatbot_request_total{{outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.snapshot(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def instrument(name: str, func: Callable[..., Any], *, kind: str = "node") -> Callable[..., Any]:
+    """Wrap a node (``kind="node"``) or conditional edge (``kind="edge"``) with timing.
+
+    Returns ``func`` itself when metrics are disabled, so the off switch costs nothing.
+    """
+
+    metrics = get_metrics()
+    if metrics is None:
+        return func
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            handler = UsageMetadataCallbackHandler()
+            token = _NODE_USAGE.set(handler)
+            started = time.perf_counter()
+            result: Any = None
+            failed = True
+            try:
+                result = await func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                _NODE_USAGE.reset(token)
+                metrics.observe_step(name, kind, time.perf_counter() - started, _total_tokens(handler), result, failed)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        handler = UsageMetadataCallbackHandler()
+        token = _NODE_USAGE.set(handler)
+        started = time.perf_counter()
+        result: Any = None
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _NODE_USAGE.reset(token)
+            metrics.observe_step(name, kind, time.perf_counter() - started, _total_tokens(handler), result, failed)
+
+    return wrapper
+
+
+def record_request(state: Dict[str, Any], elapsed: float) -> None:
+    metrics = get_metrics()
+    if metrics is not None:
+        metrics.record_request(state, elapsed)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics: GraphMetrics
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        if self.path.startswith("/metrics.json"):
+            body = json.dumps(self.metrics.snapshot(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        elif self.path.startswith("/metrics"):
+            body = self.metrics.render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - silence access logs
+        return
+
+
+def serve_metrics(metrics: GraphMetrics, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Expose ``/metrics`` (Prometheus text) and ``/metrics.json`` from a daemon thread."""
+
+    handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="chatbot-metrics", daemon=True).start()
+    LOGGER.info("메트릭 엔드포인트: http://%s:%s/metrics", host, server.server_address[1])
+    return server
+
+
+@lru_cache(maxsize=1)
+def get_metrics() -> Optional[GraphMetrics]:
+    settings = get_settings()
+    if not settings.metrics_enabled:
+        return None
+    metrics = GraphMetrics()
+    if settings.metrics_port:
+        try:
+            serve_metrics(metrics, settings.metrics_port)
+        except OSError as exc:
+            LOGGER.warning("메트릭 엔드포인트를 열지 못했습니다 (port %s): %s", settings.metrics_port, exc)
+    if settings.metrics_path:
+        atexit.register(metrics.write_json, Path(settings.metrics_path))
+    return metrics
+
+
+__all__ = ["GraphMetrics", "Histogram", "get_metrics", "instrument", "record_request", "serve_metrics"]
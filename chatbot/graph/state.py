@@ -1,7 +1,7 @@
 """Typed state container for the LangGraph chatbot flow."""
 from __future__ import annotations
 
-from typing import List, TypedDict
+from typing import Dict, List, Tuple, TypedDict
 
 from langchain_core.documents import Document
 
@@ -10,6 +10,15 @@ class AgentState(TypedDict, total=False):
     """Runtime state shared across the graph."""
 
     query: str
+    # (lat, lon) of the user, for "near me" questions.
+    user_location: Tuple[float, float]
     context: List["Document"]
     answer: str
     response: str
+    guardrail: str
+    started_at: float
+    rewrites: int
+    tokens_used: int
+    budget_exhausted: str
+    # Context tokens before/after packing for this request (see context_packer).
+    context_packing: Dict[str, int]
@@ -0,0 +1,389 @@
+"""Chat/embedding model factory with a deterministic offline ("fake") backend."""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from .config import get_settings
+from .tokenizer import count_tokens
+
+MODEL_BACKENDS = ("openai", "fake")
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+class FakeModelError(RuntimeError):
+    """Injected failure raised by the fake backend (``FAKE_FAILURE_RATE``)."""
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """Per-call latency: ``fixed``, ``uniform`` (mean ± sigma*mean), ``exponential`` or ``lognormal``."""
+
+    distribution: str = "fixed"
+    mean_ms: float = 0.0
+    sigma: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        mean = max(0.0, self.mean_ms) / 1000.0
+        if mean == 0.0:
+            return 0.0
+        if self.distribution == "uniform":
+            spread = mean * self.sigma
+            return max(0.0, rng.uniform(mean - spread, mean + spread))
+        if self.distribution == "exponential":
+            return rng.expovariate(1.0 / mean)
+        if self.distribution == "lognormal":
+            mu = math.log(mean) - self.sigma**2 / 2
+            return rng.lognormvariate(mu, self.sigma)
+        return mean
+
+
+class _Injector:
+    """Seeded latency/failure source shared by one fake model instance."""
+
+    def __init__(self, name: str, latency: LatencyModel, failure_rate: float, seed: int) -> None:
+        self.name = name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed ^ zlib.crc32(name.encode("utf-8")))
+        self._lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, bool]:
+        with self._lock:
+            delay = self.latency.sample(self._rng)
+            fail = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+        return delay, fail
+
+    def before_call(self) -> None:
+        delay, fail = self.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise FakeModelError(f"{self.name}: injected failure")
+
+    async def abefore_call(self) -> None:
+        delay, fail = self.draw()
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            raise FakeModelError(f"{self.name}: injected failure")
+
+
+def _injector_from_settings(name: str) -> _Injector:
+    settings = get_settings()
+    latency = LatencyModel(settings.fake_latency_distribution, settings.fake_latency_ms, settings.fake_latency_sigma)
+    return _Injector(name, latency, settings.fake_failure_rate, settings.fake_seed)
+
+
+class HashEmbeddings(Embeddings):
+    """Signed feature hashing of character 1-3 grams; similar texts get similar unit vectors."""
+
+    def __init__(self, model: str = "text-embedding-3-small", *, dimensions: Optional[int] = None) -> None:
+        self.model = model
+        self.dimensions = dimensions or EMBEDDING_DIMENSIONS.get(model, 1536)
+        self._injector = _injector_from_settings(f"embeddings:{model}")
+
+    def _vector(self, text: str) -> List[float]:
+        normalized = f" {' '.join(text.lower().split())} "
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for size in (1, 2, 3):
+            for start in range(len(normalized) - size + 1):
+                digest = zlib.crc32(normalized[start : start + size].encode("utf-8"))
+                vector[digest % self.dimensions] += 1.0 if digest & 0x80000000 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._injector.before_call()
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._injector.before_call()
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await self._injector.abefore_call()
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await self._injector.abefore_call()
+        return self._vector(text)
+
+
+@lru_cache(maxsize=4)
+def _load_script(path: Optional[Path]) -> Tuple[Tuple[str, str], ...]:
+    """``[{"match": "substring", "response": "..."}]`` rules checked before the built-in replies."""
+
+    if path is None or not Path(path).exists():
+        return ()
+    payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    return tuple((str(rule["match"]), str(rule["response"])) for rule in payload)
+
+
+_NAME_LINE = re.compile(r"^(?:이름|마켓명|name)\s*[:：]\s*(.+)$", re.MULTILINE | re.IGNORECASE)
+# Seed-index documents start with "<name> (<category>)" followed by a "설명:" line.
+_TITLE_LINE = re.compile(r"^(?:\w+:\s*)?([^:\n]+?) \([^)\n]*\)\n설명:", re.MULTILINE)
+_QUESTION_LINE = re.compile(r"^(?:질문|Question)\s*[:：]\s*(.+)$", re.MULTILINE)
+
+
+def _market_names(prompt: str) -> List[str]:
+    found = _NAME_LINE.findall(prompt) + _TITLE_LINE.findall(prompt)
+    return list(dict.fromkeys(name.strip() for name in found))
+
+
+def _scripted_reply(prompt: str) -> str:
+    """Built-in replies keyed on markers of the graph's prompts (generator, graders, rewrite, basic)."""
+
+    for match, response in _load_script(get_settings().fake_script_path):
+        if match in prompt:
+            return response
+    if "student_answer" in prompt:
+        return "not hallucinated"
+    if "재작성" in prompt:
+        question = _QUESTION_LINE.search(prompt)
+        return (question.group(1).strip() if question else prompt.strip().splitlines()[-1]) + " 광주 플리마켓 추천"
+    if "간단한 응답용 챗봇" in prompt:
+        return "안녕하세요! 광주 플리마켓 추천이 필요하시면 원하는 분위기나 지역을 알려주세요."
+    names = _market_names(prompt)
+    if names:
+        return f"요청하신 조건에 맞는 곳으로 {', '.join(names[:3])}을(를) 추천드려요."
+    return "관련 정보를 찾지 못했어요."
+
+
+def _prompt_text(messages: Sequence[BaseMessage]) -> str:
+    return "\n".join(message.content if isinstance(message.content, str) else str(message.content) for message in messages)
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model: scripted replies, token usage, latency and failure injection."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model_name: str = "fake"
+    token_latency_ms: float = 0.0
+    max_tokens: Optional[int] = Field(default=None, alias="max_completion_tokens")
+    _injector: _Injector = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._injector = _injector_from_settings(f"chat:{self.model_name}")
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "max_tokens": self.max_tokens}
+
+    def _reply(self, messages: Sequence[BaseMessage], schema: Any = None) -> Tuple[str, Dict[str, int]]:
+        prompt = _prompt_text(messages)
+        if schema is not None:
+            reply = _structured_json(prompt, schema)
+        else:
+            reply = _scripted_reply(prompt)
+        if self.max_tokens and schema is None:
+            # Rough cut: one token ~ one Hangul syllable / four ASCII chars.
+            reply = reply[: self.max_tokens * 2]
+        input_tokens = count_tokens(prompt, self.model_name)
+        output_tokens = count_tokens(reply, self.model_name)
+        return reply, {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _result(self, messages: Sequence[BaseMessage], schema: Any = None) -> ChatResult:
+        reply, usage = self._reply(messages, schema)
+        message = AIMessage(content=reply, usage_metadata=usage, response_metadata={"model_name": self.model_name})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._injector.before_call()
+        return self._result(messages, kwargs.get("fake_schema"))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await self._injector.abefore_call()
+        return self._result(messages, kwargs.get("fake_schema"))
+
+    def _chunks(self, messages: Sequence[BaseMessage], schema: Any = None) -> Iterator[ChatGenerationChunk]:
+        reply, usage = self._reply(messages, schema)
+        pieces = re.findall(r"\S+\s*|\s+", reply) or [""]
+        for index, piece in enumerate(pieces):
+            last = index == len(pieces) - 1
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage if last else None))
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self._injector.before_call()
+        for chunk in self._chunks(messages, kwargs.get("fake_schema")):
+            if self.token_latency_ms:
+                time.sleep(self.token_latency_ms / 1000.0)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await self._injector.abefore_call()
+        for chunk in self._chunks(messages, kwargs.get("fake_schema")):
+            if self.token_latency_ms:
+                await asyncio.sleep(self.token_latency_ms / 1000.0)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:  # type: ignore[override]
+        # Goes through the normal call path so callbacks, token usage and the LLM cache still apply.
+        return self.bind(fake_schema=schema) | RunnableLambda(lambda message: _parse_structured(message, schema))
+
+
+def _route_for(prompt: str) -> str:
+    from .graph.intent_classifier import get_intent_classifier
+
+    query = prompt.strip().splitlines()[-1] if prompt.strip() else ""
+    classifier = get_intent_classifier()
+    if classifier is not None:
+        return classifier.predict(query)[0]
+    return "rag_answer" if re.search(r"마켓|플리|추천|팝업", query) else "general_answer"
+
+
+def _structured_json(prompt: str, schema: Any) -> str:
+    """Router decisions use the local classifier; relevance grades pass whenever documents exist.
+
+    Other schemas take the first ``FAKE_SCRIPT_PATH`` rule matching the prompt, whose
+    response must be the JSON to return.
+    """
+
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        if "target" in schema.model_fields:
+            return json.dumps({"target": _route_for(prompt)})
+        name = schema.__name__
+    else:
+        properties = (schema or {}).get("properties", {}) if isinstance(schema, dict) else {}
+        if "Score" in properties or "score" in properties:
+            key = "Score" if "Score" in properties else "score"
+            return json.dumps({key: 1 if _market_names(prompt) else 0, "Explanation": "fake relevance grade"})
+        name = (schema or {}).get("title", repr(schema)) if isinstance(schema, dict) else repr(schema)
+    for match, response in _load_script(get_settings().fake_script_path):
+        if match in prompt:
+            return response
+    raise ValueError(
+        f"fake 백엔드에 {name} 스키마의 구조화 출력이 없습니다. "
+        "FAKE_SCRIPT_PATH 스크립트에 이 프롬프트와 맞는 규칙(match)과 JSON 응답(response)을 추가하세요."
+    )
+
+
+def _parse_structured(message: BaseMessage, schema: Any) -> Any:
+    text = message.content if isinstance(message.content, str) else ""
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return schema.model_validate_json(text)
+    return json.loads(text)
+
+
+def _backend() -> str:
+    backend = get_settings().model_backend.lower()
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"지원하지 않는 MODEL_BACKEND 입니다: {backend} ({' | '.join(MODEL_BACKENDS)})")
+    return backend
+
+
+def _client_limits(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """``kwargs`` plus ``timeout``/``max_retries`` from Settings unless the caller set them.
+
+    The timeout never exceeds ``REQUEST_DEADLINE_SECONDS``, so a request overruns its
+    deadline by at most (retries + 1) calls of that length.
+    """
+
+    settings = get_settings()
+    timeout = settings.llm_timeout_seconds
+    if settings.request_deadline_seconds:
+        timeout = min(timeout, settings.request_deadline_seconds) if timeout else settings.request_deadline_seconds
+    limits: Dict[str, Any] = {"max_retries": settings.llm_max_retries}
+    if timeout:
+        limits["timeout"] = timeout
+    return {**limits, **kwargs}
+
+
+def chat_model(model: str, **kwargs: Any) -> BaseChatModel:
+    """``ChatOpenAI(model=..., **kwargs)`` or its offline stand-in, per ``MODEL_BACKEND``.
+
+    OpenAI clients get ``LLM_TIMEOUT_SECONDS``/``LLM_MAX_RETRIES`` unless ``kwargs`` set them.
+    """
+
+    if _backend() == "fake":
+        return FakeChatModel(
+            model_name=model,
+            token_latency_ms=get_settings().fake_token_latency_ms,
+            max_completion_tokens=kwargs.get("max_completion_tokens"),
+        )
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model=model, **_client_limits(kwargs))
+
+
+def embedding_model(model: str, **kwargs: Any) -> Embeddings:
+    """``OpenAIEmbeddings(model=..., **kwargs)`` or deterministic hashed embeddings of the same width."""
+
+    if _backend() == "fake":
+        return HashEmbeddings(model)
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=model, **_client_limits(kwargs))
+
+
+def fake_backend_enabled() -> bool:
+    return _backend() == "fake"
+
+
+__all__ = [
+    "EMBEDDING_DIMENSIONS",
+    "FakeChatModel",
+    "FakeModelError",
+    "HashEmbeddings",
+    "LatencyModel",
+    "chat_model",
+    "embedding_model",
+    "fake_backend_enabled",
+]
@@ -0,0 +1,502 @@
+"""Lifecycle of the pgvector ANN index (HNSW / IVFFlat) on the LangChain embedding table."""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+
+from ..config import get_settings
+
+LOGGER = logging.getLogger(__name__)
+
+ANN_METHODS = ("hnsw", "ivfflat", "none")
+ITERATIVE_SCAN_MODES = ("off", "relaxed_order", "strict_order")
+EMBEDDING_TABLE = "langchain_pg_embedding"
+COLLECTION_TABLE = "langchain_pg_collection"
+INDEX_NAME = "ix_langchain_pg_embedding_ann"
+# pgvector cannot index the ``vector`` type beyond 2,000 dimensions.
+MAX_INDEXED_DIMENSIONS = 2000
+_OPCLASSES = {"cosine": "vector_cosine_ops", "l2": "vector_l2_ops", "ip": "vector_ip_ops"}
+DISTANCE_OPERATORS = {"cosine": "<=>", "l2": "<->", "ip": "<#>"}
+
+
+class AnnIndexError(RuntimeError):
+    """Raised when the ANN index cannot be created for the current table contents."""
+
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond."""
+
+    return max(1, rows // 1000) if rows <= 1_000_000 else int(math.sqrt(rows))
+
+
+@dataclass(frozen=True)
+class AnnIndexSpec:
+    method: str = "hnsw"
+    distance: str = "cosine"
+    m: int = 16
+    ef_construction: int = 64
+    # IVFFlat only; 0 derives the list count from the row count at build time.
+    lists: int = 0
+
+    @classmethod
+    def from_settings(cls) -> "AnnIndexSpec":
+        settings = get_settings()
+        return cls(
+            method=settings.ann_index_method,
+            distance=settings.ann_distance,
+            m=settings.ann_hnsw_m,
+            ef_construction=settings.ann_hnsw_ef_construction,
+            lists=settings.ann_ivfflat_lists,
+        )
+
+    def validate(self) -> "AnnIndexSpec":
+        if self.method not in ANN_METHODS:
+            raise AnnIndexError(f"지원하지 않는 ANN 인덱스 방식입니다: {self.method} ({' | '.join(ANN_METHODS)})")
+        if self.distance not in _OPCLASSES:
+            raise AnnIndexError(f"지원하지 않는 거리 함수입니다: {self.distance} ({' | '.join(_OPCLASSES)})")
+        return self
+
+    def create_statement(self, name: str, rows: int, *, concurrently: bool = False) -> str:
+        if self.method == "hnsw":
+            options = f"m = {int(self.m)}, ef_construction = {int(self.ef_construction)}"
+        else:
+            options = f"lists = {int(self.lists or ivfflat_lists(rows))}"
+        keyword = "CONCURRENTLY " if concurrently else ""
+        return (
+            f"CREATE INDEX {keyword}{name} ON {EMBEDDING_TABLE} "
+            f"USING {self.method} (embedding {_OPCLASSES[self.distance]}) WITH ({options})"
+        )
+
+
+def session_tuning_statements() -> List[str]:
+    """``SET`` statements for the query-time knobs in ``Settings`` (0/empty leaves the server default)."""
+
+    settings = get_settings()
+    statements: List[str] = []
+    if settings.ann_ef_search:
+        statements.append(f"SET hnsw.ef_search = {int(settings.ann_ef_search)}")
+    if settings.ann_probes:
+        statements.append(f"SET ivfflat.probes = {int(settings.ann_probes)}")
+    mode = (settings.ann_iterative_scan or "").lower()
+    if mode:
+        if mode not in ITERATIVE_SCAN_MODES:
+            raise AnnIndexError(f"지원하지 않는 iterative scan 모드입니다: {mode} ({' | '.join(ITERATIVE_SCAN_MODES)})")
+        # pgvector >= 0.8: keep scanning the index until filtered queries have k rows.
+        statements.append(f"SET hnsw.iterative_scan = {mode}")
+        statements.append(f"SET ivfflat.iterative_scan = {mode}")
+    return statements
+
+
+def apply_session_tuning(engine: Any) -> None:
+    """Run the ef_search/probes ``SET``s on every new pooled connection of ``engine`` (sync or async)."""
+
+    statements = session_tuning_statements()
+    if not statements:
+        return
+    target = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(target, "connect")
+    def _tune(dbapi_connection: Any, _record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+        # Commit so the pool's rollback-on-return does not undo the session settings.
+        dbapi_connection.commit()
+
+
+def _default_engine() -> Engine:
+    from .vector_store import get_sync_engine
+
+    return get_sync_engine()
+
+
+def _autocommit(engine: Engine) -> Connection:
+    # CREATE/REINDEX ... CONCURRENTLY refuse to run inside a transaction block.
+    return engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+def _dimensions(conn: Connection) -> List[int]:
+    rows = conn.execute(
+        text(f"SELECT DISTINCT vector_dims(embedding) FROM {EMBEDDING_TABLE} WHERE embedding IS NOT NULL")
+    )
+    return sorted(int(row[0]) for row in rows)
+
+
+def _column_type(conn: Connection) -> str:
+    return conn.execute(
+        text(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            f"WHERE attrelid = '{EMBEDDING_TABLE}'::regclass AND attname = 'embedding'"
+        )
+    ).scalar_one()
+
+
+def _row_count(conn: Connection) -> int:
+    return int(conn.execute(text(f"SELECT count(*) FROM {EMBEDDING_TABLE}")).scalar_one())
+
+
+def _ann_indexes(conn: Connection) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        text(
+            """
+            SELECT c.relname AS name, am.amname AS method, pg_get_indexdef(i.indexrelid) AS definition,
+                   pg_relation_size(i.indexrelid) AS size_bytes, i.indisvalid AS valid,
+                   c.reloptions AS options, COALESCE(s.idx_scan, 0) AS scans
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = c.relam
+            LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = i.indexrelid
+            WHERE i.indrelid = CAST(:table AS regclass) AND am.amname IN ('hnsw', 'ivfflat')
+            ORDER BY c.relname
+            """
+        ),
+        {"table": EMBEDDING_TABLE},
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def _index_options(index: Dict[str, Any]) -> Dict[str, int]:
+    options: Dict[str, int] = {}
+    for entry in index.get("options") or []:
+        key, _, value = str(entry).partition("=")
+        if value.isdigit():
+            options[key] = int(value)
+    return options
+
+
+def _prepare_column(conn: Connection) -> int:
+    """Give the embedding column a fixed dimension (required by ANN indexes); returns it."""
+
+    dimensions = _dimensions(conn)
+    if not dimensions:
+        raise AnnIndexError("임베딩이 없어 인덱스 차원을 정할 수 없습니다. 먼저 시드를 적재하세요.")
+    if len(dimensions) > 1:
+        raise AnnIndexError(
+            f"{EMBEDDING_TABLE}에 차원이 다른 임베딩({', '.join(map(str, dimensions))})이 섞여 있습니다. "
+            "컬렉션별로 같은 임베딩 모델을 쓰도록 정리한 뒤 다시 시도하세요."
+        )
+    dimension = dimensions[0]
+    if dimension > MAX_INDEXED_DIMENSIONS:
+        raise AnnIndexError(
+            f"{dimension}차원은 pgvector 인덱스 한도({MAX_INDEXED_DIMENSIONS})를 넘습니다. "
+            "text-embedding-3-small(1536차원)처럼 더 작은 임베딩을 사용하세요."
+        )
+    if _column_type(conn) == "vector":
+        conn.execute(text(f"ALTER TABLE {EMBEDDING_TABLE} ALTER COLUMN embedding TYPE vector({dimension})"))
+    return dimension
+
+
+def create_ann_index(
+    spec: Optional[AnnIndexSpec] = None, *, engine: Optional[Engine] = None, concurrently: bool = False
+) -> Dict[str, Any]:
+    """(Re)build the ANN index with ``spec`` (default: ``Settings``).
+
+    ``concurrently`` builds a new index next to the old one and swaps names, so searches
+    keep an index the whole time (slower build, no write lock).
+    """
+
+    spec = (spec or AnnIndexSpec.from_settings()).validate()
+    engine = engine or _default_engine()
+    with _autocommit(engine) as conn:
+        if spec.method == "none":
+            conn.execute(text(f"DROP INDEX IF EXISTS {INDEX_NAME}"))
+            return {"method": "none", "dropped": INDEX_NAME}
+        dimension = _prepare_column(conn)
+        rows = _row_count(conn)
+        started = time.perf_counter()
+        if concurrently:
+            staging = f"{INDEX_NAME}_new"
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {staging}"))
+            conn.execute(text(spec.create_statement(staging, rows, concurrently=True)))
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}"))
+            conn.execute(text(f"ALTER INDEX {staging} RENAME TO {INDEX_NAME}"))
+        else:
+            conn.execute(text(f"DROP INDEX IF EXISTS {INDEX_NAME}"))
+            conn.execute(text(spec.create_statement(INDEX_NAME, rows)))
+        conn.execute(text(f"ANALYZE {EMBEDDING_TABLE}"))
+        elapsed = time.perf_counter() - started
+    LOGGER.info("ANN 인덱스 생성: %s (%s행, %.1fs)", spec.method, rows, elapsed)
+    return {"method": spec.method, "dimensions": dimension, "rows": rows, "build_seconds": round(elapsed, 3)}
+
+
+def reindex_ann_index(*, engine: Optional[Engine] = None, concurrently: bool = True) -> Dict[str, Any]:
+    """Refresh the index after bulk changes.
+
+    IVFFlat centroids come from the rows present at build time, so an auto-sized index
+    is rebuilt when the row count has drifted; HNSW is rebuilt in place.
+    """
+
+    spec = AnnIndexSpec.from_settings().validate()
+    engine = engine or _default_engine()
+    with _autocommit(engine) as conn:
+        current = next((index for index in _ann_indexes(conn) if index["name"] == INDEX_NAME), None)
+        rows = _row_count(conn)
+    if current is None or current["method"] != spec.method or not current["valid"]:
+        return {**create_ann_index(spec, engine=engine, concurrently=concurrently), "action": "created"}
+    if spec.method == "ivfflat" and not spec.lists:
+        built_lists = _index_options(current).get("lists", 0)
+        target = ivfflat_lists(rows)
+        if not built_lists or max(built_lists, target) > 2 * min(built_lists, target):
+            return {**create_ann_index(spec, engine=engine, concurrently=concurrently), "action": "resized"}
+    started = time.perf_counter()
+    with _autocommit(engine) as conn:
+        keyword = "CONCURRENTLY " if concurrently else ""
+        conn.execute(text(f"REINDEX INDEX {keyword}{INDEX_NAME}"))
+        conn.execute(text(f"ANALYZE {EMBEDDING_TABLE}"))
+    return {"action": "reindexed", "method": spec.method, "rows": rows, "build_seconds": round(time.perf_counter() - started, 3)}
+
+
+def reindex_after_ingest(changed: int, *, engine: Optional[Engine] = None) -> Optional[Dict[str, Any]]:
+    """Called after a bulk ingest: create the index if missing, refresh it if enough rows changed."""
+
+    settings = get_settings()
+    if settings.ann_index_method == "none" or not changed:
+        return None
+    engine = engine or _default_engine()
+    with _autocommit(engine) as conn:
+        exists = any(index["name"] == INDEX_NAME for index in _ann_indexes(conn))
+        rows = _row_count(conn)
+    if exists and changed < settings.ann_reindex_ratio * rows:
+        return None
+    return reindex_ann_index(engine=engine)
+
+
+def index_status(*, engine: Optional[Engine] = None) -> Dict[str, Any]:
+    """Health report: pgvector version, column type, row count, ANN indexes and query-time settings."""
+
+    engine = engine or _default_engine()
+    with engine.connect() as conn:
+        for statement in session_tuning_statements():
+            conn.execute(text(statement))
+        version = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+        rows = _row_count(conn)
+        indexes = _ann_indexes(conn)
+        report: Dict[str, Any] = {
+            "pgvector": version,
+            "column_type": _column_type(conn),
+            "dimensions": _dimensions(conn),
+            "rows": rows,
+            "indexes": indexes,
+            "settings": {
+                name: conn.execute(text("SELECT current_setting(:name, true)"), {"name": name}).scalar()
+                for name in ("hnsw.ef_search", "ivfflat.probes", "hnsw.iterative_scan")
+            },
+        }
+        conn.rollback()
+    problems: List[str] = []
+    if not any(index["name"] == INDEX_NAME for index in indexes):
+        problems.append("ANN 인덱스가 없어 모든 검색이 순차 스캔입니다.")
+    for index in indexes:
+        if not index["valid"]:
+            problems.append(f"{index['name']} 인덱스가 유효하지 않습니다 (중단된 CONCURRENTLY 빌드). 다시 생성하세요.")
+        lists = _index_options(index).get("lists")
+        if index["method"] == "ivfflat" and lists and max(lists, ivfflat_lists(rows)) > 2 * min(lists, ivfflat_lists(rows)):
+            problems.append(f"IVFFlat lists={lists}가 현재 행 수({rows})에 맞지 않습니다. reindex를 실행하세요.")
+    report["problems"] = problems
+    return report
+
+
+def _collection_id(conn: Connection, collection: str) -> Any:
+    collection_id = conn.execute(
+        text(f"SELECT uuid FROM {COLLECTION_TABLE} WHERE name = :name"), {"name": collection}
+    ).scalar()
+    if collection_id is None:
+        raise AnnIndexError(f"컬렉션을 찾을 수 없습니다: {collection}")
+    return collection_id
+
+
+def _timed_search(conn: Connection, statement: Any, params: Dict[str, Any], settings: Sequence[str]) -> tuple[List[str], float]:
+    with conn.begin():
+        for setting in settings:
+            conn.execute(text(setting))
+        started = time.perf_counter()
+        ids = [row[0] for row in conn.execute(statement, params)]
+        return ids, time.perf_counter() - started
+
+
+def evaluate_recall(
+    *,
+    engine: Optional[Engine] = None,
+    collection: Optional[str] = None,
+    samples: int = 50,
+    k: int = 10,
+    ef_search: Sequence[int] = (10, 20, 40, 80, 160),
+    probes: Sequence[int] = (1, 2, 4, 8, 16),
+    seed: float = 0.42,
+) -> Dict[str, Any]:
+    """Recall@k and latency of ANN search at several ef_search/probes values vs exact search.
+
+    Stored embeddings sampled from the collection act as queries; exact results come
+    from the same SQL with index scans disabled.
+    """
+
+    engine = engine or _default_engine()
+    spec = AnnIndexSpec.from_settings().validate()
+    collection = collection or get_settings().vector_collection
+    operator = DISTANCE_OPERATORS[spec.distance]
+    statement = text(
+        f"SELECT id FROM {EMBEDDING_TABLE} WHERE collection_id = :collection "
+        f"ORDER BY embedding {operator} CAST(:query AS vector) LIMIT :k"
+    )
+    with engine.connect() as conn:
+        collection_id = _collection_id(conn, collection)
+        method = next((index["method"] for index in _ann_indexes(conn) if index["name"] == INDEX_NAME), None)
+        conn.execute(text("SELECT setseed(:seed)"), {"seed": seed})
+        queries = [
+            row[0]
+            for row in conn.execute(
+                text(f"SELECT embedding::text FROM {EMBEDDING_TABLE} WHERE collection_id = :collection ORDER BY random() LIMIT :n"),
+                {"collection": collection_id, "n": samples},
+            )
+        ]
+        conn.rollback()
+        if not queries:
+            raise AnnIndexError(f"{collection} 컬렉션에 임베딩이 없습니다.")
+
+        exact: List[List[str]] = []
+        exact_latency: List[float] = []
+        for query in queries:
+            ids, elapsed = _timed_search(
+                conn, statement, {"collection": collection_id, "query": query, "k": k}, ["SET LOCAL enable_indexscan = off"]
+            )
+            exact.append(ids)
+            exact_latency.append(elapsed)
+
+        if method == "hnsw":
+            knob, values = "hnsw.ef_search", ef_search
+        elif method == "ivfflat":
+            knob, values = "ivfflat.probes", probes
+        else:
+            knob, values = None, ()
+        curve: List[Dict[str, Any]] = []
+        for value in values:
+            recalls: List[float] = []
+            latency: List[float] = []
+            for query, truth in zip(queries, exact):
+                ids, elapsed = _timed_search(
+                    conn, statement, {"collection": collection_id, "query": query, "k": k}, [f"SET LOCAL {knob} = {int(value)}"]
+                )
+                recalls.append(len(set(ids) & set(truth)) / max(1, len(truth)))
+                latency.append(elapsed)
+            curve.append(
+                {
+                    knob: int(value),  # type: ignore[dict-item]
+                    "recall": round(float(np.mean(recalls)), 4),
+                    "p50_ms": round(float(np.percentile(latency, 50)) * 1000, 3),
+                    "p95_ms": round(float(np.percentile(latency, 95)) * 1000, 3),
+                }
+            )
+    return {
+        "collection": collection,
+        "method": method,
+        "samples": len(queries),
+        "k": k,
+        "exact": {
+            "p50_ms": round(float(np.percentile(exact_latency, 50)) * 1000, 3),
+            "p95_ms": round(float(np.percentile(exact_latency, 95)) * 1000, 3),
+        },
+        "curve": curve,
+    }
+
+
+def _print_status(report: Dict[str, Any]) -> None:
+    print(f"pgvector {report['pgvector'] or '미설치'} · {report['rows']}행 · 컬럼 {report['column_type']} · 차원 {report['dimensions']}")
+    for index in report["indexes"]:
+        state = "유효" if index["valid"] else "무효"
+        print(
+            f"- {index['name']} ({index['method']}, {state}) {index['size_bytes'] / 1024 / 1024:.1f} MB · "
+            f"옵션 {index['options'] or '-'} · 스캔 {index['scans']}회"
+        )
+    print("쿼리 설정: " + ", ".join(f"{key}={value}" for key, value in report["settings"].items()))
+    for problem in report["problems"]:
+        print(f"[warn] {problem}")
+
+
+def cli(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the pgvector ANN index on the LangChain embedding table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="인덱스 상태와 쿼리 설정 확인")
+    create = commands.add_parser("create", help="ANN 인덱스 (재)생성")
+    create.add_argument("--method", choices=ANN_METHODS, help="기본: ANN_INDEX_METHOD")
+    create.add_argument("--m", type=int, help="HNSW 노드당 연결 수 (기본: ANN_HNSW_M)")
+    create.add_argument("--ef-construction", type=int, help="HNSW 빌드 후보 수 (기본: ANN_HNSW_EF_CONSTRUCTION)")
+    create.add_argument("--lists", type=int, help="IVFFlat 리스트 수 (0=행 수 기준 자동)")
+    create.add_argument("--concurrently", action="store_true", help="쓰기 잠금 없이 새 인덱스를 만든 뒤 교체")
+    reindex = commands.add_parser("reindex", help="대량 적재 후 인덱스 갱신")
+    reindex.add_argument("--blocking", action="store_true", help="CONCURRENTLY 없이 재구축 (더 빠름, 쓰기 잠금)")
+    evaluate = commands.add_parser("evaluate", help="정확 검색 대비 recall/지연 측정")
+    evaluate.add_argument("--collection", help="기본: VECTOR_COLLECTION")
+    evaluate.add_argument("--samples", type=int, default=50)
+    evaluate.add_argument("--k", type=int, default=10)
+    evaluate.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    evaluate.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    evaluate.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    try:
+        if args.command == "status":
+            _print_status(index_status())
+        elif args.command == "create":
+            spec = AnnIndexSpec.from_settings()
+            overrides = {
+                "method": args.method,
+                "m": args.m,
+                "ef_construction": args.ef_construction,
+                "lists": args.lists,
+            }
+            spec = replace(spec, **{key: value for key, value in overrides.items() if value is not None})
+            result = create_ann_index(spec, concurrently=args.concurrently)
+            print(f"ANN 인덱스를 생성했습니다: {json.dumps(result, ensure_ascii=False)}")
+        elif args.command == "reindex":
+            result = reindex_ann_index(concurrently=not args.blocking)
+            print(f"ANN 인덱스를 갱신했습니다: {json.dumps(result, ensure_ascii=False)}")
+        else:
+            report = evaluate_recall(
+                collection=args.collection, samples=args.samples, k=args.k, ef_search=args.ef_search, probes=args.probes
+            )
+            print(f"[exact] p50 {report['exact']['p50_ms']} ms · p95 {report['exact']['p95_ms']} ms ({report['samples']}개 질의, k={report['k']})")
+            if not report["curve"]:
+                print("[warn] ANN 인덱스가 없어 정확 검색만 측정했습니다.")
+            for point in report["curve"]:
+                knob = next(key for key in point if "." in key)
+                print(f"[{knob}={point[knob]}] recall@{report['k']} {point['recall']:.3f} · p50 {point['p50_ms']} ms · p95 {point['p95_ms']} ms")
+            if args.output:
+                args.output.parent.mkdir(parents=True, exist_ok=True)
+                args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+                print(f"Saved ANN evaluation to {args.output}")
+    except AnnIndexError as exc:
+        print(f"[error] {exc}")
+        return 1
+    return 0
+
+
+__all__ = [
+    "ANN_METHODS",
+    "DISTANCE_OPERATORS",
+    "AnnIndexError",
+    "AnnIndexSpec",
+    "apply_session_tuning",
+    "create_ann_index",
+    "evaluate_recall",
+    "index_status",
+    "reindex_after_ingest",
+    "reindex_ann_index",
+    "session_tuning_statements",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(cli())
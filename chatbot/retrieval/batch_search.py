@@ -0,0 +1,46 @@
+"""Shared first stages of a question batch: one embedding request and prefetched vector hits."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from ..cache.embeddings import CachedEmbeddings
+from .vector_store import _get_embeddings
+
+_PREFETCHED: ContextVar[Optional[Mapping[str, List[Document]]]] = ContextVar("prefetched_vector_hits", default=None)
+
+
+def embed_queries(queries: Sequence[str]) -> List[List[float]]:
+    """Query vectors for all ``queries`` in one embeddings request (cached vectors are not re-sent)."""
+
+    embeddings = _get_embeddings()
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.embed_queries(list(queries))
+    return embeddings.embed_documents(list(queries))
+
+
+@contextmanager
+def use_prefetched(hits: Mapping[str, List[Document]]) -> Iterator[None]:
+    """Serve ``retrieve`` from ``hits`` (query -> vector hits) for graph runs started inside this block."""
+
+    token = _PREFETCHED.set(dict(hits))
+    try:
+        yield
+    finally:
+        _PREFETCHED.reset(token)
+
+
+def prefetched_documents(query: str) -> Optional[List[Document]]:
+    """Prefetched vector hits for ``query``, or None (e.g. after a rewrite changed the query)."""
+
+    hits = _PREFETCHED.get()
+    if not hits:
+        return None
+    found = hits.get(query)
+    return list(found) if found is not None else None
+
+
+__all__ = ["embed_queries", "prefetched_documents", "use_prefetched"]
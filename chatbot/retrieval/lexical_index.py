@@ -0,0 +1,139 @@
+"""BM25 inverted index over the markets catalog with Korean character n-gram terms."""
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..dataset.vector_docs import build_market_documents, document_key
+from .query_parser import ConstraintMasks, QueryConstraints
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+_WORD = re.compile(r"\w+")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split into index terms: character bigrams for Hangul words, whole words otherwise.
+
+    Korean particles attach to nouns ("북구에서", "굿즈를"), so bigrams let "북구" and
+    "굿즈" match without a morphological analyzer. Single-syllable words are kept as-is.
+    """
+
+    terms: List[str] = []
+    for word in _WORD.findall((text or "").lower()):
+        if len(word) > 1 and _HANGUL.search(word):
+            terms.extend(word[i : i + 2] for i in range(len(word) - 1))
+        else:
+            terms.append(word)
+    return terms
+
+
+class LexicalIndex:
+    """Inverted index with BM25 weights precomputed per posting.
+
+    Each term maps to ``(rows, weights)`` arrays, so scoring a query is one vectorized
+    add per distinct query term over a dense score array.
+    """
+
+    def __init__(self, documents: Sequence[Document], *, k1: float = BM25_K1, b: float = BM25_B) -> None:
+        self.documents = list(documents)
+        term_counts = [Counter(tokenize(doc.page_content)) for doc in self.documents]
+        lengths = np.array([sum(counts.values()) for counts in term_counts], dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        norms = k1 * (1.0 - b + b * lengths / avg_length) if avg_length else np.full(len(lengths), k1)
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for row, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        total = len(self.documents)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, entries in postings.items():
+            rows = np.fromiter((row for row, _ in entries), dtype=np.int32, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            idf = math.log(1.0 + (total - len(entries) + 0.5) / (len(entries) + 0.5))
+            weights = (idf * tfs * (k1 + 1.0) / (tfs + norms[rows])).astype(np.float32)
+            self.postings[term] = (rows, weights)
+        self.constraint_masks = ConstraintMasks(self.documents)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, k: int, *, constraints: Optional[QueryConstraints] = None) -> List[Tuple[int, float]]:
+        """Return (row, BM25 score) pairs for the k best rows with a non-zero score.
+
+        With ``constraints`` rows satisfying them rank first, relaxed when too few do.
+        """
+
+        if k <= 0 or not self.documents:
+            return []
+        scores = self._scores(query)
+        if scores is None:
+            return []
+        if not constraints:
+            return self._top(scores, k)
+        return self.constraint_masks.relaxed_search(
+            constraints, k, lambda allowed, n: self._top(scores if allowed is None else np.where(allowed, scores, 0.0), n)
+        )
+
+    def _scores(self, query: str) -> Optional[np.ndarray]:
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        matched = False
+        for term, repeats in Counter(tokenize(query)).items():
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            rows, weights = posting
+            # Rows are unique within a posting list, so fancy-index accumulation is safe.
+            scores[rows] += weights * repeats
+            matched = True
+        return scores if matched else None
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        top = min(k, int(np.count_nonzero(scores)))
+        if not top:
+            return []
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(row), float(scores[row])) for row in best]
+
+    def similarity_search(self, query: str, k: int = 4, *, constraints: Optional[QueryConstraints] = None) -> List[Document]:
+        return [self.documents[row] for row, _ in self.search(query, k, constraints=constraints)]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], *, k: int = RRF_K, limit: int | None = None) -> List[Document]:
+    """Merge ranked lists by summing ``1 / (k + rank)``; earlier lists win ties and duplicates."""
+
+    scores: Dict[Hashable, float] = {}
+    chosen: Dict[Hashable, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            chosen.setdefault(key, doc)
+    ordered = sorted(chosen, key=lambda key: -scores[key])
+    return [chosen[key] for key in ordered[:limit]]
+
+
+@lru_cache(maxsize=1)
+def get_lexical_index() -> LexicalIndex:
+    return LexicalIndex(build_market_documents())
+
+
+__all__ = [
+    "LexicalIndex",
+    "get_lexical_index",
+    "reciprocal_rank_fusion",
+    "tokenize",
+]
@@ -0,0 +1,422 @@
+"""In-process vector index over the markets catalog (PGVector alternative)."""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from ..config import get_settings
+from ..dataset.loader import seed_fingerprint
+from .query_parser import ConstraintMasks, QueryConstraints
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+VECTORS_NAME = "vectors.npy"
+SCALES_NAME = "scales.npy"
+CENTROIDS_NAME = "centroids.npy"
+OFFSETS_NAME = "offsets.npy"
+SUPPORTED_DTYPES = ("float32", "int8")
+_EMBED_BATCH = 256
+_KMEANS_ITERATIONS = 12
+
+
+class LocalIndexUnavailable(RuntimeError):
+    """Raised when the local index is requested but has not been built or is unusable."""
+
+
+def default_index_dir() -> Path:
+    settings = get_settings()
+    if settings.local_index_dir:
+        return Path(settings.local_index_dir)
+    seed_path = Path(settings.markets_seed_path)
+    return seed_path.with_name(f"{seed_path.stem}.index")
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization; returns (codes, scales)."""
+
+    peaks = np.abs(matrix).max(axis=1)
+    peaks[peaks == 0] = 1.0
+    scales = (peaks / 127.0).astype(np.float32)
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def _spherical_kmeans(matrix: np.ndarray, partitions: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Cluster unit vectors by cosine similarity; returns (centroids, assignments)."""
+
+    rng = np.random.default_rng(seed)
+    centroids = matrix[rng.choice(len(matrix), size=partitions, replace=False)].copy()
+    assignments = np.zeros(len(matrix), dtype=np.int64)
+    for _ in range(_KMEANS_ITERATIONS):
+        assignments = np.argmax(matrix @ centroids.T, axis=1)
+        for cluster in range(partitions):
+            members = matrix[assignments == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+            else:
+                centroids[cluster] = matrix[rng.integers(len(matrix))]
+        centroids = _normalize_rows(centroids)
+    return centroids.astype(np.float32), assignments
+
+
+def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    top = min(k, len(scores))
+    if top <= 0:
+        return []
+    best = np.argpartition(-scores, top - 1)[:top]
+    best = best[np.argsort(-scores[best])]
+    return [(int(rows[i]), float(scores[i])) for i in best]
+
+
+class LocalVectorIndex:
+    """Memory-mapped embedding matrix with exact or partitioned (IVF) top-k search."""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        doc_ids: Sequence[str],
+        documents: Sequence[Document],
+        embeddings: Embeddings,
+        *,
+        scales: Optional[np.ndarray] = None,
+        centroids: Optional[np.ndarray] = None,
+        offsets: Optional[np.ndarray] = None,
+        nprobe: int = 4,
+    ) -> None:
+        self.vectors = vectors
+        self.doc_ids = list(doc_ids)
+        self.documents = list(documents)
+        self.embeddings = embeddings
+        self.scales = scales
+        self.centroids = centroids
+        self.offsets = offsets
+        self.nprobe = max(1, nprobe)
+        self.constraint_masks = ConstraintMasks(self.documents)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @property
+    def partitioned(self) -> bool:
+        return self.centroids is not None and self.offsets is not None
+
+    def _score_block(self, start: int, stop: int, query: np.ndarray) -> np.ndarray:
+        block = np.asarray(self.vectors[start:stop], dtype=np.float32)
+        scores = block @ query
+        if self.scales is not None:
+            scores *= self.scales[start:stop]
+        return scores
+
+    def _candidate_ranges(self, query: np.ndarray) -> List[Tuple[int, int]]:
+        if not self.partitioned:
+            return [(0, len(self))]
+        assert self.centroids is not None and self.offsets is not None
+        probes = min(self.nprobe, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+        return [(int(self.offsets[p]), int(self.offsets[p + 1])) for p in nearest]
+
+    def search_by_vector(
+        self, vector: Sequence[float], k: int, *, allowed: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """Return (row, cosine similarity) pairs for the k closest rows (within ``allowed`` if given)."""
+
+        if k <= 0 or not len(self):
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        rows: List[np.ndarray] = []
+        scores: List[np.ndarray] = []
+        for start, stop in self._candidate_ranges(query):
+            if stop <= start:
+                continue
+            block_rows = np.arange(start, stop)
+            block_scores = self._score_block(start, stop, query)
+            if allowed is not None:
+                keep = allowed[start:stop]
+                block_rows, block_scores = block_rows[keep], block_scores[keep]
+            rows.append(block_rows)
+            scores.append(block_scores)
+        if not rows:
+            return []
+        return _top_k(np.concatenate(rows), np.concatenate(scores), k)
+
+    def search_many_by_vector(
+        self,
+        vectors: Sequence[Sequence[float]],
+        k: int,
+        constraints: Optional[Sequence[Optional[QueryConstraints]]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """``search_by_vector`` for many queries at once, each with its own (relaxed) constraints.
+
+        An exact index scores every query in one (rows x queries) matrix product, so the
+        vectors are read once per batch instead of once per query; partitioned indexes
+        probe different partitions per query and search them one by one.
+        """
+
+        constraints = list(constraints) if constraints is not None else [None] * len(vectors)
+        if not vectors or k <= 0 or not len(self):
+            return [[] for _ in vectors]
+        if self.partitioned:
+            return [self._search_constrained(vector, k, level) for vector, level in zip(vectors, constraints)]
+        queries = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1.0, norms)
+        matrix = np.asarray(self.vectors, dtype=np.float32) @ queries.T
+        if self.scales is not None:
+            matrix *= self.scales[:, None]
+        everything = np.arange(len(self))
+        results: List[List[Tuple[int, float]]] = []
+        for column, level in enumerate(constraints):
+            scores = matrix[:, column]
+
+            def search(allowed: Optional[np.ndarray], n: int, scores: np.ndarray = scores) -> List[Tuple[int, float]]:
+                if allowed is None:
+                    return _top_k(everything, scores, n)
+                return _top_k(everything[allowed], scores[allowed], n)
+
+            results.append(self.constraint_masks.relaxed_search(level, k, search) if level else search(None, k))
+        return results
+
+    def _search_constrained(
+        self, vector: Sequence[float], k: int, constraints: Optional[QueryConstraints]
+    ) -> List[Tuple[int, float]]:
+        if not constraints:
+            return self.search_by_vector(vector, k)
+        return self.constraint_masks.relaxed_search(
+            constraints, k, lambda allowed, n: self.search_by_vector(vector, n, allowed=allowed)
+        )
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, *, constraints: Optional[QueryConstraints] = None
+    ) -> List[Tuple[Document, float]]:
+        """Top-k by cosine similarity; ``constraints`` restrict the rows and are relaxed when too strict."""
+
+        vector = self.embeddings.embed_query(query)
+        return [(self.documents[row], score) for row, score in self._search_constrained(vector, k, constraints)]
+
+    def similarity_search(self, query: str, k: int = 4, *, constraints: Optional[QueryConstraints] = None) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, constraints=constraints)]
+
+    def similarity_search_by_vector(
+        self, vector: Sequence[float], k: int = 4, *, constraints: Optional[QueryConstraints] = None
+    ) -> List[Document]:
+        return [self.documents[row] for row, _ in self._search_constrained(vector, k, constraints)]
+
+    async def asimilarity_search(
+        self, query: str, k: int = 4, *, constraints: Optional[QueryConstraints] = None
+    ) -> List[Document]:
+        """``similarity_search`` that awaits the query embedding (a network call on a cache miss).
+
+        Only the numpy scan runs inline on the event loop.
+        """
+
+        vector = await self.embeddings.aembed_query(query)
+        return self.similarity_search_by_vector(vector, k, constraints=constraints)
+
+    def similarity_search_many(
+        self,
+        vectors: Sequence[Sequence[float]],
+        k: int = 4,
+        constraints: Optional[Sequence[Optional[QueryConstraints]]] = None,
+    ) -> List[List[Document]]:
+        """Top-k documents per already-embedded query (see ``search_many_by_vector``)."""
+
+        return [[self.documents[row] for row, _ in hits] for hits in self.search_many_by_vector(vectors, k, constraints)]
+
+    def as_retriever(self, k: int = 3) -> "LocalIndexRetriever":
+        return LocalIndexRetriever(index=self, k=k)
+
+
+class LocalIndexRetriever(BaseRetriever):
+    """LangChain retriever adapter so the graph can swap PGVector for the local index."""
+
+    index: Any
+    k: int = 3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, constraints: Optional[QueryConstraints] = None
+    ) -> List[Document]:
+        return self.index.similarity_search(query, k=self.k, constraints=constraints)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun, constraints: Optional[QueryConstraints] = None
+    ) -> List[Document]:
+        return await self.index.asimilarity_search(query, k=self.k, constraints=constraints)
+
+
+def _embed_documents(embeddings: Embeddings, documents: Sequence[Document]) -> np.ndarray:
+    chunks: List[np.ndarray] = []
+    for start in range(0, len(documents), _EMBED_BATCH):
+        batch = [doc.page_content for doc in documents[start : start + _EMBED_BATCH]]
+        chunks.append(np.asarray(embeddings.embed_documents(batch), dtype=np.float32))
+    return np.vstack(chunks)
+
+
+def build_local_index(
+    documents: Sequence[Document] | None = None,
+    *,
+    embeddings: Embeddings | None = None,
+    directory: Path | None = None,
+    dtype: str | None = None,
+    ivf_min_size: int | None = None,
+) -> Path:
+    """Embed the catalog and persist the matrix (plus IVF partitions) next to the seed."""
+
+    from ..dataset.vector_docs import build_market_documents
+    from .vector_store import _get_embeddings
+
+    settings = get_settings()
+    dtype = dtype or settings.local_index_dtype
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"지원하지 않는 dtype입니다: {dtype} (허용: {', '.join(SUPPORTED_DTYPES)})")
+    ivf_min_size = settings.local_index_ivf_min_size if ivf_min_size is None else ivf_min_size
+    docs = list(documents) if documents is not None else build_market_documents()
+    if not docs:
+        raise RuntimeError("인덱싱할 문서가 없습니다.")
+    embeddings = embeddings or _get_embeddings()
+    target = directory or default_index_dir()
+    target.mkdir(parents=True, exist_ok=True)
+
+    matrix = _normalize_rows(_embed_documents(embeddings, docs))
+    doc_ids = [str(doc.metadata.get("doc_id") or doc.metadata.get("market_id") or idx) for idx, doc in enumerate(docs)]
+
+    partitions = 0
+    if ivf_min_size and len(matrix) >= ivf_min_size:
+        partitions = max(2, int(np.sqrt(len(matrix))))
+        centroids, assignments = _spherical_kmeans(matrix, partitions)
+        order = np.argsort(assignments, kind="stable")
+        matrix = matrix[order]
+        doc_ids = [doc_ids[i] for i in order]
+        counts = np.bincount(assignments, minlength=partitions)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        np.save(target / CENTROIDS_NAME, centroids)
+        np.save(target / OFFSETS_NAME, offsets)
+    else:
+        for name in (CENTROIDS_NAME, OFFSETS_NAME):
+            (target / name).unlink(missing_ok=True)
+
+    if dtype == "int8":
+        codes, scales = _quantize_int8(matrix)
+        np.save(target / VECTORS_NAME, codes)
+        np.save(target / SCALES_NAME, scales)
+    else:
+        np.save(target / VECTORS_NAME, matrix.astype(np.float32))
+        (target / SCALES_NAME).unlink(missing_ok=True)
+
+    manifest: Dict[str, Any] = {
+        "embedding_model": getattr(embeddings, "model", None),
+        "dtype": dtype,
+        "dimensions": int(matrix.shape[1]),
+        "count": len(doc_ids),
+        "partitions": partitions,
+        "seed_fingerprint": seed_fingerprint(),
+        "doc_ids": doc_ids,
+    }
+    (target / MANIFEST_NAME).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return target
+
+
+def load_local_index(directory: Path | None = None, *, embeddings: Embeddings | None = None) -> LocalVectorIndex:
+    from ..dataset.vector_docs import build_market_documents
+    from .vector_store import _get_embeddings
+
+    source = directory or default_index_dir()
+    manifest_path = source / MANIFEST_NAME
+    if not manifest_path.exists():
+        raise LocalIndexUnavailable(
+            f"로컬 벡터 인덱스가 없습니다: {source} (python -m chatbot.retrieval.local_index 로 생성하세요)"
+        )
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    embeddings = embeddings or _get_embeddings()
+    model = getattr(embeddings, "model", None)
+    if manifest.get("embedding_model") and model and manifest["embedding_model"] != model:
+        raise LocalIndexUnavailable(
+            f"인덱스 임베딩 모델({manifest['embedding_model']})과 설정({model})이 다릅니다. 인덱스를 다시 생성하세요."
+        )
+    if manifest.get("seed_fingerprint") != seed_fingerprint():
+        LOGGER.warning("markets_seed.json이 인덱스 생성 이후 변경되었습니다. 로컬 인덱스를 다시 생성하세요.")
+
+    by_id = {str(doc.metadata.get("doc_id")): doc for doc in build_market_documents()}
+    doc_ids: List[str] = manifest["doc_ids"]
+    missing = [doc_id for doc_id in doc_ids if doc_id not in by_id]
+    if missing:
+        raise LocalIndexUnavailable(f"시드에 없는 문서가 인덱스에 포함되어 있습니다: {', '.join(missing[:5])}")
+
+    vectors = np.load(source / VECTORS_NAME, mmap_mode="r")
+    scales = np.load(source / SCALES_NAME) if manifest.get("dtype") == "int8" else None
+    centroids = offsets = None
+    if manifest.get("partitions"):
+        centroids = np.load(source / CENTROIDS_NAME)
+        offsets = np.load(source / OFFSETS_NAME)
+    return LocalVectorIndex(
+        vectors,
+        doc_ids,
+        [by_id[doc_id] for doc_id in doc_ids],
+        embeddings,
+        scales=scales,
+        centroids=centroids,
+        offsets=offsets,
+        nprobe=get_settings().local_index_nprobe,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_local_index() -> LocalVectorIndex:
+    return load_local_index()
+
+
+def local_index_available() -> bool:
+    try:
+        get_local_index()
+    except (LocalIndexUnavailable, RuntimeError) as exc:
+        LOGGER.warning("로컬 벡터 인덱스를 사용할 수 없습니다: %s", exc)
+        return False
+    return True
+
+
+def cli(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the in-process vector index for markets_seed data.")
+    parser.add_argument("--output", type=Path, help="인덱스 저장 경로 (기본: 시드 파일 옆 .index 디렉터리)")
+    parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, help="임베딩 저장 정밀도 (기본: 설정값)")
+    parser.add_argument("--ivf-min-size", type=int, help="이 개수 이상이면 IVF 파티션을 생성합니다 (0=항상 전수 검색)")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    target = build_local_index(directory=args.output, dtype=args.dtype, ivf_min_size=args.ivf_min_size)
+    manifest = json.loads((target / MANIFEST_NAME).read_text(encoding="utf-8"))
+    mode = f"IVF {manifest['partitions']}개 파티션" if manifest["partitions"] else "전수 검색"
+    print(f"{manifest['count']}개 문서를 {manifest['dtype']} 인덱스로 저장했습니다 ({mode}): {target}")
+    return 0
+
+
+__all__ = [
+    "LocalIndexRetriever",
+    "LocalIndexUnavailable",
+    "LocalVectorIndex",
+    "build_local_index",
+    "get_local_index",
+    "load_local_index",
+    "local_index_available",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(cli())
@@ -0,0 +1,333 @@
+"""Pooled psycopg (v3) retrieval backend shared by the graph and the consumer search paths."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pgvector.psycopg import register_vector, register_vector_async
+from psycopg import AsyncConnection, Connection
+from psycopg.types.json import Jsonb
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from .ann_index import DISTANCE_OPERATORS, session_tuning_statements
+from .query_parser import QueryConstraints, top_up
+from .vector_store import VectorStoreUnavailable, _get_embeddings, _require_settings
+
+LOGGER = logging.getLogger(__name__)
+
+_COLLECTION_SQL = "SELECT uuid FROM langchain_pg_collection WHERE name = %s"
+
+
+def libpq_conninfo(connection: str) -> str:
+    """Strip the SQLAlchemy driver suffix (``postgresql+psycopg://``) for libpq."""
+
+    return re.sub(r"^postgres(?:ql)?(?:\+\w+)?://", "postgresql://", connection)
+
+
+@lru_cache(maxsize=64)
+def _search_sql(operator: str, districts: int, categories: int, required: bool) -> str:
+    """One statement text per filter shape, so each shape is prepared once per connection.
+
+    Every predicate is ``cmetadata @> ...`` and can use the jsonb_path_ops GIN index.
+    """
+
+    clauses = ["collection_id = %s"]
+    for count in (districts, categories):
+        if count:
+            clauses.append("(" + " OR ".join(["cmetadata @> %s"] * count) + ")")
+    if required:
+        clauses.append("cmetadata @> %s")
+    return (
+        "SELECT id, document, cmetadata FROM langchain_pg_embedding "
+        f"WHERE {' AND '.join(clauses)} ORDER BY embedding {operator} %s LIMIT %s"
+    )
+
+
+@lru_cache(maxsize=64)
+def _multi_search_sql(operator: str, queries: int) -> str:
+    """Unfiltered top-k for ``queries`` vectors in one round trip (one prepared shape per batch size).
+
+    Each query row drives its own ``ORDER BY ... LIMIT`` through a lateral join, so the
+    ANN index is used exactly as in the single-query statement.
+    """
+
+    values = ", ".join(f"(%s::vector, {position})" for position in range(queries))
+    return (
+        "SELECT q.position, e.id, e.document, e.cmetadata "
+        f"FROM (VALUES {values}) AS q(embedding, position) "
+        "CROSS JOIN LATERAL ("
+        f"SELECT id, document, cmetadata, embedding {operator} q.embedding AS distance "
+        "FROM langchain_pg_embedding WHERE collection_id = %s "
+        f"ORDER BY embedding {operator} q.embedding LIMIT %s"
+        ") AS e ORDER BY q.position, e.distance"
+    )
+
+
+def _filter_params(constraints: Optional[QueryConstraints]) -> Tuple[Tuple[int, int, bool], List[Any]]:
+    # Must stay the same predicate as QueryConstraints.matches (local index, relaxation masks).
+    if not constraints:
+        return (0, 0, False), []
+    params: List[Any] = [Jsonb({"districts": [district]}) for district in constraints.districts]
+    params.extend(Jsonb({"category": category}) for category in constraints.categories)
+    # Attributes and amenities are "all of these", so they fold into a single containment.
+    required: Dict[str, List[str]] = {}
+    if constraints.attributes:
+        required["attributes"] = list(constraints.attributes)
+    if constraints.amenities:
+        required["amenities"] = list(constraints.amenities)
+    if required:
+        params.append(Jsonb(required))
+    return (len(constraints.districts), len(constraints.categories), bool(required)), params
+
+
+def _to_documents(rows: Sequence[Tuple[Any, ...]]) -> List[Document]:
+    return [Document(id=str(row_id), page_content=document or "", metadata=metadata or {}) for row_id, document, metadata in rows]
+
+
+class PgRetrievalBackend:
+    """Similarity search over one PGVector collection through explicitly sized psycopg pools.
+
+    The sync pool is shared by every thread; async pools are bound to the loop that opened
+    them, so there is one per loop. Each new connection registers the pgvector types and
+    applies the ANN search settings once, and search statements are server-side prepared.
+    """
+
+    def __init__(
+        self,
+        conninfo: str,
+        collection: str,
+        embeddings: Embeddings,
+        *,
+        min_size: int = 2,
+        max_size: int = 10,
+        timeout: float = 30.0,
+        connect_timeout: int = 10,
+        distance: str = "cosine",
+    ) -> None:
+        self.conninfo = conninfo
+        self.collection = collection
+        self.embeddings = embeddings
+        self.min_size = min_size
+        self.max_size = max(min_size, max_size)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.operator = DISTANCE_OPERATORS[distance]
+        self._collection_id: Any = None
+        self._lock = threading.Lock()
+        self._pool: Optional[ConnectionPool] = None
+        self._apools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncConnectionPool]" = weakref.WeakKeyDictionary()
+
+    # -- pools -------------------------------------------------------------
+
+    def _configure(self, conn: Connection) -> None:
+        register_vector(conn)
+        with conn.cursor() as cur:
+            for statement in session_tuning_statements():
+                cur.execute(statement)
+        # The pool hands out idle connections; commit so the settings outlive this transaction.
+        conn.commit()
+
+    async def _aconfigure(self, conn: AsyncConnection) -> None:
+        await register_vector_async(conn)
+        async with conn.cursor() as cur:
+            for statement in session_tuning_statements():
+                await cur.execute(statement)
+        await conn.commit()
+
+    def _pool_kwargs(self) -> Dict[str, Any]:
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "timeout": self.timeout,
+            "kwargs": {"connect_timeout": self.connect_timeout},
+            "name": f"retrieval:{self.collection}",
+        }
+
+    @property
+    def pool(self) -> ConnectionPool:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        self.conninfo,
+                        configure=self._configure,
+                        check=ConnectionPool.check_connection,
+                        open=True,
+                        **self._pool_kwargs(),
+                    )
+        return self._pool
+
+    async def apool(self) -> AsyncConnectionPool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._apools.get(loop)
+            if pool is None:
+                pool = AsyncConnectionPool(
+                    self.conninfo,
+                    configure=self._aconfigure,
+                    check=AsyncConnectionPool.check_connection,
+                    open=False,
+                    **self._pool_kwargs(),
+                )
+                self._apools[loop] = pool
+        # Opening an already open pool is a no-op, so racing callers are fine.
+        await pool.open()
+        return pool
+
+    def warm_up(self) -> None:
+        """Open ``min_size`` connections now and resolve the collection, failing fast if unreachable."""
+
+        self.pool.wait(timeout=self.timeout)
+        with self.pool.connection() as conn:
+            self._resolve_collection(conn.execute(_COLLECTION_SQL, (self.collection,)).fetchone())
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+
+    def _resolve_collection(self, row: Optional[Tuple[Any, ...]]) -> Any:
+        if row is None:
+            raise VectorStoreUnavailable(f"PGVector 컬렉션을 찾을 수 없습니다: {self.collection}")
+        self._collection_id = row[0]
+        return self._collection_id
+
+    # -- search ------------------------------------------------------------
+
+    def _statement(self, vector: Sequence[float], k: int, constraints: Optional[QueryConstraints]) -> Tuple[str, List[Any]]:
+        shape, params = _filter_params(constraints)
+        embedding = np.asarray(vector, dtype=np.float32)
+        return _search_sql(self.operator, *shape), [self._collection_id, *params, embedding, k]
+
+    def search_by_vector(
+        self, vector: Sequence[float], k: int, *, constraints: Optional[QueryConstraints] = None
+    ) -> List[Document]:
+        if k <= 0:
+            return []
+        with self.pool.connection() as conn:
+            if self._collection_id is None:
+                self._resolve_collection(conn.execute(_COLLECTION_SQL, (self.collection,)).fetchone())
+            sql, params = self._statement(vector, k, constraints)
+            return _to_documents(conn.execute(sql, params, prepare=True).fetchall())
+
+    async def asearch_by_vector(
+        self, vector: Sequence[float], k: int, *, constraints: Optional[QueryConstraints] = None
+    ) -> List[Document]:
+        if k <= 0:
+            return []
+        pool = await self.apool()
+        async with pool.connection() as conn:
+            if self._collection_id is None:
+                cursor = await conn.execute(_COLLECTION_SQL, (self.collection,))
+                self._resolve_collection(await cursor.fetchone())
+            sql, params = self._statement(vector, k, constraints)
+            cursor = await conn.execute(sql, params, prepare=True)
+            return _to_documents(await cursor.fetchall())
+
+    def search_many_by_vector(
+        self,
+        vectors: Sequence[Sequence[float]],
+        k: int,
+        constraints: Optional[Sequence[Optional[QueryConstraints]]] = None,
+    ) -> List[List[Document]]:
+        """Top-k documents per vector; all unfiltered vectors share one statement and round trip.
+
+        Filtered vectors keep their own (relaxed) statements, since each filter shape is a
+        different prepared query.
+        """
+
+        constraints = list(constraints) if constraints is not None else [None] * len(vectors)
+        results: List[List[Document]] = [[] for _ in vectors]
+        plain = [position for position, level in enumerate(constraints) if not level]
+        if k > 0 and plain:
+            with self.pool.connection() as conn:
+                if self._collection_id is None:
+                    self._resolve_collection(conn.execute(_COLLECTION_SQL, (self.collection,)).fetchone())
+                params: List[Any] = [np.asarray(vectors[position], dtype=np.float32) for position in plain]
+                rows = conn.execute(
+                    _multi_search_sql(self.operator, len(plain)), [*params, self._collection_id, k], prepare=True
+                ).fetchall()
+            for position, row_id, document, metadata in rows:
+                results[plain[position]].append(
+                    Document(id=str(row_id), page_content=document or "", metadata=metadata or {})
+                )
+        for position, level in enumerate(constraints):
+            if level:
+                results[position] = self._relaxed_search(vectors[position], k, level)
+        return results
+
+    def _relaxed_search(self, vector: Sequence[float], k: int, constraints: QueryConstraints) -> List[Document]:
+        docs: List[Document] = []
+        for level in constraints.relaxations():
+            docs = top_up(docs, self.search_by_vector(vector, k, constraints=level), k)
+            if len(docs) >= k:
+                break
+        return docs
+
+    def search(self, query: str, k: int, *, constraints: Optional[QueryConstraints] = None) -> List[Document]:
+        """Top-k documents; with ``constraints`` the filter is relaxed level by level until k are found."""
+
+        vector = self.embeddings.embed_query(query)
+        if not constraints:
+            return self.search_by_vector(vector, k)
+        return self._relaxed_search(vector, k, constraints)
+
+    async def asearch(self, query: str, k: int, *, constraints: Optional[QueryConstraints] = None) -> List[Document]:
+        vector = await self.embeddings.aembed_query(query)
+        if not constraints:
+            return await self.asearch_by_vector(vector, k)
+        docs: List[Document] = []
+        for level in constraints.relaxations():
+            docs = top_up(docs, await self.asearch_by_vector(vector, k, constraints=level), k)
+            if len(docs) >= k:
+                break
+        return docs
+
+    def as_retriever(self, k: int = 3) -> "PgRetriever":
+        return PgRetriever(backend=self, k=k)
+
+
+class PgRetriever(BaseRetriever):
+    """LangChain retriever adapter for ``PgRetrievalBackend``; cheap to build per call."""
+
+    backend: Any
+    k: int = 3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, constraints: Optional[QueryConstraints] = None
+    ) -> List[Document]:
+        return self.backend.search(query, self.k, constraints=constraints)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun, constraints: Optional[QueryConstraints] = None
+    ) -> List[Document]:
+        return await self.backend.asearch(query, self.k, constraints=constraints)
+
+
+@lru_cache(maxsize=1)
+def get_pg_backend() -> PgRetrievalBackend:
+    settings = _require_settings()
+    return PgRetrievalBackend(
+        libpq_conninfo(settings.pgvector_connection),
+        settings.vector_collection,
+        _get_embeddings(),
+        min_size=settings.pgvector_pool_min_size,
+        max_size=settings.pgvector_pool_max_size,
+        timeout=settings.pgvector_pool_timeout,
+        connect_timeout=settings.pgvector_connect_timeout,
+        distance=settings.ann_distance,
+    )
+
+
+__all__ = ["PgRetrievalBackend", "PgRetriever", "get_pg_backend", "libpq_conninfo"]
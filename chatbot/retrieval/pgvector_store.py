@@ -0,0 +1,25 @@
+"""PGVector subclass with GIN-indexable ``$contains`` filters, imported only when a store is built."""
+from __future__ import annotations
+
+from typing import Any
+
+from langchain_postgres import PGVector
+
+
+class FilteredPGVector(PGVector):
+    """PGVector whose JSONB filters also accept ``{"field": {"$contains": value}}``.
+
+    ``$contains`` compiles to ``cmetadata @> '{"field": value}'`` (a list value means
+    "all of these elements"), which the GIN index can serve; the built-in operators go
+    through ``jsonb_path_match`` or ``->>`` and cannot.
+    """
+
+    def _handle_field_filter(self, field: str, value: Any) -> Any:
+        if isinstance(value, dict) and list(value) == ["$contains"]:
+            if not isinstance(field, str) or not field.isidentifier():
+                raise ValueError(f"Invalid field name: {field}. Expected a valid identifier.")
+            return self.EmbeddingStore.cmetadata.contains({field: value["$contains"]})
+        return super()._handle_field_filter(field, value)
+
+
+__all__ = ["FilteredPGVector"]
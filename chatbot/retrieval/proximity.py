@@ -0,0 +1,100 @@
+"""Resolve "near me" / named-zone origins and rank catalog documents by distance from them."""
+from __future__ import annotations
+
+import math
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from ..config import get_settings
+from ..dataset.geo_index import GeoPoint, find_zone, get_geo_index
+from ..dataset.vector_docs import catalog_documents, document_key
+from .lexical_index import reciprocal_rank_fusion
+from .query_parser import top_up
+
+_NEAR_WORDS = ("근처", "가까운", "가까이", "주변", "인근", "내위치", "현위치", "도보", "걸어서")
+USER_LOCATION_LABEL = "현재 위치"
+
+
+def proximity_intent(query: str) -> bool:
+    text = re.sub(r"\s+", "", query or "")
+    return any(word in text for word in _NEAR_WORDS)
+
+
+def parse_location(value: object) -> Optional[Tuple[float, float]]:
+    """``(lat, lon)`` from a pair, ``{"lat", "lon"}`` mapping or ``"lat,lon"`` string; None if invalid."""
+
+    if isinstance(value, str):
+        value = value.split(",")
+    if isinstance(value, dict):
+        value = (value.get("lat", value.get("latitude")), value.get("lon", value.get("longitude")))
+    try:
+        lat, lon = (float(part) for part in value)  # type: ignore[union-attr]
+    except (TypeError, ValueError):
+        return None
+    if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def resolve_origin(query: str, user_location: Optional[Tuple[float, float]] = None) -> Optional[GeoPoint]:
+    """A zone named in the query wins; otherwise the user's location when the query asks for nearby."""
+
+    if not get_settings().proximity_enabled:
+        return None
+    zone = find_zone(query)
+    if zone is not None:
+        return zone
+    if user_location is not None and proximity_intent(query):
+        return GeoPoint(lat=user_location[0], lon=user_location[1], label=USER_LOCATION_LABEL)
+    return None
+
+
+def _with_distance(doc: Document, km: float, origin: GeoPoint) -> Document:
+    return Document(
+        id=doc.id,
+        page_content=f"{doc.page_content}\n거리: {origin.label or '기준 위치'}에서 약 {km:.1f}km",
+        metadata={**(doc.metadata or {}), "distance_km": round(km, 2)},
+    )
+
+
+def nearby_documents(origin: GeoPoint, k: int, *, radius_km: Optional[float] = None) -> List[Document]:
+    """Up to k markets within ``GEO_RADIUS_KM`` nearest first, or the k nearest when too few are.
+
+    Returned copies carry ``distance_km`` in metadata and a distance line in the text.
+    """
+
+    index = get_geo_index()
+    radius = get_settings().geo_radius_km if radius_km is None else radius_km
+    hits = index.within(origin, radius)[:k]
+    if len(hits) < k:
+        hits = index.nearest(origin, k)
+    documents = catalog_documents()
+    return [_with_distance(documents[row], km, origin) for row, km in hits]
+
+
+def proximity_rerank(
+    rankings: Sequence[Sequence[Document]], nearby: Sequence[Document], *, limit: int, rrf_k: int
+) -> List[Document]:
+    """Keep only nearby markets from ``rankings`` and fuse them with the distance ranking.
+
+    The distance-annotated copies come first so fusion keeps them; unfiltered results
+    top up when fewer than ``limit`` survive.
+    """
+
+    keys = {document_key(doc) for doc in nearby}
+    filtered = [[doc for doc in ranking if document_key(doc) in keys] for ranking in rankings]
+    fused = reciprocal_rank_fusion([list(nearby), *filtered], k=rrf_k, limit=limit)
+    if len(fused) < limit:
+        fused = top_up(fused, reciprocal_rank_fusion(list(rankings), k=rrf_k), limit)
+    return fused
+
+
+__all__ = [
+    "nearby_documents",
+    "parse_location",
+    "proximity_intent",
+    "proximity_rerank",
+    "resolve_origin",
+]
@@ -1,4 +1,204 @@
-"""Legacy query parser removed; kept for compatibility."""
+"""Extract district/category/attribute/amenity constraints from a query for metadata filtering."""
+from __future__ import annotations
 
+import re
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
-__all__: list[str] = []
+import numpy as np
+from langchain_core.documents import Document
+
+from ..config import get_settings
+from ..dataset.loader import load_markets_dataset
+from ..dataset.market_utils import location_districts, normalize_str_list
+from ..dataset.vector_docs import document_key
+
+# Categories too generic to act as a filter.
+_IGNORED_CATEGORIES = frozenset({"기타"})
+# Everyday phrasings that map onto seed vocabulary terms: alias -> (field, term).
+_ALIASES: Dict[str, Tuple[str, str]] = {
+    "주차": ("amenities", "주차가능"),
+    "와이파이": ("amenities", "wifi"),
+    "예약": ("amenities", "예약가능"),
+    "빈티지": ("attributes", "레트로/빈티지"),
+    "레트로": ("attributes", "레트로/빈티지"),
+    "반려동물동반": ("attributes", "반려동물 동반 가능"),
+    "혼자": ("attributes", "혼자 가기 좋아요"),
+    "가족": ("attributes", "가족과 함께"),
+    "아이와": ("attributes", "가족과 함께"),
+    "연인": ("attributes", "연인과 함께"),
+    "데이트": ("attributes", "연인과 함께"),
+    "친구": ("attributes", "친구와 함께"),
+    "공연": ("categories", "공연/전시"),
+    "전시": ("categories", "공연/전시"),
+    "먹거리": ("categories", "음식"),
+}
+
+
+@dataclass(frozen=True)
+class QueryConstraints:
+    """Hard constraints found in a query.
+
+    Districts and categories are alternatives (any may match); attributes and
+    amenities are requirements (all must be present).
+    """
+
+    districts: Tuple[str, ...] = ()
+    categories: Tuple[str, ...] = ()
+    attributes: Tuple[str, ...] = ()
+    amenities: Tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.districts or self.categories or self.attributes or self.amenities)
+
+    def relaxations(self) -> Iterator["QueryConstraints"]:
+        """These constraints, then looser ones: drop attributes, amenities, categories, districts."""
+
+        level = self
+        yield level
+        for name in ("attributes", "amenities", "categories", "districts"):
+            if getattr(level, name):
+                level = replace(level, **{name: ()})
+                yield level
+
+    def matches(self, metadata: Mapping[str, Any]) -> bool:
+        """In-process twin of the SQL filter built by ``pg_backend._filter_params``/``_search_sql``.
+
+        Any district or category, all attributes and all amenities; change both together.
+        """
+
+        if self.districts:
+            districts = metadata.get("districts")
+            if districts is None:
+                districts = location_districts(metadata.get("raw_locations"))
+            if not set(self.districts) & set(districts):
+                return False
+        if self.categories and metadata.get("category") not in self.categories:
+            return False
+        if self.attributes and not set(self.attributes) <= set(normalize_str_list(metadata.get("attributes"))):
+            return False
+        if self.amenities and not set(self.amenities) <= set(normalize_str_list(metadata.get("amenities"))):
+            return False
+        return True
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {
+            "districts": list(self.districts),
+            "categories": list(self.categories),
+            "attributes": list(self.attributes),
+            "amenities": list(self.amenities),
+        }
+
+
+def _compact(text: str) -> str:
+    return re.sub(r"\s+", "", text.lower())
+
+
+@lru_cache(maxsize=1)
+def _vocabulary() -> List[Tuple[str, str, str]]:
+    """(compacted surface form, field, canonical term), longest surface first."""
+
+    entries: Dict[str, Tuple[str, str]] = {}
+    for market in load_markets_dataset():
+        for district in location_districts(market.get("market_location")):
+            entries.setdefault(_compact(district), ("districts", district))
+        category = str(market.get("market_category") or "").strip()
+        if category and category not in _IGNORED_CATEGORIES:
+            entries.setdefault(_compact(category), ("categories", category))
+        for attribute in normalize_str_list(market.get("market_attribute")):
+            entries.setdefault(_compact(attribute), ("attributes", attribute))
+        for amenity in normalize_str_list(market.get("market_ameni")):
+            entries.setdefault(_compact(amenity), ("amenities", amenity))
+    for alias, (field, term) in _ALIASES.items():
+        entries.setdefault(_compact(alias), (field, term))
+    return sorted(((surface, field, term) for surface, (field, term) in entries.items()), key=lambda e: -len(e[0]))
+
+
+def extract_constraints(query: str) -> QueryConstraints:
+    """Match seed vocabulary terms (spacing-insensitive, longest match wins) in ``query``.
+
+    A matched span is consumed, so "반려동물 동반 가능" yields the attribute and not
+    also the 반려동물 category.
+    """
+
+    text = _compact(query or "")
+    found: Dict[str, List[str]] = {"districts": [], "categories": [], "attributes": [], "amenities": []}
+    if not text:
+        return QueryConstraints()
+    # Districts must start a word in the original spacing: "광산 구경" is not 광산구.
+    lowered = (query or "").lower()
+    for surface, field, term in _vocabulary():
+        if field == "districts" and not re.search(rf"(?<![가-힣]){re.escape(surface)}", lowered):
+            continue
+        position = text.find(surface)
+        if position == -1:
+            continue
+        text = text[:position] + "\0" * len(surface) + text[position + len(surface) :]
+        if term not in found[field]:
+            found[field].append(term)
+    return QueryConstraints(**{field: tuple(terms) for field, terms in found.items()})
+
+
+def query_constraints(query: str) -> QueryConstraints:
+    """``extract_constraints`` unless ``METADATA_FILTERS_ENABLED`` is off."""
+
+    if not get_settings().metadata_filters_enabled:
+        return QueryConstraints()
+    return extract_constraints(query)
+
+
+class ConstraintMasks:
+    """Per-index cache of boolean row masks, one per distinct ``QueryConstraints``."""
+
+    def __init__(self, documents: Sequence[Document], *, max_entries: int = 256) -> None:
+        self.documents = documents
+        self.max_entries = max_entries
+        self._masks: Dict[QueryConstraints, np.ndarray] = {}
+
+    def __call__(self, constraints: QueryConstraints) -> np.ndarray:
+        mask = self._masks.get(constraints)
+        if mask is None:
+            mask = np.fromiter(
+                (constraints.matches(doc.metadata or {}) for doc in self.documents), dtype=bool, count=len(self.documents)
+            )
+            if len(self._masks) < self.max_entries:
+                self._masks[constraints] = mask
+        return mask
+
+    def relaxed_search(
+        self,
+        constraints: QueryConstraints,
+        k: int,
+        search: Callable[[Optional[np.ndarray], int], List[Tuple[int, float]]],
+    ) -> List[Tuple[int, float]]:
+        """Fill k (row, score) hits from ``search(allowed_mask, n)`` over ``constraints.relaxations()``."""
+
+        hits: List[Tuple[int, float]] = []
+        seen: set[int] = set()
+        for level in constraints.relaxations():
+            # Asking for k + len(hits) guarantees k rows not already taken at a stricter level.
+            for row, score in search(self(level) if level else None, k + len(hits)):
+                if row not in seen:
+                    seen.add(row)
+                    hits.append((row, score))
+                if len(hits) >= k:
+                    return hits
+        return hits
+
+
+def top_up(constrained: Sequence[Document], unconstrained: Sequence[Document], k: int) -> List[Document]:
+    """Stricter hits first, then looser ones, so an over-strict filter never starves retrieval."""
+
+    docs = list(constrained[:k])
+    seen = {document_key(doc) for doc in docs}
+    for doc in unconstrained:
+        if len(docs) >= k:
+            break
+        if document_key(doc) not in seen:
+            seen.add(document_key(doc))
+            docs.append(doc)
+    return docs
+
+
+__all__ = ["ConstraintMasks", "QueryConstraints", "extract_constraints", "query_constraints", "top_up"]
@@ -0,0 +1,198 @@
+"""Parse when a query asks about ("이번 주말 저녁") and keep markets open at that time."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..config import get_settings
+from ..dataset.loader import load_markets_dataset
+from ..dataset.schedule_index import SLOT_MINUTES, WEEKDAYS, WEEKEND, get_schedule_index, week_slots
+from ..dataset.vector_docs import catalog_documents, document_key
+
+_DAY_NAMES = {"월": 0, "화": 1, "수": 2, "목": 3, "금": 4, "토": 5, "일": 6}
+_DAY_WORD = re.compile(r"([월화수목금토일])(?:요일|욜)")
+_RELATIVE_DAYS = {"오늘": 0, "내일": 1, "모레": 2}
+# Word -> [start, end) in minutes; ends past 24:00 run into the next day.
+_PERIODS: Dict[str, Tuple[int, int]] = {
+    "새벽": (0, 6 * 60),
+    "아침": (6 * 60, 10 * 60),
+    "오전": (9 * 60, 12 * 60),
+    "점심": (11 * 60 + 30, 14 * 60),
+    "낮": (12 * 60, 17 * 60),
+    "오후": (12 * 60, 18 * 60),
+    "저녁": (18 * 60, 21 * 60),
+    "밤": (20 * 60, 24 * 60),
+    "야간": (21 * 60, 26 * 60),
+    "심야": (23 * 60, 27 * 60),
+}
+# "낮" alone is too common ("낮은 가격"), so a period word must end the word or take a time particle.
+_PERIOD_WORD = re.compile(r"(" + "|".join(_PERIODS) + r")(?=$|[^가-힣]|에|시간|때|부터|까지|대|늦게|중)")
+# "시간" is a duration ("2시간 정도"), not a clock time.
+_CLOCK = re.compile(r"(오전|오후|저녁|밤|심야|새벽|아침)?\s*(?<!\d)(\d{1,2})\s*시(?!간)(?:\s*(반|\d{1,2}\s*분))?")
+# A bare hour ("3시") reads as a clock time only before a time particle ("3시에", "3시부터").
+_CLOCK_PARTICLE = re.compile(r"\s*(?:에|부터|까지|쯤|경|전|후|이전|이후|사이|~|-|$)")
+_NOW_WORDS = ("지금", "당장", "현재영업", "영업중", "열려있는", "문연", "문열린")
+
+
+@dataclass(frozen=True)
+class TimeWindow:
+    """Days of week (0=Mon) and a ``[start, end)`` minute range applied to each of them.
+
+    ``relative`` windows ("지금", "오늘 저녁") were resolved against the current time.
+    """
+
+    days: Tuple[int, ...]
+    start_minute: int
+    end_minute: int
+    label: str = ""
+    relative: bool = False
+
+    def slots(self) -> np.ndarray:
+        return week_slots(self.days, self.start_minute, self.end_minute)
+
+
+def _now() -> datetime:
+    return datetime.now(ZoneInfo(get_settings().local_timezone))
+
+
+def _days(text: str, now: datetime) -> Tuple[Tuple[int, ...], str, bool]:
+    for word, offset in _RELATIVE_DAYS.items():
+        if word in text:
+            return ((now.weekday() + offset) % 7,), word, True
+    if "주말" in text:
+        return WEEKEND, "주말", False
+    if "평일" in text or "주중" in text:
+        return WEEKDAYS, "평일", False
+    named = tuple(dict.fromkeys(_DAY_NAMES[m.group(1)] for m in _DAY_WORD.finditer(text)))
+    if named:
+        return named, ", ".join(f"{m.group(1)}요일" for m in _DAY_WORD.finditer(text)), False
+    return (), "", False
+
+
+def _clock(query: str, has_day: bool) -> Optional[Tuple[int, str]]:
+    for match in _CLOCK.finditer(query):
+        period, hour, extra = match.group(1), int(match.group(2)), match.group(3) or ""
+        # "24시 편의점" is the 24-hour idiom, not midnight.
+        if hour > 23:
+            continue
+        if period is None and not extra and not has_day and not _CLOCK_PARTICLE.match(query, match.end()):
+            continue
+        minute = 30 if extra == "반" else int(re.sub(r"\D", "", extra) or 0)
+        if period in ("밤", "심야") and (hour == 12 or hour <= 5):
+            # "밤 12시", "밤 1시" belong to the named day's night: 24:00 and later run
+            # into the next day, as the _PERIODS ranges do.
+            hour = 24 + hour % 12
+        elif hour == 12 and period in ("오전", "새벽"):
+            hour = 0
+        elif period in ("오후", "저녁", "밤", "심야") and hour < 12:
+            hour += 12
+        elif period is None and 1 <= hour <= 8:
+            # Bare "3시"/"7시" at a market means the afternoon or evening; 9-11 stay
+            # morning because that is when day markets open ("10시에 여는 곳").
+            hour += 12
+        return hour * 60 + min(minute, 59), match.group(0).strip()
+    return None
+
+
+def extract_time_window(query: str, now: Optional[datetime] = None) -> Optional[TimeWindow]:
+    """Time window asked about in ``query``, or None when it names no day or time.
+
+    A clock time ("7시에", "오후 3시 반") wins over a period word ("저녁"); a time with
+    no day means today, a day with no time means the whole day. Durations ("2시간")
+    and "24시" are not clock times, and a bare hour needs a day, minutes or a time particle.
+    """
+
+    text = re.sub(r"\s+", "", query or "")
+    if not text:
+        return None
+    now = now or _now()
+    days, day_label, relative = _days(text, now)
+    clock = _clock(query or "", bool(days))
+    period = _PERIOD_WORD.search(query or "")
+    if clock is not None:
+        minute, clock_label = clock
+        span, time_label = (minute, minute + SLOT_MINUTES), clock_label
+    elif period is not None:
+        span, time_label = _PERIODS[period.group(1)], period.group(1)
+    elif any(word in text for word in _NOW_WORDS) and not days:
+        minute = now.hour * 60 + now.minute
+        return TimeWindow(days=(now.weekday(),), start_minute=minute, end_minute=minute + 1, label="지금", relative=True)
+    elif days:
+        span, time_label = (0, 24 * 60), ""
+    else:
+        return None
+    if not days:
+        days, day_label, relative = (now.weekday(),), "오늘", True
+    label = " ".join(part for part in (day_label, time_label) if part)
+    return TimeWindow(days=days, start_minute=span[0], end_minute=span[1], label=label, relative=relative)
+
+
+def query_time_window(query: str) -> Optional[TimeWindow]:
+    """``extract_time_window`` unless ``TIME_FILTER_ENABLED`` is off."""
+
+    if not get_settings().time_filter_enabled:
+        return None
+    return extract_time_window(query)
+
+
+@lru_cache(maxsize=1)
+def _catalog_rows() -> Dict[object, int]:
+    return {market.get("market_id"): row for row, market in enumerate(load_markets_dataset())}
+
+
+def _row(doc: Document) -> Optional[int]:
+    return _catalog_rows().get(document_key(doc))
+
+
+def _with_hours(doc: Document, row: int) -> Document:
+    hours = get_schedule_index().describe_market(row)
+    if not hours:
+        return doc
+    return Document(
+        id=doc.id,
+        page_content=f"{doc.page_content}\n운영 시간: {hours}",
+        metadata={**(doc.metadata or {}), "operating_hours": hours},
+    )
+
+
+@lru_cache(maxsize=256)
+def open_rows(window: TimeWindow) -> np.ndarray:
+    """Catalog row mask of markets open at some point in ``window`` (cached per window)."""
+
+    return get_schedule_index().open_mask(window.slots())
+
+
+def keep_open(docs: Sequence[Document], window: TimeWindow) -> List[Document]:
+    """Documents of markets open during ``window``, each with an operating-hours line.
+
+    Markets whose zone hours are unknown are dropped like closed ones; callers top up
+    from the unfiltered ranking when too few remain.
+    """
+
+    mask = open_rows(window)
+    kept: List[Document] = []
+    for doc in docs:
+        row = _row(doc)
+        if row is not None and mask[row]:
+            kept.append(_with_hours(doc, row))
+    return kept
+
+
+def open_documents(window: TimeWindow, k: int) -> List[Document]:
+    """Up to k catalog markets open during ``window``, best rated first, to top up a thin ranking."""
+
+    documents = catalog_documents()
+    rows = np.flatnonzero(open_rows(window))
+    ratings = np.array([float(documents[row].metadata.get("rating") or 0.0) for row in rows])
+    order = rows[np.argsort(-ratings, kind="stable")][:k]
+    return [_with_hours(documents[row], int(row)) for row in order]
+
+
+__all__ = ["TimeWindow", "extract_time_window", "keep_open", "open_documents", "open_rows", "query_time_window"]
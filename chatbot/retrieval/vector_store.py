@@ -1,18 +1,32 @@
 """Helpers for accessing the PGVector store."""
 from __future__ import annotations
 
+import asyncio
+import re
 import socket
+import threading
 from functools import lru_cache
-from typing import Any, Dict, List, Sequence
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
-from langchain_postgres import PGVector
+from langchain_core.embeddings import Embeddings
 from pydantic import SecretStr
-from sqlalchemy import create_engine
-from sqlalchemy.engine.url import make_url
 
+from ..cache.embeddings import CachedEmbeddings
 from ..config import get_settings
+from ..models import embedding_model, fake_backend_enabled
+from .query_parser import query_constraints, top_up
+
+if TYPE_CHECKING:
+    from langchain_postgres import PGVector
+
+# Constraint filters are all ``cmetadata @> ...``, served by the jsonb_path_ops GIN index;
+# the collection index keeps the collection_id predicate index-backed as well.
+METADATA_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_cmetadata_gin ON langchain_pg_embedding USING gin (cmetadata jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_langchain_pg_embedding_collection ON langchain_pg_embedding (collection_id)",
+    "ANALYZE langchain_pg_embedding",
+)
 
 
 class VectorStoreUnavailable(RuntimeError):
@@ -21,71 +35,184 @@ class VectorStoreUnavailable(RuntimeError):
 
 def _require_settings() -> Any:
     settings = get_settings()
-    if not (settings.pgvector_connection and settings.vector_collection and settings.openai_api_key):
+    has_key = settings.openai_api_key or fake_backend_enabled()
+    if not (settings.pgvector_connection and settings.vector_collection and has_key):
         raise VectorStoreUnavailable("PGVector 설정이 완료되지 않았습니다.")
     return settings
 
 
+def _require_embedding_settings() -> Any:
+    settings = get_settings()
+    if not (settings.openai_api_key or fake_backend_enabled()):
+        raise VectorStoreUnavailable("OpenAI 임베딩 설정이 완료되지 않았습니다.")
+    return settings
+
+
+def _use_local_index() -> bool:
+    return get_settings().retrieval_backend == "local"
+
+
 _VECTOR_DISABLED = False
 _VECTOR_PROBED = False
+# Guards the probe flags; never held across an await.
+_STATE_LOCK = threading.Lock()
 
 
 @lru_cache(maxsize=1)
-def _get_embeddings() -> OpenAIEmbeddings:
-    settings = _require_settings()
-    return OpenAIEmbeddings(model=settings.openai_embedding_model, api_key=SecretStr(settings.openai_api_key))
+def _get_embeddings() -> Embeddings:
+    settings = _require_embedding_settings()
+    if fake_backend_enabled():
+        embeddings = embedding_model(settings.openai_embedding_model)
+    else:
+        embeddings = embedding_model(settings.openai_embedding_model, api_key=SecretStr(settings.openai_api_key))
+    if not settings.embedding_cache_enabled:
+        return embeddings
+    backend = "fake" if fake_backend_enabled() else "openai"
+    return CachedEmbeddings(
+        embeddings,
+        namespace=f"{backend}:{settings.openai_embedding_model}",
+        path=settings.embedding_cache_path,
+        memory_entries=settings.embedding_cache_memory_entries,
+        dtype=settings.embedding_cache_dtype,
+    )
+
+
+def embedding_cache_stats() -> Optional[Dict[str, Any]]:
+    """Hit ratio and estimated saved latency of the query-embedding cache (None when off)."""
+
+    try:
+        embeddings = _get_embeddings()
+    except VectorStoreUnavailable:
+        return None
+    return embeddings.stats.as_dict() if isinstance(embeddings, CachedEmbeddings) else None
 
 
 @lru_cache(maxsize=1)
-def get_vector_store() -> PGVector:
+def get_sync_engine() -> Any:
+    """Shared engine for the sync store and index maintenance; connections carry the ANN search settings."""
+
+    from sqlalchemy import create_engine
+
+    from .ann_index import apply_session_tuning
+
     settings = _require_settings()
     engine = create_engine(
         settings.pgvector_connection,
         connect_args={"connect_timeout": settings.pgvector_connect_timeout},
         pool_pre_ping=True,
     )
-    return PGVector(
-        connection=engine,
+    apply_session_tuning(engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> PGVector:
+    from .pgvector_store import FilteredPGVector
+
+    settings = _require_settings()
+    return FilteredPGVector(
+        connection=get_sync_engine(),
         collection_name=settings.vector_collection,
         embeddings=_get_embeddings(),
         use_jsonb=True,
     )
 
 
-def _can_reach_pgvector(settings: Any) -> bool:
+def ensure_metadata_indexes() -> None:
+    """Create the metadata indexes used by constraint filters (idempotent)."""
+
+    from sqlalchemy import text
+
+    store = get_vector_store()
+    with store.session_maker() as session:
+        for ddl in METADATA_INDEX_DDL:
+            session.execute(text(ddl))
+        session.commit()
+
+
+def _pgvector_address(settings: Any) -> tuple[str, int] | None:
+    from sqlalchemy.engine.url import make_url
+
     try:
         url = make_url(settings.pgvector_connection)
     except Exception:
+        return None
+    return url.host or "localhost", url.port or 5432
+
+
+def _can_reach_pgvector(settings: Any) -> bool:
+    address = _pgvector_address(settings)
+    if address is None:
         return False
-    host = url.host or "localhost"
-    port = url.port or 5432
     try:
-        with socket.create_connection((host, port), timeout=settings.pgvector_connect_timeout):
+        with socket.create_connection(address, timeout=settings.pgvector_connect_timeout):
             return True
     except OSError:
         return False
 
 
-def vector_support_enabled() -> bool:
-    global _VECTOR_PROBED
+async def _acan_reach_pgvector(settings: Any) -> bool:
+    address = _pgvector_address(settings)
+    if address is None:
+        return False
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(*address), settings.pgvector_connect_timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+def _precheck_vector_support() -> Any:
+    """Shared fast path: False/True when settled, settings when a network probe is still needed."""
+
     if _VECTOR_DISABLED:
         return False
+    if _use_local_index():
+        from .local_index import local_index_available
+
+        if not local_index_available():
+            disable_vector_support()
+            return False
+        return True
     try:
         settings = _require_settings()
     except VectorStoreUnavailable:
         disable_vector_support()
         return False
-    if not _VECTOR_PROBED:
-        if not _can_reach_pgvector(settings):
-            disable_vector_support()
-            return False
+    if _VECTOR_PROBED:
+        return True
+    return settings
+
+
+def _record_probe(reachable: bool) -> bool:
+    global _VECTOR_PROBED
+    if not reachable:
+        disable_vector_support()
+        return False
+    with _STATE_LOCK:
         _VECTOR_PROBED = True
     return True
 
 
+def vector_support_enabled() -> bool:
+    settings = _precheck_vector_support()
+    if isinstance(settings, bool):
+        return settings
+    return _record_probe(_can_reach_pgvector(settings))
+
+
+async def avector_support_enabled() -> bool:
+    settings = _precheck_vector_support()
+    if isinstance(settings, bool):
+        return settings
+    return _record_probe(await _acan_reach_pgvector(settings))
+
+
 def disable_vector_support() -> None:
     global _VECTOR_DISABLED
-    _VECTOR_DISABLED = True
+    with _STATE_LOCK:
+        _VECTOR_DISABLED = True
 
 
 def _normalize_list(value: Any) -> List[str]:
@@ -123,14 +250,62 @@ def _doc_to_consumer_item(doc: Document) -> Dict[str, Any]:
         "description": description,
         "rating": rating,
         "source": meta.get("doc_id"),
+        "distance_km": meta.get("distance_km"),
+        "operating_hours": meta.get("operating_hours"),
     }
 
 
 def _search(query: str, k: int) -> Sequence[Document]:
-    store = get_vector_store()
-    return store.similarity_search(query, k=k)
+    constraints = query_constraints(query)
+    if _use_local_index():
+        from .local_index import get_local_index
+
+        return get_local_index().similarity_search(query, k=k, constraints=constraints)
+    from .pg_backend import get_pg_backend
+
+    return get_pg_backend().search(query, k, constraints=constraints)
+
+
+async def _asearch(query: str, k: int) -> Sequence[Document]:
+    constraints = query_constraints(query)
+    if _use_local_index():
+        from .local_index import get_local_index
+
+        return await get_local_index().asimilarity_search(query, k=k, constraints=constraints)
+    from .pg_backend import get_pg_backend
+
+    return await get_pg_backend().asearch(query, k, constraints=constraints)
+
+
+def _near(query: str, docs: Sequence[Document], limit: int, user_location: Optional[Tuple[float, float]]) -> Sequence[Document]:
+    from .proximity import nearby_documents, proximity_rerank, resolve_origin
+
+    origin = resolve_origin(query, user_location)
+    if origin is None:
+        return docs
+    settings = get_settings()
+    nearby = nearby_documents(origin, max(limit, settings.hybrid_candidates))
+    return proximity_rerank([docs], nearby, limit=limit, rrf_k=settings.hybrid_rrf_k)
+
+
+def _open(query: str, docs: Sequence[Document], limit: int) -> Sequence[Document]:
+    from .time_filter import keep_open, open_documents, query_time_window
+
+    window = query_time_window(query)
+    if window is None:
+        return docs
+    return top_up(top_up(keep_open(docs, window), open_documents(window, limit), limit), docs, limit)
+
+
+def search_consumer_items(
+    query: str, limit: int, *, user_location: Optional[Tuple[float, float]] = None
+) -> List[Dict[str, Any]]:
+    docs = _open(query, _near(query, _search(query, limit), limit, user_location), limit)
+    return [_doc_to_consumer_item(doc) for doc in docs]
 
 
-def search_consumer_items(query: str, limit: int) -> List[Dict[str, Any]]:
-    docs = _search(query, limit)
+async def asearch_consumer_items(
+    query: str, limit: int, *, user_location: Optional[Tuple[float, float]] = None
+) -> List[Dict[str, Any]]:
+    docs = _open(query, _near(query, await _asearch(query, limit), limit, user_location), limit)
     return [_doc_to_consumer_item(doc) for doc in docs]
@@ -0,0 +1,131 @@
+"""Token streaming of the final answer on top of the graph's ``messages``/``updates`` streams."""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from langchain_core.messages import AIMessageChunk, BaseMessage
+
+StreamPolicy = Literal["retract", "buffer"]
+STREAM_POLICIES: Tuple[str, ...] = ("retract", "buffer")
+STREAM_MODES = ["messages", "updates"]
+
+# Tag on the generate/basic_generate chains; only LLM tokens carrying it form the answer
+# (check_hallucination runs as an edge of the generate step and shares its node name).
+ANSWER_TAG = "answer"
+# Answers from these nodes are graded by check_hallucination and may be thrown away.
+VERIFIED_NODES = frozenset({"generate"})
+
+
+@dataclass
+class StreamEvent:
+    """One unit sent to the client.
+
+    ``token`` carries answer text, ``retract`` tells the client to discard everything
+    shown since the last retract (the answer failed the hallucination check), and
+    ``final`` closes the stream with the full response and timings.
+    """
+
+    kind: Literal["token", "retract", "final"]
+    text: str = ""
+    node: Optional[str] = None
+    ttft: Optional[float] = None
+    total: Optional[float] = None
+    cache_hit: bool = False
+    state: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def as_dict(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"kind": self.kind, "text": self.text}
+        if self.node:
+            payload["node"] = self.node
+        if self.kind == "final":
+            payload.update({"ttft": self.ttft, "total": self.total, "cache_hit": self.cache_hit})
+        return payload
+
+
+def resolve_policy(policy: Optional[str], default: str) -> StreamPolicy:
+    value = (policy or default).lower()
+    if value not in STREAM_POLICIES:
+        raise ValueError(f"지원하지 않는 스트리밍 정책입니다: {value} (retract | buffer)")
+    return value  # type: ignore[return-value]
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+class AnswerStreamer:
+    """Turns graph stream items into client events according to the policy.
+
+    ``retract``: answer tokens go out as they arrive; if the graph loops back to
+    ``rewrite`` after tokens were shown, a ``retract`` event is emitted.
+    ``buffer``: tokens from verified nodes are held back and the answer is released
+    once ``finalize`` runs. ``basic_generate`` is never graded, so it always streams.
+    """
+
+    def __init__(self, policy: StreamPolicy, *, started: Optional[float] = None) -> None:
+        self.policy = policy
+        self.started = time.perf_counter() if started is None else started
+        self.first_token_at: Optional[float] = None
+        self.state: Dict[str, Any] = {}
+        self._shown = False
+
+    @property
+    def ttft(self) -> Optional[float]:
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+    def _token(self, text: str, node: Optional[str]) -> StreamEvent:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self._shown = True
+        return StreamEvent("token", text=text, node=node)
+
+    def final(self, response: str, *, cache_hit: bool = False) -> List[StreamEvent]:
+        events: List[StreamEvent] = []
+        if not self._shown and response:
+            # Buffered, blocked, or served from a cache without token callbacks.
+            events.append(self._token(response, None))
+        events.append(
+            StreamEvent(
+                "final",
+                text=response,
+                ttft=self.ttft,
+                total=time.perf_counter() - self.started,
+                cache_hit=cache_hit,
+                state=self.state,
+            )
+        )
+        return events
+
+    def feed(self, mode: str, payload: Any) -> List[StreamEvent]:
+        if mode == "messages":
+            message, metadata = payload
+            metadata = metadata or {}
+            if ANSWER_TAG not in (metadata.get("tags") or ()):
+                return []
+            node = metadata.get("langgraph_node")
+            if self.policy == "buffer" and node in VERIFIED_NODES:
+                return []
+            # The full message is replayed at on_llm_end when nothing was streamed (cache hits).
+            if not isinstance(message, AIMessageChunk) and self._shown:
+                return []
+            text = _message_text(message)
+            return [self._token(text, node)] if text else []
+
+        events: List[StreamEvent] = []
+        for node, update in (payload or {}).items():
+            if update:
+                self.state.update(update)
+            if node == "rewrite" and self._shown:
+                self._shown = False
+                events.append(StreamEvent("retract", node=node))
+            elif node == "finalize":
+                events.extend(self.final(self.state.get("response", "")))
+        return events
+
+
+__all__ = ["ANSWER_TAG", "STREAM_MODES", "STREAM_POLICIES", "AnswerStreamer", "StreamEvent", "StreamPolicy", "resolve_policy"]
@@ -0,0 +1,48 @@
+"""Token counting helpers shared by ingest reporting and prompt budgeting."""
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+_FALLBACK_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=8)
+def _encoding_for(model: str) -> Optional[Any]:
+    try:
+        import tiktoken
+    except ImportError:  # pragma: no cover - tiktoken is a declared dependency
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception as exc:  # BPE files are downloaded on first use; offline runs land here
+        LOGGER.warning("tiktoken 인코딩을 불러오지 못해 근사치로 토큰을 셉니다: %s", exc)
+        return None
+    try:
+        return tiktoken.get_encoding(_FALLBACK_ENCODING)
+    except Exception as exc:
+        LOGGER.warning("tiktoken 인코딩을 불러오지 못해 근사치로 토큰을 셉니다: %s", exc)
+        return None
+
+
+def _approximate_tokens(text: str) -> int:
+    # Hangul syllables average ~1 token each with cl100k/o200k; ASCII averages ~4 chars per token.
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    if not text:
+        return 0
+    encoding = _encoding_for(model)
+    if encoding is None:
+        return _approximate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+__all__ = ["count_tokens"]
@@ -2,18 +2,24 @@
 from __future__ import annotations
 
 import argparse
+import json
 import sys
-from typing import Optional, Sequence
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
 
 from dotenv import load_dotenv
 
-from chatbot.app import get_app, run_chatbot  # re-export
+from chatbot.app import astream_chatbot, get_app, run_chatbot, run_chatbot_batch, stream_chatbot  # re-export
 from chatbot.graph import builder as graph_builder
+from chatbot.retrieval.proximity import parse_location
+from chatbot.streaming import STREAM_POLICIES
 
 load_dotenv()
 
-# Keep a module-level app reference for legacy ASGI imports
-CHATBOT_APP = get_app()
+def __getattr__(name: str) -> Any:
+	# Legacy ``CHATBOT_APP`` import: compile the graph on first access, not at import time.
+	if name == "CHATBOT_APP":
+		return get_app()
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def _safe_input(prompt: str) -> Optional[str]:
 	try:
@@ -22,11 +28,34 @@ def _safe_input(prompt: str) -> Optional[str]:
 		return None
 
 
+def _print_streamed(query: str, policy: Optional[str], location: Optional[Tuple[float, float]]) -> None:
+	print("\n--- 응답 ---")
+	for event in stream_chatbot(query, policy=policy, user_location=location):
+		if event.kind == "token":
+			print(event.text, end="", flush=True)
+		elif event.kind == "retract":
+			print("\n[검증 실패로 위 답변을 취소하고 다시 작성합니다]\n", flush=True)
+		else:
+			ttft = f"{event.ttft:.2f}s" if event.ttft is not None else "-"
+			cached = " · cache hit" if event.cache_hit else ""
+			print("\n--------------")
+			print(f"[latency] 첫 토큰 {ttft} · 전체 {event.total:.2f}s{cached}\n")
+
+
 def run_cli(argv: Optional[Sequence[str]] = None) -> int:
 	"""Run the consumer-focused terminal chatbot interface."""
 	parser = argparse.ArgumentParser(description="Itdaing LangGraph Chatbot CLI (consumer mode)")
+	parser.add_argument("--stream", action="store_true", help="답변 토큰을 생성되는 대로 출력")
+	parser.add_argument(
+		"--stream-policy",
+		choices=STREAM_POLICIES,
+		help="환각 검증 전 토큰 처리 방식 (retract: 먼저 출력 후 취소, buffer: 검증 후 출력, 기본값 STREAM_POLICY)",
+	)
+	parser.add_argument("--location", metavar="LAT,LON", help="현재 위치 (예: 35.1466,126.9199) — '근처' 질문을 거리순으로 추천")
 	args = parser.parse_args(list(argv) if argv is not None else None)
-	_ = args  # 현재는 추가 옵션이 없지만 argparse를 유지해 향후 확장 대비
+	location = parse_location(args.location) if args.location else None
+	if args.location and location is None:
+		parser.error("--location 은 '위도,경도' 형식이어야 합니다.")
 
 	print("[startup] PGVector 벡터 스토어에 연결 중...")
 	try:
@@ -51,17 +80,91 @@ def run_cli(argv: Optional[Sequence[str]] = None) -> int:
 			print("대화를 종료합니다.")
 			return 0
 
-		response = run_chatbot(query)
+		if args.stream:
+			_print_streamed(query, args.stream_policy, location)
+			continue
+		response = run_chatbot(query, user_location=location)
 		print("\n--- 응답 ---")
 		print(response)
 		print("--------------\n")
 
 
+ASGIMessage = Dict[str, Any]
+
+
+async def _read_body(receive: Callable[[], Awaitable[ASGIMessage]]) -> bytes:
+	body = b""
+	while True:
+		message = await receive()
+		body += message.get("body", b"")
+		if not message.get("more_body"):
+			return body
+
+
+async def _send_json(send: Callable[[ASGIMessage], Awaitable[None]], status: int, payload: Dict[str, Any]) -> None:
+	body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+	await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json; charset=utf-8")]})
+	await send({"type": "http.response.body", "body": body})
+
+
+async def asgi_app(scope: Dict[str, Any], receive: Callable[[], Awaitable[ASGIMessage]], send: Callable[[ASGIMessage], Awaitable[None]]) -> None:
+	"""Minimal ASGI endpoint: ``POST /chat {"query", "policy"?, "location"?}`` streams Server-Sent Events.
+
+	``location`` is ``[lat, lon]``, ``{"lat", "lon"}`` or ``"lat,lon"``.
+	Events are ``token`` / ``retract`` / ``final`` (with ``ttft`` and ``total`` seconds).
+	Serve with any ASGI server, e.g. ``uvicorn chatbot_app:asgi_app``.
+	"""
+	if scope["type"] == "lifespan":
+		while True:
+			message = await receive()
+			if message["type"] == "lifespan.startup":
+				await send({"type": "lifespan.startup.complete"})
+			elif message["type"] == "lifespan.shutdown":
+				await send({"type": "lifespan.shutdown.complete"})
+				return
+	if scope["type"] != "http":
+		return
+	if scope["path"] != "/chat" or scope["method"] != "POST":
+		await _send_json(send, 404, {"error": "POST /chat 만 지원합니다."})
+		return
+	try:
+		request = json.loads(await _read_body(receive) or b"{}")
+		query = str(request.get("query") or "").strip()
+	except (ValueError, AttributeError):
+		query = ""
+		request = {}
+	if not query:
+		await _send_json(send, 400, {"error": "query 필드가 필요합니다."})
+		return
+	policy = request.get("policy")
+	if policy is not None and policy not in STREAM_POLICIES:
+		await _send_json(send, 400, {"error": f"policy는 {', '.join(STREAM_POLICIES)} 중 하나여야 합니다."})
+		return
+	location = None
+	if request.get("location") is not None:
+		location = parse_location(request["location"])
+		if location is None:
+			await _send_json(send, 400, {"error": "location은 [위도, 경도] 형식이어야 합니다."})
+			return
+
+	await send(
+		{
+			"type": "http.response.start",
+			"status": 200,
+			"headers": [(b"content-type", b"text/event-stream; charset=utf-8"), (b"cache-control", b"no-cache")],
+		}
+	)
+	async for event in astream_chatbot(query, policy=policy, user_location=location):
+		data = json.dumps(event.as_dict(), ensure_ascii=False)
+		await send({"type": "http.response.body", "body": f"event: {event.kind}\ndata: {data}\n\n".encode("utf-8"), "more_body": True})
+	await send({"type": "http.response.body", "body": b""})
+
+
 def main() -> None:
 	raise SystemExit(run_cli())
 
 
-__all__ = ["CHATBOT_APP", "run_chatbot", "run_cli"]
+__all__ = ["CHATBOT_APP", "asgi_app", "run_chatbot", "run_chatbot_batch", "run_cli", "stream_chatbot"]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""Benchmark the vectorized CatalogScorer against the per-market score_market loop."""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from chatbot.dataset.catalog_scorer import CatalogScorer
+from chatbot.dataset.loader import load_markets_dataset
+from chatbot.dataset.market_utils import score_market
+
+DATA_DIR = ROOT_DIR / "data"
+QUERY_SUITES = ("test_prompts_100.json", "test_prompts_100_hard.json", "test_prompts_30_se.json", "test_prompts_30_se_hard.json")
+
+
+def _load_queries(limit: int) -> List[str]:
+    prompts = json.loads((DATA_DIR / "test_prompts.json").read_text(encoding="utf-8")).get("prompts", [])
+    queries = [p["text"] for p in prompts if p.get("role") == "consumer"]
+    for name in QUERY_SUITES:
+        path = DATA_DIR / name
+        if path.exists():
+            queries.extend(item["input"] for item in json.loads(path.read_text(encoding="utf-8")))
+    return queries[:limit] if limit else queries
+
+
+def _synthetic_catalog(size: int, seed: int) -> List[Dict[str, Any]]:
+    """Grow the seed catalog to ``size`` markets by recombining real field values."""
+
+    base = load_markets_dataset()
+    if size <= len(base):
+        return list(base[:size])
+    rng = random.Random(seed)
+    markets = list(base)
+    while len(markets) < size:
+        template, other = rng.choice(base), rng.choice(base)
+        markets.append(
+            {
+                **template,
+                "market_id": f"S{len(markets):06d}",
+                "market_attribute": rng.sample(
+                    template["market_attribute"] + other["market_attribute"],
+                    k=min(4, len(template["market_attribute"] + other["market_attribute"])),
+                ),
+                "market_location": other["market_location"],
+                "market_rating": round(rng.uniform(3.0, 5.0), 1),
+            }
+        )
+    return markets
+
+
+def _per_query(run: Callable[[str], Any], queries: Sequence[str], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            run(query)
+    return (time.perf_counter() - started) / (len(queries) * rounds)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark CatalogScorer against score_market")
+    parser.add_argument("--markets", type=int, nargs="+", default=[120, 10_000, 100_000], help="카탈로그 크기 (여러 개 지정 가능)")
+    parser.add_argument("--queries", type=int, default=50, help="사용할 질의 수 (0=전체)")
+    parser.add_argument("--rounds", type=int, default=3, help="질의 반복 횟수")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    queries = _load_queries(args.queries)
+    report: Dict[str, Any] = {"queries": len(queries), "rounds": args.rounds, "top_k": args.top_k, "catalogs": []}
+    for size in args.markets:
+        markets = _synthetic_catalog(size, args.seed)
+        started = time.perf_counter()
+        scorer = CatalogScorer(markets)
+        build_seconds = time.perf_counter() - started
+
+        # Parity first: the vectorized scores must equal the reference function.
+        max_diff = 0.0
+        top_agree = 0
+        for query in queries:
+            legacy = np.array([score_market(query, market) for market in markets])
+            fast = scorer.scores(query)
+            max_diff = max(max_diff, float(np.abs(legacy - fast).max()) if len(markets) else 0.0)
+            legacy_top = [int(row) for row in np.lexsort((np.arange(len(legacy)), -legacy))[: args.top_k] if legacy[row] > 0]
+            top_agree += [item.row for item in scorer.top_k(query, args.top_k, explain=False)] == legacy_top
+
+        legacy_rounds = max(1, args.rounds if size <= 10_000 else 1)
+        legacy_seconds = _per_query(lambda q: [score_market(q, m) for m in markets], queries, legacy_rounds)
+        vector_seconds = _per_query(lambda q: scorer.top_k(q, args.top_k), queries, args.rounds)
+        entry = {
+            "markets": len(markets),
+            "build_ms": round(build_seconds * 1000, 2),
+            "score_market_ms": round(legacy_seconds * 1000, 4),
+            "catalog_scorer_ms": round(vector_seconds * 1000, 4),
+            "speedup": round(legacy_seconds / vector_seconds, 1) if vector_seconds else None,
+            "max_abs_diff": max_diff,
+            "top_k_agreement": round(top_agree / len(queries), 4) if queries else None,
+        }
+        report["catalogs"].append(entry)
+        print(
+            f"[{entry['markets']:>7,} markets] score_market {entry['score_market_ms']:.3f} ms/q · "
+            f"CatalogScorer {entry['catalog_scorer_ms']:.3f} ms/q (x{entry['speedup']}) · "
+            f"build {entry['build_ms']:.0f} ms · max diff {max_diff:.2e}"
+        )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Saved catalog scorer benchmark to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
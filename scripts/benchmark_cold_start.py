@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""Benchmark cold start in fresh interpreters: import time, import-time memory and time to first answer."""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that should stay unloaded until first use; any of them in sys.modules right
+# after import is a startup regression.
+DEFERRED_MODULES = (
+    "langchain_classic",
+    "langchain_community",
+    "langchain_openai",
+    "langchain_postgres",
+    "langchain_text_splitters",
+    "psycopg",
+    "psycopg_pool",
+    "sqlalchemy",
+)
+
+# Runs in a fresh interpreter so nothing is warm: module caches, lru_caches, clients.
+_PROBE = r"""
+import json, resource, sys, time
+baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+import chatbot_app
+import_seconds = time.perf_counter() - started
+import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+loaded = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+started = time.perf_counter()
+response = chatbot_app.run_chatbot(sys.argv[1])
+first_answer = time.perf_counter() - started
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "import_rss_mb": import_rss / 1024,
+    "import_rss_delta_mb": (import_rss - baseline_rss) / 1024,
+    "first_answer_seconds": first_answer,
+    "total_seconds": import_seconds + first_answer,
+    "first_answer_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "deferred_loaded": loaded,
+    "answered": bool(response),
+}))
+"""
+
+
+def _run_once(query: str, env: Dict[str, str]) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE, query, json.dumps(DEFERRED_MODULES)],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"cold-start probe failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _summary(values: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "min": round(ordered[0], 4),
+        "p50": round(statistics.median(ordered), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure chatbot cold start in fresh interpreters")
+    parser.add_argument("--runs", type=int, default=5, help="새 프로세스 실행 횟수")
+    parser.add_argument("--query", default="북구에서 주말에 갈 만한 빈티지 플리마켓 추천해줘", help="첫 답변에 사용할 질문")
+    parser.add_argument(
+        "--real-backend",
+        action="store_true",
+        help="현재 MODEL_BACKEND/RETRIEVAL_BACKEND 그대로 측정 (기본: 오프라인 fake 모델 + 로컬 인덱스)",
+    )
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    env = dict(os.environ)
+    if not args.real_backend:
+        env.setdefault("MODEL_BACKEND", "fake")
+        env.setdefault("RETRIEVAL_BACKEND", "local")
+    # Cached answers would hide the first-answer path this benchmark is about.
+    env.setdefault("SEMANTIC_CACHE_ENABLED", "false")
+    env.setdefault("LLM_CACHE_ENABLED", "false")
+
+    runs: List[Dict[str, Any]] = [_run_once(args.query, env) for _ in range(max(1, args.runs))]
+    report: Dict[str, Any] = {
+        "runs": len(runs),
+        "model_backend": env.get("MODEL_BACKEND", "openai"),
+        "retrieval_backend": env.get("RETRIEVAL_BACKEND", "pgvector"),
+        "deferred_loaded": sorted({name for run in runs for name in run["deferred_loaded"]}),
+        "answered": all(run["answered"] for run in runs),
+    }
+    for field in (
+        "import_seconds",
+        "first_answer_seconds",
+        "total_seconds",
+        "import_rss_mb",
+        "import_rss_delta_mb",
+        "first_answer_rss_mb",
+    ):
+        report[field] = _summary([run[field] for run in runs])
+
+    print(
+        f"[import] p50 {report['import_seconds']['p50']:.3f}s · "
+        f"RSS {report['import_rss_mb']['p50']:.1f}MB (+{report['import_rss_delta_mb']['p50']:.1f}MB)"
+    )
+    print(
+        f"[first answer] p50 {report['first_answer_seconds']['p50']:.3f}s · total p50 {report['total_seconds']['p50']:.3f}s · "
+        f"RSS {report['first_answer_rss_mb']['p50']:.1f}MB"
+    )
+    if report["deferred_loaded"]:
+        print(f"[warning] import 시점에 로드된 지연 대상 모듈: {', '.join(report['deferred_loaded'])}")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Saved cold-start benchmark to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
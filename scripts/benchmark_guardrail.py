@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Benchmark the guardrail matcher: throughput, edge recall and false-positive rate."""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from chatbot.graph.guardrail import EDGE_PATTERNS, check_query, get_matcher
+
+DATA_DIR = ROOT_DIR / "data"
+BENIGN_SUITES = ("test_prompts_100.json", "test_prompts_100_hard.json", "test_prompts_30_se.json", "test_prompts_30_se_hard.json")
+
+
+def _load_suites() -> Dict[str, List[str]]:
+    prompts = json.loads((DATA_DIR / "test_prompts.json").read_text(encoding="utf-8")).get("prompts", [])
+    suites: Dict[str, List[str]] = {
+        "consumer": [p["text"] for p in prompts if p.get("role") == "consumer" and "가드레일" not in (p.get("section") or "")],
+        "seller": [p["text"] for p in prompts if p.get("role") == "seller" and "가드레일" not in (p.get("section") or "")],
+        "edge": [p["text"] for p in prompts if p.get("role") == "edge"],
+    }
+    benign: List[str] = []
+    for name in BENIGN_SUITES:
+        path = DATA_DIR / name
+        if path.exists():
+            benign.extend(item["input"] for item in json.loads(path.read_text(encoding="utf-8")))
+    suites["seller_zone"] = benign
+    return suites
+
+
+def _throughput(check: Callable[[str], bool], texts: Sequence[str], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            check(text)
+    elapsed = time.perf_counter() - started
+    return len(texts) * rounds / elapsed if elapsed else 0.0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the combined guardrail matcher")
+    parser.add_argument("--rounds", type=int, default=200, help="전체 프롬프트 반복 횟수")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    suites = _load_suites()
+    matcher = get_matcher()
+    legacy = [re.compile(p, re.IGNORECASE) for p in EDGE_PATTERNS]
+    all_texts = [text for texts in suites.values() for text in texts]
+
+    def combined(text: str) -> bool:
+        return check_query(text, matcher=matcher) is not None
+
+    def loop(text: str) -> bool:
+        return any(regex.search(text) for regex in legacy)
+
+    report: Dict[str, object] = {
+        "prompts": len(all_texts),
+        "rounds": args.rounds,
+        "combined_qps": round(_throughput(combined, all_texts, args.rounds)),
+        "legacy_loop_qps": round(_throughput(loop, all_texts, args.rounds)),
+        "suites": {},
+    }
+    for name, texts in suites.items():
+        blocked = [text for text in texts if combined(text)]
+        report["suites"][name] = {  # type: ignore[index]
+            "count": len(texts),
+            "blocked": len(blocked),
+            "rate": round(len(blocked) / len(texts), 4) if texts else 0.0,
+            "examples": blocked[:5],
+        }
+
+    print(f"[throughput] combined {report['combined_qps']:,} q/s · legacy loop {report['legacy_loop_qps']:,} q/s")
+    for name, stats in report["suites"].items():  # type: ignore[union-attr]
+        label = "recall" if name == "edge" else "false-positive"
+        print(f"[{name}] {stats['blocked']}/{stats['count']} 차단 ({label} {stats['rate']:.1%})")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Saved guardrail benchmark to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
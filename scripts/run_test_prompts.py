@@ -3,18 +3,35 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
+import random
+import subprocess
+import time
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Sequence
+from typing import Any, Dict, List, Sequence
 
+import numpy as np
 from dotenv import load_dotenv
 
-from chatbot.app import run_chatbot
+from chatbot.app import ainvoke_chatbot, get_llm_cache, invoke_chatbot_batch
+from chatbot.graph.grounding import grounding_stats
+from chatbot.graph.metrics import get_metrics
+from chatbot.retrieval.vector_store import embedding_cache_stats
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 DEFAULT_INPUT = ROOT_DIR / "data" / "test_prompts.json"
 DEFAULT_RESULTS_DIR = ROOT_DIR / "results"
+DEFAULT_SUITES = (
+    "test_prompts.json",
+    "test_prompts_100.json",
+    "test_prompts_100_hard.json",
+    "test_prompts_30_se.json",
+    "test_prompts_30_se_hard.json",
+)
+# Relative worsening allowed by --compare before a metric counts as a regression.
+DEFAULT_TOLERANCE = 0.10
 
 
 def _load_prompts(path: Path) -> Sequence[dict]:
@@ -40,15 +57,302 @@ def _default_output_path(results_dir: Path) -> Path:
     return results_dir / f"test_prompts_results_{timestamp}.json"
 
 
+def _llm_cache_summary() -> dict | None:
+    cache = get_llm_cache()
+    return cache.stats_by_node() if cache is not None else None
+
+
+def _print_embedding_cache(stats: dict | None) -> None:
+    if stats:
+        print(
+            f"  [embedding-cache] hit {stats['hits']} / miss {stats['misses']} ({stats['hit_rate']:.0%}) · "
+            f"절약 {stats['saved_seconds']:.2f}s"
+        )
+
+
+def _context_packing_summary(records: Sequence[dict]) -> dict:
+    packed = [r for r in records if r.get("context_tokens") or r.get("context_tokens_saved")]
+    sent = sum(r["context_tokens"] for r in packed)
+    saved = sum(r["context_tokens_saved"] for r in packed)
+    return {
+        "requests": len(packed),
+        "context_tokens": sent,
+        "saved_tokens": saved,
+        "saved_ratio": round(saved / (sent + saved), 4) if sent + saved else 0.0,
+        "saved_per_request": round(saved / len(packed), 1) if packed else 0.0,
+    }
+
+
+def _print_context_packing(stats: dict) -> None:
+    if stats["requests"]:
+        print(
+            f"  [context-packing] {stats['requests']}건 · 컨텍스트 {stats['context_tokens']} 토큰 · "
+            f"절약 {stats['saved_tokens']} 토큰 ({stats['saved_ratio']:.0%}, 요청당 {stats['saved_per_request']})"
+        )
+
+
+def _print_grounding(stats: dict) -> None:
+    if stats["checks"]:
+        agreement = f" · LLM 일치율 {stats['agreement_rate']:.0%} ({stats['audited']}건)" if stats["audited"] else ""
+        print(
+            f"  [grounding] 검증 {stats['checks']}건 · 로컬 판정 {stats['local_grounded'] + stats['local_ungrounded']}건 · "
+            f"LLM 위임 {stats['escalated']}건 ({stats['escalation_rate']:.0%}){agreement}"
+        )
+
+
+def _metrics_summary() -> dict | None:
+    metrics = get_metrics()
+    return metrics.snapshot() if metrics is not None else None
+
+
+def _load_suite(path: Path) -> List[dict]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(payload, dict):
+        return [
+            {"suite": path.stem, "id": item.get("id"), "role": item.get("role"), "text": item.get("text", "")}
+            for item in payload.get("prompts", [])
+            if item.get("text")
+        ]
+    return [
+        {"suite": path.stem, "id": f"{path.stem}-{index}", "role": "seller", "text": item.get("input", "")}
+        for index, item in enumerate(payload, start=1)
+        if item.get("input")
+    ]
+
+
+def _route_of(state: Dict[str, Any]) -> str:
+    if state.get("cache_hit"):
+        return "cache"
+    if state.get("guardrail"):
+        return "blocked"
+    if state.get("budget_exhausted"):
+        return "fallback"
+    if state.get("rewrites"):
+        return "rag_rewrite"
+    return "rag" if state.get("context") else "general"
+
+
+async def _timed_request(item: dict) -> dict:
+    started = time.perf_counter()
+    record = {"suite": item["suite"], "id": item["id"], "route": "error", "error": None}
+    try:
+        state = await ainvoke_chatbot(item["text"])
+        record["route"] = _route_of(state)
+        record["rewrites"] = state.get("rewrites", 0)
+        record["tokens"] = state.get("tokens_used", 0)
+        packing = state.get("context_packing") or {}
+        record["context_tokens"] = packing.get("packed_tokens", 0)
+        record["context_tokens_saved"] = packing.get("saved_tokens", 0)
+    except Exception as exc:  # pragma: no cover - diagnostic only
+        record["error"] = f"{type(exc).__name__}: {exc}"
+    record["latency"] = time.perf_counter() - started
+    return record
+
+
+async def _closed_loop(items: Sequence[dict], concurrency: int) -> List[dict]:
+    """``concurrency`` virtual users, each sending its next prompt as soon as it gets a reply."""
+
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    records: List[dict] = []
+
+    async def _user() -> None:
+        while not queue.empty():
+            records.append(await _timed_request(queue.get_nowait()))
+
+    await asyncio.gather(*(_user() for _ in range(max(1, concurrency))))
+    return records
+
+
+async def _open_loop(items: Sequence[dict], rate: float, concurrency: int, seed: int) -> List[dict]:
+    """Poisson arrivals at ``rate`` req/s regardless of latency (capped at ``concurrency`` in flight, 0=none)."""
+
+    rng = random.Random(seed)
+    limiter = asyncio.Semaphore(concurrency) if concurrency > 0 else None
+
+    async def _send(item: dict, delay: float) -> dict:
+        await asyncio.sleep(delay)
+        if limiter is None:
+            return await _timed_request(item)
+        async with limiter:
+            return await _timed_request(item)
+
+    delays: List[float] = []
+    clock = 0.0
+    for _ in items:
+        delays.append(clock)
+        clock += rng.expovariate(rate)
+    return list(await asyncio.gather(*(_send(item, delay) for item, delay in zip(items, delays))))
+
+
+def _latency_stats(latencies: Sequence[float]) -> dict:
+    if not latencies:
+        return {"count": 0}
+    values = np.asarray(latencies, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(p50), 4),
+        "p95": round(float(p95), 4),
+        "p99": round(float(p99), 4),
+        "max": round(float(values.max()), 4),
+    }
+
+
+def _group_stats(records: Sequence[dict], key: str) -> dict:
+    groups: Dict[str, List[dict]] = {}
+    for record in records:
+        groups.setdefault(record[key], []).append(record)
+    total = len(records) or 1
+    return {
+        name: {
+            "share": round(len(group) / total, 4),
+            "error_rate": round(sum(1 for r in group if r["error"]) / len(group), 4),
+            "latency": _latency_stats([r["latency"] for r in group if not r["error"]]),
+        }
+        for name, group in sorted(groups.items())
+    }
+
+
+def _seconds(stats: dict, key: str) -> str:
+    value = stats.get(key)
+    return f"{value}s" if value is not None else "-"
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of ``current`` against a previous benchmark report (higher latency, lower throughput, more errors)."""
+
+    regressions: List[str] = []
+    cur, base = current["totals"], baseline["totals"]
+    if base.get("throughput_rps") and cur["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {base['throughput_rps']} → {cur['throughput_rps']} req/s")
+    if cur["error_rate"] > base.get("error_rate", 0.0) + 0.01:
+        regressions.append(f"error_rate {base.get('error_rate', 0.0):.2%} → {cur['error_rate']:.2%}")
+    for quantile in ("p50", "p95", "p99"):
+        before = baseline["latency"].get(quantile)
+        after = current["latency"].get(quantile)
+        if before and after and after > before * (1 + tolerance):
+            regressions.append(f"latency {quantile} {before}s → {after}s")
+    for route, stats in current["routes"].items():
+        before = baseline.get("routes", {}).get(route, {}).get("latency", {}).get("p95")
+        after = stats["latency"].get("p95")
+        if before and after and after > before * (1 + tolerance):
+            regressions.append(f"route {route} p95 {before}s → {after}s")
+    return regressions
+
+
+def run_benchmark(args: argparse.Namespace) -> int:
+    suite_paths = args.suite or [ROOT_DIR / "data" / name for name in DEFAULT_SUITES]
+    items = [item for path in suite_paths if path.exists() for item in _load_suite(path)]
+    items = items * max(1, args.repeat)
+    if args.limit and args.limit > 0:
+        items = items[: args.limit]
+    if not items:
+        raise SystemExit("벤치마크할 프롬프트가 없습니다.")
+
+    mode = f"open-loop {args.rate} req/s" if args.rate else f"closed-loop x{args.concurrency}"
+    print(f"[benchmark] {len(items)}개 요청 · {mode}")
+    started = time.perf_counter()
+    if args.rate:
+        records = asyncio.run(_open_loop(items, args.rate, args.concurrency if args.concurrency_set else 0, args.seed))
+    else:
+        records = asyncio.run(_closed_loop(items, args.concurrency))
+    wall = time.perf_counter() - started
+
+    errors = sum(1 for r in records if r["error"])
+    report = {
+        "generated_at": datetime.now(UTC).isoformat(),
+        "git_revision": _git_revision(),
+        "config": {
+            "suites": [path.name for path in suite_paths],
+            "requests": len(records),
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "totals": {
+            "requests": len(records),
+            "errors": errors,
+            "error_rate": round(errors / len(records), 4),
+            "duration_seconds": round(wall, 3),
+            "throughput_rps": round(len(records) / wall, 3) if wall else 0.0,
+        },
+        "latency": _latency_stats([r["latency"] for r in records if not r["error"]]),
+        "routes": _group_stats(records, "route"),
+        "suites": _group_stats(records, "suite"),
+        "llm_cache": _llm_cache_summary(),
+        "embedding_cache": embedding_cache_stats(),
+        "context_packing": _context_packing_summary(records),
+        "grounding": grounding_stats(),
+        "metrics": _metrics_summary(),
+        "errors": [r for r in records if r["error"]][:20],
+    }
+
+    output_path = args.output or DEFAULT_RESULTS_DIR / f"benchmark_{datetime.now(UTC).strftime('%Y%m%dT%H%M%SZ')}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    totals, latency = report["totals"], report["latency"]
+    print(
+        f"[totals] {totals['throughput_rps']} req/s · 오류 {totals['errors']} ({totals['error_rate']:.1%}) · "
+        f"p50 {_seconds(latency, 'p50')} · p95 {_seconds(latency, 'p95')} · p99 {_seconds(latency, 'p99')}"
+    )
+    for route, stats in report["routes"].items():
+        print(f"  [route] {route}: {stats['share']:.0%} · p95 {_seconds(stats['latency'], 'p95')} · 오류 {stats['error_rate']:.1%}")
+    _print_embedding_cache(report["embedding_cache"])
+    _print_context_packing(report["context_packing"])
+    _print_grounding(report["grounding"])
+    print(f"Saved benchmark report to {output_path}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = _compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"[compare] {args.compare.name} 대비 회귀 {len(regressions)}건:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"[compare] {args.compare.name} 대비 회귀 없음 (허용 {args.tolerance:.0%})")
+    return 0
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Run stored test prompts via the chatbot")
     parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="프롬프트 JSON 경로")
     parser.add_argument("--output", type=Path, help="결과 JSON 출력 경로")
     parser.add_argument("--limit", type=int, default=0, help="실행할 최대 프롬프트 수 (0=전체)")
+    bench = parser.add_argument_group("benchmark")
+    bench.add_argument("--benchmark", action="store_true", help="동시 부하 벤치마크 모드")
+    bench.add_argument("--suite", type=Path, action="append", help="벤치마크 프롬프트 JSON (반복 지정, 기본: data/test_prompts*.json)")
+    bench.add_argument(
+        "--concurrency", type=int, help="동시 사용자 수 (기본 8, --rate와 함께 쓰면 최대 동시 요청 수; 일반 실행은 배치 동시 실행 수)"
+    )
+    bench.add_argument("--rate", type=float, default=0.0, help="초당 도착 요청 수 (포아송 오픈 루프, 0=클로즈드 루프)")
+    bench.add_argument("--repeat", type=int, default=1, help="프롬프트 세트 반복 횟수")
+    bench.add_argument("--seed", type=int, default=0, help="도착 간격 난수 시드")
+    bench.add_argument("--compare", type=Path, help="이전 벤치마크 JSON과 비교해 회귀 시 종료 코드 1")
+    bench.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="회귀 판정 허용 비율")
     args = parser.parse_args(list(argv) if argv is not None else None)
 
     load_dotenv()
 
+    if args.benchmark:
+        args.concurrency_set = args.concurrency is not None
+        args.concurrency = args.concurrency if args.concurrency is not None else 8
+        return run_benchmark(args)
+
     prompts = _load_prompts(args.input)
     selected = list(_iter_consumer_records(prompts))
     if args.limit and args.limit > 0:
@@ -61,27 +365,24 @@ def main(argv: Sequence[str] | None = None) -> int:
     results_dir.mkdir(parents=True, exist_ok=True)
     output_path = args.output or _default_output_path(results_dir)
 
+    # One batch: shared query embedding and vector search, bounded concurrency, per-item errors.
+    states = invoke_chatbot_batch([record.get("text", "") for record in selected], max_concurrency=args.concurrency)
     records = []
     failures = 0
-    for record in selected:
-        prompt_id = record.get("id")
-        role = "consumer"
-        text = record.get("text", "")
-        error: str | None = None
-        response: str | None = None
-        try:
-            response = run_chatbot(text)
-        except Exception as exc:  # pragma: no cover - diagnostic only
-            error = str(exc)
-            failures += 1
+    for record, state in zip(selected, states):
+        error = state.get("error")
+        failures += 1 if error else 0
+        packing = state.get("context_packing") or {}
         records.append(
             {
-                "id": prompt_id,
-                "role": role,
+                "id": record.get("id"),
+                "role": "consumer",
                 "section": record.get("section"),
-                "text": text,
-                "result": response,
+                "text": record.get("text", ""),
+                "result": None if error else state.get("response", ""),
                 "error": error,
+                "context_tokens": packing.get("packed_tokens", 0),
+                "context_tokens_saved": packing.get("saved_tokens", 0),
             }
         )
 
@@ -91,10 +392,20 @@ def main(argv: Sequence[str] | None = None) -> int:
         "count": len(records),
         "roles": ["consumer"],
         "failures": failures,
+        "llm_cache": _llm_cache_summary(),
+        "embedding_cache": embedding_cache_stats(),
+        "context_packing": _context_packing_summary(records),
+        "grounding": grounding_stats(),
+        "metrics": _metrics_summary(),
         "results": records,
     }
     output_path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"Saved {len(records)} responses to {output_path}")
+    for node, stats in (summary["llm_cache"] or {}).items():
+        print(f"  [llm-cache] {node}: hit {stats['hits']} / miss {stats['misses']} ({stats['hit_rate']:.0%})")
+    _print_embedding_cache(summary["embedding_cache"])
+    _print_context_packing(summary["context_packing"])
+    _print_grounding(summary["grounding"])
     return 0
 
 
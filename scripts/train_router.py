@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""Train and evaluate the local router classifier on the labelled prompt suites."""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from chatbot.config import get_settings
+from chatbot.graph.intent_classifier import IntentClassifier, Route, mentions_other_region, train_classifier
+
+DATA_DIR = ROOT_DIR / "data"
+# Seller-side zone questions: the consumer bot routes all of them to general_answer.
+SELLER_SUITES = ("test_prompts_100.json", "test_prompts_100_hard.json", "test_prompts_30_se.json", "test_prompts_30_se_hard.json")
+OUT_OF_SCOPE_SECTION = "가드레일"
+# Out-of-region / off-topic consumer negatives and extra Gwangju positives.
+EXTRA_EXAMPLES = "router_examples.json"
+
+Example = Tuple[str, Route]
+
+
+def _label_main_suite(path: Path) -> List[Example]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    examples: List[Example] = []
+    for prompt in payload.get("prompts", []):
+        text = (prompt.get("text") or "").strip()
+        if not text:
+            continue
+        is_consumer = (prompt.get("role") or "").lower() == "consumer"
+        in_scope = OUT_OF_SCOPE_SECTION not in (prompt.get("section") or "")
+        examples.append((text, "rag_answer" if is_consumer and in_scope else "general_answer"))
+    return examples
+
+
+def _label_seller_suite(path: Path) -> List[Example]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return [(item["input"].strip(), "general_answer") for item in payload if (item.get("input") or "").strip()]
+
+
+def _label_extra(path: Path) -> List[Example]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return [(item["text"].strip(), item["label"]) for item in payload.get("examples", []) if (item.get("text") or "").strip()]
+
+
+def load_examples() -> List[Example]:
+    examples = _label_main_suite(DATA_DIR / "test_prompts.json")
+    for name in SELLER_SUITES:
+        path = DATA_DIR / name
+        if path.exists():
+            examples.extend(_label_seller_suite(path))
+    if (DATA_DIR / EXTRA_EXAMPLES).exists():
+        examples.extend(_label_extra(DATA_DIR / EXTRA_EXAMPLES))
+    # Suites overlap (the *_hard files share prompts); keep the first label per text.
+    unique = {}
+    for text, label in examples:
+        unique.setdefault(text, label)
+    return list(unique.items())
+
+
+def _split(examples: Sequence[Example], holdout: float) -> Tuple[List[Example], List[Example]]:
+    train: List[Example] = []
+    test: List[Example] = []
+    for example in examples:
+        bucket = zlib.crc32(example[0].encode("utf-8")) % 1000
+        (test if bucket < holdout * 1000 else train).append(example)
+    return train, test
+
+
+def evaluate(classifier: IntentClassifier, examples: Sequence[Example], threshold: float) -> dict:
+    """Holdout metrics as the router sees them: other-region queries always go to the LLM."""
+
+    correct = confident = confident_correct = 0
+    started = time.perf_counter()
+    for text, label in examples:
+        predicted, confidence = classifier.predict(text)
+        correct += predicted == label
+        if confidence >= threshold and not mentions_other_region(text):
+            confident += 1
+            confident_correct += predicted == label
+    elapsed = time.perf_counter() - started
+    total = len(examples) or 1
+    return {
+        "count": len(examples),
+        "accuracy": round(correct / total, 4),
+        "llm_calls_saved": round(confident / total, 4),
+        "confident_accuracy": round(confident_correct / confident, 4) if confident else None,
+        "micros_per_query": round(elapsed / total * 1e6, 1),
+    }
+
+
+def calibrate_threshold(
+    classifier: IntentClassifier,
+    examples: Sequence[Example],
+    *,
+    target_precision: float,
+    min_confident: int,
+) -> Optional[float]:
+    """Lowest threshold whose confident holdout predictions reach ``target_precision``.
+
+    Calibrated on the raw classifier (no region guard), so out-of-region negatives
+    count against it. None when no threshold keeps ``min_confident`` predictions.
+    """
+
+    scored = [(classifier.predict(text), label) for text, label in examples]
+    for step in range(50, 100):
+        threshold = step / 100
+        hits = [predicted == label for (predicted, confidence), label in scored if confidence >= threshold]
+        if len(hits) < min_confident:
+            return None
+        if sum(hits) / len(hits) >= target_precision:
+            return threshold
+    return None
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Train the local router classifier")
+    parser.add_argument("--output", type=Path, default=settings.router_classifier_path, help="모델 저장 경로")
+    parser.add_argument("--threshold", type=float, default=settings.router_classifier_threshold, help="LLM 생략 신뢰도 기준")
+    parser.add_argument("--holdout", type=float, default=0.3, help="평가용 홀드아웃 비율")
+    parser.add_argument("--target-precision", type=float, default=0.99, help="임계값 보정 시 목표 정확도")
+    parser.add_argument("--min-confident", type=int, default=30, help="임계값 보정에 필요한 최소 확신 예측 수")
+    parser.add_argument("--eval-only", action="store_true", help="평가만 하고 모델을 저장하지 않음")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    examples = load_examples()
+    train, test = _split(examples, args.holdout)
+    rag = sum(label == "rag_answer" for _, label in examples)
+    test_rag = sum(label == "rag_answer" for _, label in test)
+    print(
+        f"[data] {len(examples)}개 예시 (rag {rag} / general {len(examples) - rag}), "
+        f"train {len(train)} / holdout {len(test)} (rag {test_rag})"
+    )
+
+    candidate = train_classifier([text for text, _ in train], [label for _, label in train])
+    report = evaluate(candidate, test, args.threshold)
+    print(
+        f"[holdout] accuracy {report['accuracy']:.1%} · threshold {args.threshold} 이상 {report['llm_calls_saved']:.1%} "
+        f"(LLM 라우터 호출 절감) · 그중 정확도 {report['confident_accuracy'] or 0:.1%} · {report['micros_per_query']}µs/query"
+    )
+
+    calibrated = calibrate_threshold(
+        candidate, test, target_precision=args.target_precision, min_confident=args.min_confident
+    )
+    if calibrated is None:
+        print(f"[calibrate] 목표 정확도 {args.target_precision:.0%}를 만족하는 임계값이 없습니다. 분류기를 끄거나 데이터를 보강하세요.")
+    else:
+        print(f"[calibrate] 목표 정확도 {args.target_precision:.0%} 기준 권장 임계값 {calibrated}")
+        if args.threshold < calibrated:
+            print(f"[calibrate] 경고: 현재 임계값 {args.threshold}이 권장값보다 낮습니다 (ROUTER_CLASSIFIER_THRESHOLD).")
+
+    if args.eval_only:
+        return 0
+    final = train_classifier([text for text, _ in examples], [label for _, label in examples])
+    final.save(args.output)
+    print(f"전체 데이터로 재학습한 모델을 저장했습니다: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())